@@ -4,6 +4,9 @@ pragma solidity 0.8.2;
 import "@openzeppelin/contracts/access/AccessControl.sol";
 import "@openzeppelin/contracts/proxy/utils/Initializable.sol";
 import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-IERC20Permit.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
 import "@openzeppelin/contracts/utils/structs/EnumerableSet.sol";
 
 import "@etherisc/gif-interface/contracts/components/Product.sol";
@@ -22,12 +25,17 @@ contract RainProduct is
 
     bytes32 public constant INSURER_ROLE = keccak256("INSURER");
 
+    bytes32 public constant TREASURY_NAME = "Treasury";
+
     uint256 public constant COORD_MULTIPLIER = 10**6;
     uint256 public constant PERCENTAGE_MULTIPLIER = 2**24;
     uint256 public constant PRECIPITATION_MULTIPLIER = 100;
 
     uint256 public constant PRECIPITATION_MIN = 0;
     uint256 public constant PRECIPITATION_MAX = 10000;
+
+    // minimum time after the oracle response for cohort members to materialize their policies
+    uint256 public constant COHORT_MATERIALIZATION_PERIOD = 7 days;
     
     struct Risk {
         bytes32 id; // hash over placeId, start, end
@@ -58,6 +66,35 @@ contract RainProduct is
         uint256 precHist;
         uint256 sumInsured;
     }
+    // sum insured and premium of the underwritten and not yet processed policies
+    struct Exposure {
+        uint128 sumInsured;
+        uint128 premium;
+    }
+    // per risk settlement data fixed at the oracle callback, fits a single slot
+    struct Settlement {
+        uint32 payoutPercentage;
+        uint40 responseAt;
+        uint32 policies; // underwritten policies at the time of the oracle response
+        bool claimMode; // payouts are claimed via claimPayout(s) instead of being pushed by the insurer
+    }
+    // per application data written at applyForPolicy, resolves the risk of a process
+    // and avoids the GIF application fetch and decode in the oracle and settlement paths
+    struct PolicyData {
+        bytes32 riskId;
+        uint128 sumInsured;
+        uint128 premium;
+    }
+    // merkle root commitment to a large cohort of policies for a single risk.
+    // sum insured and premium are the amounts of the not yet materialized cohort members
+    struct Cohort {
+        bytes32 root; // merkle root over the leafs (index, policyHolder, sumInsured, premium)
+        bytes32 processId; // cohort application (never underwritten), usable for triggerOracle
+        uint128 sumInsured;
+        uint128 premium;
+        uint32 members;
+        uint32 materialized;
+    }
 
     uint256 private _oracleId;
     IERC20 private _token;
@@ -69,22 +106,30 @@ contract RainProduct is
     bytes32 [] private _applications; // useful for debugging, might need to get rid of this
     mapping(address /* policyHolder */ => bytes32 [] /* processIds */) private _processIdsForHolder; // hold list of applications/policies Ids for address
     mapping(address /* policyHolder */ => Process [] /* processIds */) private _processesForHolder; // hold list of applications/policies for address
-
-    // events
-    event LogRainPolicyApplicationCreated(bytes32 policyId, address policyHolder, uint256 premiumAmount, uint256 sumInsuredAmount);
-    event LogRainPolicyCreated(bytes32 policyId, address policyHolder, uint256 premiumAmount, uint256 sumInsuredAmount);
-    event LogRainOracleCallbackReceived(uint256 requestId, bytes32 processId, bytes fireCategory);
-    event LogRainClaimConfirmed(bytes32 processId, uint256 claimId, uint256 payoutAmount);
-    event LogRainPayoutExecuted(bytes32 processId, uint256 claimId, uint256 payoutId, uint256 payoutAmount);
-    event LogRainRiskDataCreated(bytes32 riskId, bytes32 placeId, uint256 startDate, uint256 endDate);
-    event LogRainRiskProcessed(bytes32 riskId, uint256 policies);
-    event LogRainPolicyProcessed(bytes32 policyId);
-    event LogRainClaimCreated(bytes32 policyId, uint256 claimId, uint256 payoutAmount);
-    event LogRainPayoutCreated(bytes32 policyId, uint256 payoutAmount);
-    event LogRainRiskDataRequested(uint256 requestId, bytes32 riskId, bytes32 placeId, uint256 startDate, uint256 endDate);
-    event LogRainRiskDataRequestCancelled(bytes32 processId, uint256 requestId);
-    event LogRainRiskDataReceived(uint256 requestId, bytes32 riskId, uint256 precActual);
-
+    mapping(bytes32 /* riskId */ => Exposure) private _riskExposure;
+    mapping(bytes32 /* placeId */ => Exposure) private _placeExposure;
+    mapping(bytes32 /* riskId */ => uint256 /* max sum insured, 0: no cap */) private _riskExposureCap;
+    mapping(bytes32 /* riskId */ => Settlement) private _settlements;
+    mapping(bytes32 /* riskId */ => bool) private _payoutClaimMode;
+    mapping(bytes32 /* processId */ => PolicyData) private _policyData;
+    mapping(bytes32 /* riskId */ => Cohort) private _cohorts;
+    mapping(bytes32 /* riskId */ => mapping(uint256 /* index / 256 */ => uint256 /* bitmap */)) private _cohortMaterialized;
+
+    // events. the first indexed topic is the policy id for policy events and the risk id for risk events
+    event LogRainPolicyApplicationCreated(bytes32 indexed policyId, address indexed policyHolder, bytes32 indexed riskId, uint256 premiumAmount, uint256 sumInsuredAmount);
+    event LogRainPolicyCreated(bytes32 indexed policyId, address indexed policyHolder, bytes32 indexed riskId, uint256 premiumAmount, uint256 sumInsuredAmount);
+    event LogRainRiskDataCreated(bytes32 indexed riskId, bytes32 indexed placeId, uint256 startDate, uint256 endDate);
+    event LogRainRiskProcessed(bytes32 indexed riskId, uint256 policies, uint256 payouts, uint256 payoutAmount); // settlement summary per batch
+    event LogRainPolicyProcessed(bytes32 indexed policyId);
+    event LogRainClaimCreated(bytes32 indexed policyId, uint256 claimId, uint256 payoutAmount);
+    event LogRainPayoutCreated(bytes32 indexed policyId, uint256 payoutAmount);
+    event LogRainRiskDataRequested(uint256 requestId, bytes32 indexed riskId, bytes32 indexed placeId, uint256 startDate, uint256 endDate);
+    event LogRainRiskDataRequestCancelled(bytes32 indexed riskId, bytes32 indexed processId, uint256 requestId);
+    event LogRainRiskDataReceived(uint256 requestId, bytes32 indexed riskId, uint256 precActual);
+    event LogRainCohortCreated(bytes32 indexed riskId, bytes32 indexed processId, bytes32 root, uint256 members, uint256 sumInsuredAmount);
+    event LogRainCohortPolicyMaterialized(bytes32 indexed riskId, uint256 index, bytes32 indexed policyId);
+    event LogRainCohortClosed(bytes32 indexed riskId, uint256 materialized, uint256 sumInsuredAmount);
+    event LogRainPayoutClaimModeSet(bytes32 indexed riskId, bool enabled);
 
     constructor(
         bytes32 productName,
@@ -164,7 +209,9 @@ contract RainProduct is
 
         Risk storage risk = _risks[riskId];
         require(risk.createdAt > 0, "ERROR:RAIN-002:RISK_UNKNOWN");
-        require(EnumerableSet.length(_policies[riskId]) == 0, "ERROR:RAIN-003:RISK_WITH_POLICIES_NOT_ADJUSTABLE");
+        require(
+            EnumerableSet.length(_policies[riskId]) == 0 && _cohorts[riskId].root == bytes32(0), 
+            "ERROR:RAIN-003:RISK_WITH_POLICIES_NOT_ADJUSTABLE");
         
         risk.trigger = trigger;
         risk.exit = exit;
@@ -173,6 +220,14 @@ contract RainProduct is
         risk.updatedAt = block.timestamp; // solhint-disable-line
     }
 
+    function setRiskExposureCap(bytes32 riskId, uint256 maxSumInsured)
+        external
+        onlyRole(INSURER_ROLE)
+    {
+        require(_risks[riskId].createdAt > 0, "ERROR:RAIN-007:RISK_UNKNOWN");
+        _riskExposureCap[riskId] = maxSumInsured;
+    }
+
     function getRiskId(
         bytes32 placeId,
         uint256 startDate,
@@ -195,52 +250,35 @@ contract RainProduct is
         onlyRole(INSURER_ROLE)
         returns(bytes32 processId)
     {
-        Risk storage risk = _risks[riskId];
-        require(risk.createdAt > 0, "ERROR:RAIN-004:RISK_UNDEFINED");
-        require(policyHolder != address(0), "ERROR:RAIN-005:POLICY_HOLDER_ZERO");
-
-        bytes memory metaData = "";
-        bytes memory applicationData = abi.encode(riskId);
-
-        processId = _newApplication(
-            policyHolder, 
-            premium, 
-            sumInsured,
-            metaData,
-            applicationData);
-
-        _applications.push(processId);
-
-        // remember for which policy holder this application is
-        _processIdsForHolder[policyHolder].push(processId);
-        _processesForHolder[policyHolder].push(
-            Process(
-                risk.id, 
-                processId, 
-                risk.startDate, 
-                risk.endDate, 
-                risk.placeId, 
-                risk.precHist,
-                sumInsured)
-        );
-
-        emit LogRainPolicyApplicationCreated(
-            processId, 
-            policyHolder, 
-            premium, 
-            sumInsured);
+        (processId, ) = _applyForPolicy(policyHolder, premium, sumInsured, riskId);
+    }
 
-        bool success = _underwrite(processId);
+    /* single transaction issuance of a paid policy. the policy holder signs an EIP-2612 permit 
+     * for the premium amount in favour of the GIF treasury (no separate approve transaction). 
+     * the application is underwritten and the premium collected in the same transaction. 
+     * reverts unless the policy is underwritten and the full premium is paid
+     */
+    function applyForPolicyWithPermit(
+        address policyHolder, 
+        uint256 premium, 
+        uint256 sumInsured,
+        bytes32 riskId,
+        uint256 deadline,
+        uint8 v,
+        bytes32 r,
+        bytes32 s
+    ) 
+        external 
+        onlyRole(INSURER_ROLE)
+        returns(bytes32 processId)
+    {
+        _permitPremium(policyHolder, premium, deadline, v, r, s);
 
-        if (success) {
-            EnumerableSet.add(_policies[riskId], processId);
+        bool success;
+        (processId, success) = _applyForPolicy(policyHolder, premium, sumInsured, riskId);
 
-            emit LogRainPolicyCreated(
-                processId, 
-                policyHolder, 
-                premium, 
-                sumInsured);
-        }
+        require(success, "ERROR:RAIN-070:UNDERWRITING_FAILED");
+        require(_getPolicy(processId).premiumPaidAmount == premium, "ERROR:RAIN-071:PREMIUM_NOT_PAID");
     }
 
     function underwrite(
@@ -251,15 +289,22 @@ contract RainProduct is
         returns(bool success)
     {
         // ensure the application for processId exists
-        _getApplication(processId);
+        IPolicy.Application memory application = _getApplication(processId);
+        bytes32 riskId = _getRiskId(processId);
+        _checkNoCohortProcess(processId, riskId);
+        _checkExposureCap(riskId, application.sumInsuredAmount);
+
         success = _underwrite(processId);
 
         if (success) {
-            IPolicy.Application memory application = _getApplication(processId);
+            EnumerableSet.add(_policies[riskId], processId);
+            _addExposure(riskId, _risks[riskId].placeId, application.sumInsuredAmount, application.premiumAmount);
+
             IPolicy.Metadata memory metadata = _getMetadata(processId);
             emit LogRainPolicyCreated(
                 processId, 
                 metadata.owner, 
+                riskId,
                 application.premiumAmount, 
                 application.sumInsuredAmount);
         }
@@ -297,6 +342,35 @@ contract RainProduct is
         (success, fee, netPremium) = _collectPremium(policyId, amount);
     }
 
+    /* batched version of collectPremium(policyId, from, amount) for a payer covering many policies
+     * (eg a distributor paying for a cooperative). the amounts for policies not owned by 'from' are
+     * moved directly from 'from' to the policy holders with a single transferFrom per run of
+     * consecutive policies with the same holder (pass the policies grouped by holder), policies
+     * owned by 'from' need no transfer. the premiums are then collected per policy via the treasury
+     * to keep the per policy accounting. 'from' needs to provide an allowance for this contract,
+     * policy holders for the treasury. reverts unless the premium collection succeeds for all
+     * policies, transferred amounts are never left with a policy holder without the corresponding
+     * premium payment
+     */
+    function collectPremiums(bytes32 [] calldata policyIds, address from, uint256 [] calldata amounts)
+        external
+        onlyRole(INSURER_ROLE)
+        returns(bool success, uint256 fee, uint256 netPremium)
+    {
+        require(policyIds.length == amounts.length, "ERROR:RAIN-060:LENGTH_MISMATCH");
+        _transferPremiums(policyIds, from, amounts);
+
+        for (uint256 i = 0; i < policyIds.length; i++) {
+            (bool policySuccess, uint256 policyFee, uint256 policyNetPremium) = _collectPremium(policyIds[i], amounts[i]);
+            require(policySuccess, "ERROR:RAIN-063:PREMIUM_COLLECTION_FAILED");
+
+            fee += policyFee;
+            netPremium += policyNetPremium;
+        }
+
+        success = true;
+    }
+
     function adjustPremiumSumInsured(
         bytes32 processId,
         uint256 expectedPremiumAmount,
@@ -305,7 +379,144 @@ contract RainProduct is
         external
         onlyRole(INSURER_ROLE)
     {
+        bytes32 riskId = _getRiskId(processId);
+        _checkNoCohortProcess(processId, riskId);
+
+        // exposure of underwritten and not yet processed policies follows the adjusted amounts
+        if (EnumerableSet.contains(_policies[riskId], processId)) {
+            PolicyData memory policy = _policyData[processId];
+            bytes32 placeId = _risks[riskId].placeId;
+            _removeExposure(riskId, placeId, policy.sumInsured, policy.premium);
+
+            if (sumInsuredAmount > policy.sumInsured) {
+                _checkExposureCap(riskId, sumInsuredAmount);
+            }
+
+            _addExposure(riskId, placeId, sumInsuredAmount, expectedPremiumAmount);
+        }
+
         _adjustPremiumSumInsured(processId, expectedPremiumAmount, sumInsuredAmount);
+        _setPolicyData(processId, riskId, sumInsuredAmount, expectedPremiumAmount);
+    }
+
+    /* alternative issuance for cohorts with many small policies per risk (eg seasonal smallholder 
+     * programs). instead of one application per policy holder the insurer commits to a merkle root 
+     * over all cohort members. only the aggregated exposure is recorded on chain, premiums are 
+     * settled with the program outside of the product. one cohort per risk, in addition to the 
+     * regular per policy issuance for the same risk. the cohort is represented by a single 
+     * application (owned by the insurer, not underwritten) that may be used to trigger the oracle
+     */
+    function createCohort(
+        bytes32 riskId,
+        bytes32 root,
+        uint256 members,
+        uint256 sumInsured,
+        uint256 premium
+    )
+        external
+        onlyRole(INSURER_ROLE)
+        returns(bytes32 processId)
+    {
+        Risk storage risk = _risks[riskId];
+        require(risk.createdAt > 0, "ERROR:RAIN-080:RISK_UNKNOWN");
+        require(risk.responseAt == 0, "ERROR:RAIN-081:ORACLE_ALREADY_RESPONDED");
+        require(root != bytes32(0), "ERROR:RAIN-082:COHORT_ROOT_ZERO");
+        require(members > 0, "ERROR:RAIN-083:COHORT_EMPTY");
+        require(_cohorts[riskId].root == bytes32(0), "ERROR:RAIN-084:COHORT_ALREADY_EXISTS");
+        _checkExposureCap(riskId, sumInsured);
+
+        processId = _newApplication(
+            _msgSender(), 
+            premium, 
+            sumInsured,
+            "",
+            abi.encode(riskId, risk.placeId, risk.startDate, risk.endDate));
+
+        _setPolicyData(processId, riskId, sumInsured, premium);
+
+        _cohorts[riskId] = Cohort(
+            root,
+            processId,
+            SafeCast.toUint128(sumInsured),
+            SafeCast.toUint128(premium),
+            SafeCast.toUint32(members),
+            0);
+
+        _addExposure(riskId, risk.placeId, sumInsured, premium);
+
+        emit LogRainCohortCreated(riskId, processId, root, members, sumInsured);
+    }
+
+    /* lazy policy creation for a cohort member with a payout. after the oracle response anybody 
+     * (the policy holder or a keeper) may submit the member data with its merkle proof. the policy 
+     * is then created, underwritten and processed in the same transaction, the payout goes to the 
+     * policy holder committed in the leaf. cohort members without payout are never materialized
+     */
+    function materializeCohortPolicy(
+        bytes32 riskId,
+        uint256 index,
+        address policyHolder,
+        uint256 sumInsured,
+        uint256 premium,
+        bytes32 [] calldata proof
+    )
+        external
+        returns(bytes32 policyId)
+    {
+        _materializeCohortMember(riskId, index, getCohortLeaf(index, policyHolder, sumInsured, premium), proof);
+
+        uint256 payoutPercentage = _settlements[riskId].payoutPercentage;
+        require(payoutPercentage > 0, "ERROR:RAIN-087:NO_PAYOUT");
+        policyId = _newCohortPolicy(riskId, policyHolder, sumInsured, premium);
+
+        emit LogRainCohortPolicyMaterialized(riskId, index, policyId);
+
+        _processPolicy(policyId, riskId, sumInsured, payoutPercentage);
+        _removeExposure(riskId, _risks[riskId].placeId, sumInsured, premium);
+    }
+
+    /* ends the cohort at least COHORT_MATERIALIZATION_PERIOD after the oracle response (eg at the
+     * end of the claiming period). the exposure of the cohort members not materialized so far is released
+     */
+    function closeCohort(bytes32 riskId)
+        external
+        onlyRole(INSURER_ROLE)
+    {
+        Cohort storage cohort = _cohorts[riskId];
+        require(cohort.root != bytes32(0), "ERROR:RAIN-085:COHORT_UNKNOWN");
+        uint256 responseAt = _settlements[riskId].responseAt;
+        require(responseAt > 0, "ERROR:RAIN-086:ORACLE_RESPONSE_MISSING");
+        require(
+            block.timestamp >= responseAt + COHORT_MATERIALIZATION_PERIOD, // solhint-disable-line
+            "ERROR:RAIN-094:COHORT_MATERIALIZATION_PERIOD_OPEN");
+
+        uint256 sumInsured = cohort.sumInsured;
+        _removeExposure(riskId, _risks[riskId].placeId, sumInsured, cohort.premium);
+        _decline(cohort.processId);
+
+        // closed cohorts keep members and materialized counts, root is removed
+        cohort.root = bytes32(0);
+        cohort.sumInsured = 0;
+        cohort.premium = 0;
+
+        emit LogRainCohortClosed(riskId, cohort.materialized, sumInsured);
+    }
+
+    function getCohortLeaf(
+        uint256 index,
+        address policyHolder,
+        uint256 sumInsured,
+        uint256 premium
+    )
+        public
+        pure
+        returns(bytes32 leaf)
+    {
+        leaf = keccak256(abi.encodePacked(index, policyHolder, sumInsured, premium));
+    }
+
+    function isCohortPolicyMaterialized(bytes32 riskId, uint256 index) public view returns(bool) {
+        return _cohortMaterialized[riskId][index / 256] & (1 << (index % 256)) != 0;
     }
 
     function triggerOracle(bytes32 processId, bytes calldata secrets, string calldata source) 
@@ -362,7 +573,7 @@ contract RainProduct is
         risk.requestTriggered = false;
         risk.updatedAt = block.timestamp; // solhint-disable-line
 
-        emit LogRainRiskDataRequestCancelled(processId, risk.requestId);
+        emit LogRainRiskDataRequestCancelled(risk.id, processId, risk.requestId);
     }
 
     function oracleCallback(
@@ -399,6 +610,12 @@ contract RainProduct is
         risk.responseAt = block.timestamp; // solhint-disable-line
         risk.updatedAt = block.timestamp; // solhint-disable-line
 
+        _settlements[riskId] = Settlement(
+            SafeCast.toUint32(risk.payoutPercentage),
+            SafeCast.toUint40(risk.responseAt),
+            SafeCast.toUint32(EnumerableSet.length(_policies[riskId])),
+            _payoutClaimMode[riskId]);
+
         emit LogRainRiskDataReceived(
             requestId, 
             riskId,
@@ -410,12 +627,12 @@ contract RainProduct is
         onlyRole(INSURER_ROLE)
         returns(bytes32 [] memory processedPolicies)
     {
-        Risk memory risk = _risks[riskId];
-        require(risk.responseAt > 0, "ERROR:RAIN-030:ORACLE_RESPONSE_MISSING");
+        Settlement memory settlement = _settlements[riskId];
+        require(settlement.responseAt > 0, "ERROR:RAIN-030:ORACLE_RESPONSE_MISSING");
 
         uint256 elements = EnumerableSet.length(_policies[riskId]);
         if (elements == 0) {
-            emit LogRainRiskProcessed(riskId, 0);
+            emit LogRainRiskProcessed(riskId, 0, 0, 0);
             return new bytes32[](0);
         }
 
@@ -426,57 +643,125 @@ contract RainProduct is
         }
 
         processedPolicies = new bytes32[](batchSize);
-        uint256 elementIdx = elements - 1;
+        uint256 sumInsured = 0;
+        uint256 premium = 0;
+        uint256 payouts = 0;
+        uint256 payoutAmount = 0;
 
+        // cohort applications are never underwritten and therefore never part of _policies
         for (uint256 i = 0; i < batchSize; i++) {
             // grab and process the last policy
-            bytes32 policyId = EnumerableSet.at(_policies[riskId], elementIdx - i);
-            processPolicy(policyId);
+            bytes32 policyId = EnumerableSet.at(_policies[riskId], elements - 1 - i);
+            PolicyData memory policy = _policyData[policyId];
+
+            uint256 policyPayoutAmount = _processPolicy(policyId, riskId, policy.sumInsured, settlement.payoutPercentage);
             processedPolicies[i] = policyId;
+
+            sumInsured += policy.sumInsured;
+            premium += policy.premium;
+
+            if (policyPayoutAmount > 0) {
+                payouts++;
+                payoutAmount += policyPayoutAmount;
+            }
         }
 
-        emit LogRainRiskProcessed(riskId, batchSize);
+        // exposure updated once per batch
+        _removeExposure(riskId, _risks[riskId].placeId, sumInsured, premium);
+
+        emit LogRainRiskProcessed(riskId, batchSize, payouts, payoutAmount);
     }
 
     function processPolicy(bytes32 policyId)
         public
         onlyRole(INSURER_ROLE)
     {
-        IPolicy.Application memory application = _getApplication(policyId);
-        bytes32 riskId = abi.decode(application.data, (bytes32));
-        Risk memory risk = _risks[riskId];
+        PolicyData memory policy = _policyData[policyId];
+        Settlement memory settlement = _settlements[policy.riskId];
 
-        require(risk.id == riskId, "ERROR:RAIN-031:RISK_ID_INVALID");
-        require(risk.responseAt > 0, "ERROR:RAIN-032:ORACLE_RESPONSE_MISSING");
-        require(EnumerableSet.contains(_policies[riskId], policyId), "ERROR:RAIN-033:POLICY_FOR_RISK_UNKNOWN");
+        require(policy.riskId != bytes32(0), "ERROR:RAIN-031:RISK_ID_INVALID");
+        _checkNoCohortProcess(policyId, policy.riskId);
+        require(settlement.responseAt > 0, "ERROR:RAIN-032:ORACLE_RESPONSE_MISSING");
+        require(EnumerableSet.contains(_policies[policy.riskId], policyId), "ERROR:RAIN-033:POLICY_FOR_RISK_UNKNOWN");
 
-        EnumerableSet.remove(_policies[riskId], policyId);
+        _processPolicy(policyId, policy.riskId, policy.sumInsured, settlement.payoutPercentage);
+        _removeExposure(policy.riskId, _risks[policy.riskId].placeId, policy.sumInsured, policy.premium);
+    }
 
-        uint256 claimAmount = calculatePayout(
-            risk.payoutPercentage, 
-            application.sumInsuredAmount);
-        
-        uint256 claimId = _newClaim(policyId, claimAmount, "");
-        emit LogRainClaimCreated(policyId, claimId, claimAmount);
+    /* optional pull based settlement. the mode is fixed for the risk with the oracle response 
+     * (together with the payout percentage), afterwards policy holders or a relayer claim the 
+     * payouts instead of the insurer processing all policies of the risk
+     */
+    function setPayoutClaimMode(bytes32 riskId, bool enabled)
+        external
+        onlyRole(INSURER_ROLE)
+    {
+        Risk storage risk = _risks[riskId];
+        require(risk.createdAt > 0, "ERROR:RAIN-100:RISK_UNKNOWN");
+        require(risk.responseAt == 0, "ERROR:RAIN-101:ORACLE_ALREADY_RESPONDED");
 
-        if (claimAmount > 0) {
-            uint256 payoutAmount = claimAmount;
-            _confirmClaim(policyId, claimId, payoutAmount);
+        _payoutClaimMode[riskId] = enabled;
 
-            uint256 payoutId = _newPayout(policyId, claimId, payoutAmount, "");
-            _processPayout(policyId, payoutId);
+        emit LogRainPayoutClaimModeSet(riskId, enabled);
+    }
 
-            emit LogRainPayoutCreated(policyId, payoutAmount);
-        }
-        else {
-            _declineClaim(policyId, claimId);
-            _closeClaim(policyId, claimId);
-        }
+    /* claims the payout of a single policy for a risk in claim mode. callable by anybody, 
+     * the payout is always made to the policy holder. creates the same GIF claim and payout 
+     * records as processPolicy
+     */
+    function claimPayout(bytes32 policyId)
+        external
+    {
+        PolicyData memory policy = _policyData[policyId];
+        Settlement memory settlement = _settlements[policy.riskId];
+        _checkClaimable(policyId, policy.riskId, settlement);
 
-        _expire(policyId);
-        _close(policyId);
+        _processPolicy(policyId, policy.riskId, policy.sumInsured, settlement.payoutPercentage);
+        _removeExposure(policy.riskId, _risks[policy.riskId].placeId, policy.sumInsured, policy.premium);
+    }
 
-        emit LogRainPolicyProcessed(policyId);
+    /* batched claimPayout for relayers. policies already processed (eg claimed by the policy 
+     * holder in the meantime) are skipped instead of failing the batch. exposure is updated
+     * once per run of consecutive policies of the same risk
+     */
+    function claimPayouts(bytes32 [] calldata policyIds)
+        external
+        returns(uint256 claimed)
+    {
+        bytes32 riskId;
+        Settlement memory settlement;
+        uint256 sumInsured = 0;
+        uint256 premium = 0;
+
+        for (uint256 i = 0; i < policyIds.length; i++) {
+            PolicyData memory policy = _policyData[policyIds[i]];
+
+            if (policy.riskId != riskId) {
+                if (sumInsured > 0 || premium > 0) {
+                    _removeExposure(riskId, _risks[riskId].placeId, sumInsured, premium);
+                }
+
+                riskId = policy.riskId;
+                settlement = _settlements[riskId];
+                sumInsured = 0;
+                premium = 0;
+            }
+
+            if (!EnumerableSet.contains(_policies[riskId], policyIds[i])) {
+                continue;
+            }
+
+            _checkClaimable(policyIds[i], riskId, settlement);
+            _processPolicy(policyIds[i], riskId, policy.sumInsured, settlement.payoutPercentage);
+
+            sumInsured += policy.sumInsured;
+            premium += policy.premium;
+            claimed++;
+        }
+
+        if (sumInsured > 0 || premium > 0) {
+            _removeExposure(riskId, _risks[riskId].placeId, sumInsured, premium);
+        }
     }
 
     function calculatePayout(uint256 payoutPercentage, uint256 sumInsuredAmount)
@@ -541,6 +826,30 @@ contract RainProduct is
     function getRiskId(uint256 idx) external view returns(bytes32 riskId) { return _riskIds[idx]; }
     function getRisk(bytes32 riskId) external view returns(Risk memory risk) { return _risks[riskId]; }
 
+    function getRiskExposure(bytes32 riskId) external view returns(uint256 sumInsured, uint256 premium) {
+        Exposure memory exposure = _riskExposure[riskId];
+        return (exposure.sumInsured, exposure.premium);
+    }
+    function getPlaceExposure(bytes32 placeId) external view returns(uint256 sumInsured, uint256 premium) {
+        Exposure memory exposure = _placeExposure[placeId];
+        return (exposure.sumInsured, exposure.premium);
+    }
+    function getRiskExposureCap(bytes32 riskId) external view returns(uint256 maxSumInsured) {
+        return _riskExposureCap[riskId];
+    }
+    function getSettlement(bytes32 riskId) external view returns(Settlement memory settlement) {
+        return _settlements[riskId];
+    }
+    function getPayoutClaimMode(bytes32 riskId) external view returns(bool enabled) {
+        return _payoutClaimMode[riskId];
+    }
+    function getPolicyData(bytes32 processId) external view returns(PolicyData memory policyData) {
+        return _policyData[processId];
+    }
+    function getCohort(bytes32 riskId) external view returns(Cohort memory cohort) {
+        return _cohorts[riskId];
+    }
+
     function applications() external view returns(uint256 applicationCount) {
         return _applications.length;
     }
@@ -595,9 +904,232 @@ contract RainProduct is
         //require(precHist >= 0, "ERROR:RAIN-043:RISK_APH_ZERO_INVALID");
     }
 
+    function _applyForPolicy(
+        address policyHolder, 
+        uint256 premium, 
+        uint256 sumInsured,
+        bytes32 riskId
+    ) 
+        internal
+        returns(bytes32 processId, bool success)
+    {
+        Risk storage risk = _risks[riskId];
+        require(risk.createdAt > 0, "ERROR:RAIN-004:RISK_UNDEFINED");
+        require(policyHolder != address(0), "ERROR:RAIN-005:POLICY_HOLDER_ZERO");
+        _checkExposureCap(riskId, sumInsured);
+
+        bytes memory metaData = "";
+        // place and season allow riskpool bundle filtering without a call back to the product
+        bytes memory applicationData = abi.encode(riskId, risk.placeId, risk.startDate, risk.endDate);
+
+        processId = _newApplication(
+            policyHolder, 
+            premium, 
+            sumInsured,
+            metaData,
+            applicationData);
+
+        _applications.push(processId);
+        _setPolicyData(processId, riskId, sumInsured, premium);
+
+        // remember for which policy holder this application is
+        _processIdsForHolder[policyHolder].push(processId);
+        _processesForHolder[policyHolder].push(
+            Process(
+                risk.id, 
+                processId, 
+                risk.startDate, 
+                risk.endDate, 
+                risk.placeId, 
+                risk.precHist,
+                sumInsured)
+        );
+
+        emit LogRainPolicyApplicationCreated(
+            processId, 
+            policyHolder, 
+            riskId,
+            premium, 
+            sumInsured);
+
+        success = _underwrite(processId);
+
+        if (success) {
+            EnumerableSet.add(_policies[riskId], processId);
+            _addExposure(riskId, risk.placeId, sumInsured, premium);
+
+            emit LogRainPolicyCreated(
+                processId, 
+                policyHolder, 
+                riskId,
+                premium, 
+                sumInsured);
+        }
+    }
+
+    function _processPolicy(bytes32 policyId, bytes32 riskId, uint256 sumInsured, uint256 payoutPercentage)
+        private
+        returns(uint256 payoutAmount)
+    {
+        EnumerableSet.remove(_policies[riskId], policyId);
+
+        uint256 claimAmount = calculatePayout(
+            payoutPercentage, 
+            sumInsured);
+        
+        uint256 claimId = _newClaim(policyId, claimAmount, "");
+        emit LogRainClaimCreated(policyId, claimId, claimAmount);
+
+        if (claimAmount > 0) {
+            payoutAmount = claimAmount;
+            _confirmClaim(policyId, claimId, payoutAmount);
+
+            uint256 payoutId = _newPayout(policyId, claimId, payoutAmount, "");
+            _processPayout(policyId, payoutId);
+
+            emit LogRainPayoutCreated(policyId, payoutAmount);
+        }
+        else {
+            _declineClaim(policyId, claimId);
+            _closeClaim(policyId, claimId);
+        }
+
+        _expire(policyId);
+        _close(policyId);
+
+        emit LogRainPolicyProcessed(policyId);
+    }
+
+    // verifies the proof and marks the member as materialized (one bit per cohort member)
+    function _materializeCohortMember(bytes32 riskId, uint256 index, bytes32 leaf, bytes32 [] calldata proof) private {
+        Cohort storage cohort = _cohorts[riskId];
+        require(cohort.root != bytes32(0), "ERROR:RAIN-085:COHORT_UNKNOWN");
+        require(_settlements[riskId].responseAt > 0, "ERROR:RAIN-086:ORACLE_RESPONSE_MISSING");
+        require(index < cohort.members, "ERROR:RAIN-088:COHORT_INDEX_INVALID");
+        require(!isCohortPolicyMaterialized(riskId, index), "ERROR:RAIN-089:COHORT_POLICY_ALREADY_MATERIALIZED");
+        require(MerkleProof.verifyCalldata(proof, cohort.root, leaf), "ERROR:RAIN-090:COHORT_PROOF_INVALID");
+
+        _cohortMaterialized[riskId][index / 256] |= 1 << (index % 256);
+        cohort.materialized += 1;
+    }
+
+    function _newCohortPolicy(bytes32 riskId, address policyHolder, uint256 sumInsured, uint256 premium)
+        private
+        returns(bytes32 policyId)
+    {
+        // amounts move from the cohort to the policy, materialized members never exceed the declared totals
+        Cohort storage cohort = _cohorts[riskId];
+        require(
+            sumInsured <= cohort.sumInsured && premium <= cohort.premium,
+            "ERROR:RAIN-093:COHORT_TOTALS_EXCEEDED");
+
+        cohort.sumInsured -= SafeCast.toUint128(sumInsured);
+        cohort.premium -= SafeCast.toUint128(premium);
+
+        Risk storage risk = _risks[riskId];
+        policyId = _newApplication(
+            policyHolder, 
+            premium, 
+            sumInsured,
+            "",
+            abi.encode(riskId, risk.placeId, risk.startDate, risk.endDate));
+
+        _setPolicyData(policyId, riskId, sumInsured, premium);
+        require(_underwrite(policyId), "ERROR:RAIN-091:UNDERWRITING_FAILED");
+
+        emit LogRainPolicyCreated(policyId, policyHolder, riskId, premium, sumInsured);
+    }
+
+    // the permit may already have been submitted by a third party (eg front-running the
+    // signature seen in the mempool), only the resulting treasury allowance matters
+    function _permitPremium(address policyHolder, uint256 premium, uint256 deadline, uint8 v, bytes32 r, bytes32 s) private {
+        address treasury = _getContractAddress(TREASURY_NAME);
+
+        try IERC20Permit(address(_token)).permit(policyHolder, treasury, premium, deadline, v, r, s) {} catch {}
+        require(_token.allowance(policyHolder, treasury) >= premium, "ERROR:RAIN-072:PREMIUM_ALLOWANCE_INSUFFICIENT");
+    }
+
+    function _checkClaimable(bytes32 policyId, bytes32 riskId, Settlement memory settlement) private view {
+        require(riskId != bytes32(0), "ERROR:RAIN-102:POLICY_UNKNOWN");
+        _checkNoCohortProcess(policyId, riskId);
+        require(settlement.claimMode, "ERROR:RAIN-103:PAYOUT_CLAIM_MODE_DISABLED");
+        require(EnumerableSet.contains(_policies[riskId], policyId), "ERROR:RAIN-104:POLICY_NOT_CLAIMABLE");
+    }
+
+    // the cohort application only carries the aggregated cohort amounts and is used to trigger
+    // the oracle, it must never become a policy (exposure is already accounted by the cohort)
+    function _checkNoCohortProcess(bytes32 processId, bytes32 riskId) private view {
+        require(_cohorts[riskId].processId != processId, "ERROR:RAIN-092:COHORT_PROCESS_NOT_SUPPORTED");
+    }
+
+    function _setPolicyData(bytes32 processId, bytes32 riskId, uint256 sumInsured, uint256 premium) private {
+        _policyData[processId] = PolicyData(
+            riskId,
+            SafeCast.toUint128(sumInsured),
+            SafeCast.toUint128(premium));
+    }
+
+    function _checkExposureCap(bytes32 riskId, uint256 sumInsured) private view {
+        uint256 cap = _riskExposureCap[riskId];
+        require(cap == 0 || _riskExposure[riskId].sumInsured + sumInsured <= cap, "ERROR:RAIN-006:RISK_EXPOSURE_CAP_EXCEEDED");
+    }
+
+    function _addExposure(bytes32 riskId, bytes32 placeId, uint256 sumInsured, uint256 premium) private {
+        uint128 sumInsured128 = SafeCast.toUint128(sumInsured);
+        uint128 premium128 = SafeCast.toUint128(premium);
+
+        Exposure storage riskExposure = _riskExposure[riskId];
+        riskExposure.sumInsured += sumInsured128;
+        riskExposure.premium += premium128;
+
+        Exposure storage placeExposure = _placeExposure[placeId];
+        placeExposure.sumInsured += sumInsured128;
+        placeExposure.premium += premium128;
+    }
+
+    function _removeExposure(bytes32 riskId, bytes32 placeId, uint256 sumInsured, uint256 premium) private {
+        uint128 sumInsured128 = SafeCast.toUint128(sumInsured);
+        uint128 premium128 = SafeCast.toUint128(premium);
+
+        Exposure storage riskExposure = _riskExposure[riskId];
+        riskExposure.sumInsured -= sumInsured128;
+        riskExposure.premium -= premium128;
+
+        Exposure storage placeExposure = _placeExposure[placeId];
+        placeExposure.sumInsured -= sumInsured128;
+        placeExposure.premium -= premium128;
+    }
+
+    function _transferPremiums(bytes32 [] calldata policyIds, address from, uint256 [] calldata amounts)
+        private
+    {
+        address owner = address(0);
+        address nextOwner = policyIds.length > 0 ? _getMetadata(policyIds[0]).owner : address(0);
+        uint256 runAmount = 0;
+
+        for (uint256 i = 0; i < policyIds.length; i++) {
+            owner = nextOwner;
+            nextOwner = i + 1 < policyIds.length ? _getMetadata(policyIds[i + 1]).owner : address(0);
+
+            if (owner == from) {
+                continue;
+            }
+
+            runAmount += amounts[i];
+
+            // one transfer for consecutive policies of the same holder
+            if (nextOwner != owner) {
+                bool transferSuccessful = TransferHelper.unifiedTransferFrom(_token, from, owner, runAmount);
+                require(transferSuccessful, "ERROR:RAIN-061:PREMIUM_TRANSFER_FAILED");
+                runAmount = 0;
+            }
+        }
+    }
+
+    // single SLOAD instead of fetching and decoding the GIF application
     function _getRiskId(bytes32 processId) private view returns(bytes32 riskId) {
-        IPolicy.Application memory application = _getApplication(processId);
-        (riskId) = abi.decode(application.data, (bytes32));
+        riskId = _policyData[processId].riskId;
+        require(riskId != bytes32(0), "ERROR:RAIN-008:PROCESS_UNKNOWN");
     }
 
 }
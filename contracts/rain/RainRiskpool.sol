@@ -17,6 +17,25 @@ contract RainRiskpool is
     // restricts the maximal sum of sum insured that are secured by gthe riskpool
     uint256 public constant SUM_OF_SUM_INSURED_CAP = 10**24;
 
+    uint256 public constant MAX_PLACE_PREFIXES = 4;
+
+    // bundle filter decoded once at bundle creation
+    // a zero value for any field means no restriction
+    struct BundleFilter {
+        uint96 maxSumInsured; // max sum insured per policy
+        uint40 seasonStart; // earliest risk start date
+        uint40 seasonEnd; // latest risk end date
+        uint8 placePrefixes; // number of allowed place prefixes
+    }
+
+    struct PlacePrefix {
+        bytes32 prefix; // left aligned, as placeId
+        bytes32 mask; // covers the non zero bytes of prefix
+    }
+
+    mapping(uint256 /* bundleId */ => BundleFilter) private _bundleFilters;
+    mapping(uint256 /* bundleId */ => PlacePrefix [MAX_PLACE_PREFIXES]) private _placePrefixes;
+
     constructor(
         bytes32 name,
         uint256 collateralization,
@@ -45,19 +64,134 @@ contract RainRiskpool is
         returns(uint256 bundleId)
     {
         bundleId = super.createBundle(filter, initialAmount);
+
+        if (filter.length > 0) {
+            _setBundleFilter(bundleId, filter);
+        }
     }
 
 
-    // trivial implementation that matches every application
+    // bundles without a filter match every application.
+    // application data is expected as abi.encode(riskId, placeId, startDate, endDate)
     function bundleMatchesApplication(
         IBundle.Bundle memory bundle, 
         IPolicy.Application memory application
     ) 
         public override
-        pure
+        view
         returns(bool isMatching) 
     {
-        isMatching = true;
+        BundleFilter memory bundleFilter = _bundleFilters[bundle.id];
+
+        if (bundleFilter.maxSumInsured > 0 && application.sumInsuredAmount > bundleFilter.maxSumInsured) {
+            return false;
+        }
+
+        if (bundleFilter.seasonStart == 0 && bundleFilter.seasonEnd == 0 && bundleFilter.placePrefixes == 0) {
+            return true;
+        }
+
+        (, bytes32 placeId, uint256 startDate, uint256 endDate) = abi.decode(application.data, (bytes32, bytes32, uint256, uint256));
+
+        if (startDate < bundleFilter.seasonStart) {
+            return false;
+        }
+
+        if (bundleFilter.seasonEnd > 0 && endDate > bundleFilter.seasonEnd) {
+            return false;
+        }
+
+        if (bundleFilter.placePrefixes == 0) {
+            return true;
+        }
+
+        PlacePrefix [MAX_PLACE_PREFIXES] storage placePrefixes = _placePrefixes[bundle.id];
+        for (uint256 i = 0; i < bundleFilter.placePrefixes; i++) {
+            if (placeId & placePrefixes[i].mask == placePrefixes[i].prefix) {
+                return true;
+            }
+        }
+
+        return false;
+    }
+
+
+    function encodeBundleFilter(
+        bytes32 [] memory placePrefixes,
+        uint256 seasonStart,
+        uint256 seasonEnd,
+        uint256 maxSumInsured
+    )
+        external
+        pure
+        returns(bytes memory filter)
+    {
+        filter = abi.encode(placePrefixes, seasonStart, seasonEnd, maxSumInsured);
+    }
+
+
+    function getBundleFilter(uint256 bundleId)
+        external
+        view
+        returns(
+            bytes32 [] memory placePrefixes,
+            uint256 seasonStart,
+            uint256 seasonEnd,
+            uint256 maxSumInsured
+        )
+    {
+        BundleFilter memory bundleFilter = _bundleFilters[bundleId];
+
+        placePrefixes = new bytes32[](bundleFilter.placePrefixes);
+        for (uint256 i = 0; i < bundleFilter.placePrefixes; i++) {
+            placePrefixes[i] = _placePrefixes[bundleId][i].prefix;
+        }
+
+        seasonStart = bundleFilter.seasonStart;
+        seasonEnd = bundleFilter.seasonEnd;
+        maxSumInsured = bundleFilter.maxSumInsured;
+    }
+
+
+    function _setBundleFilter(uint256 bundleId, bytes memory filter)
+        private
+    {
+        (
+            bytes32 [] memory placePrefixes,
+            uint256 seasonStart,
+            uint256 seasonEnd,
+            uint256 maxSumInsured
+        ) = abi.decode(filter, (bytes32[], uint256, uint256, uint256));
+
+        require(placePrefixes.length <= MAX_PLACE_PREFIXES, "ERROR:RRP-001:TOO_MANY_PLACE_PREFIXES");
+        require(seasonEnd == 0 || seasonEnd > seasonStart, "ERROR:RRP-002:SEASON_END_INVALID");
+        require(seasonStart < 2**40 && seasonEnd < 2**40 && maxSumInsured < 2**96, "ERROR:RRP-003:FILTER_VALUE_TOO_LARGE");
+
+        _bundleFilters[bundleId] = BundleFilter(
+            uint96(maxSumInsured),
+            uint40(seasonStart),
+            uint40(seasonEnd),
+            uint8(placePrefixes.length));
+
+        for (uint256 i = 0; i < placePrefixes.length; i++) {
+            require(placePrefixes[i] != bytes32(0), "ERROR:RRP-004:PLACE_PREFIX_EMPTY");
+            _placePrefixes[bundleId][i] = PlacePrefix(placePrefixes[i], _prefixMask(placePrefixes[i]));
+        }
+    }
+
+
+    function _prefixMask(bytes32 prefix)
+        private
+        pure
+        returns(bytes32 mask)
+    {
+        // mask over all bytes up to the last non zero byte of prefix
+        uint256 length = 32;
+        while (length > 0 && prefix[length - 1] == bytes1(0)) {
+            length--;
+        }
+
+        mask = ~bytes32(0) << (8 * (32 - length));
     }
 
-}
\ No newline at end of file
+}
@@ -2,8 +2,10 @@
 pragma solidity ^0.8.2;
 
 import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-ERC20Permit.sol";
 
-contract Usdc is ERC20 {
+// permit (EIP-2612) as supported by the USDC token on polygon
+contract Usdc is ERC20, ERC20Permit {
 
     // https://etherscan.io/address/0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48#readProxyContract
     string public constant NAME = "USD Coin - DUMMY";
@@ -14,6 +16,7 @@ contract Usdc is ERC20 {
 
     constructor()
         ERC20(NAME, SYMBOL)
+        ERC20Permit(NAME)
     {
         _mint(
             _msgSender(),
@@ -0,0 +1,309 @@
+import datetime
+import json
+import os
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from scripts.payout import (
+    PERCENTAGE_MULTIPLIER,
+    PRECIPITATION_MAX,
+    PRECIPITATION_MULTIPLIER,
+    calculate_payout_percentage,
+)
+
+# historical backtest of rain risks over hourly precipitation data
+# from scripts.backtest import PrecipitationStore, backtest
+# store = PrecipitationStore('precipitation')
+# store.add_history_1h('10001.saopaulo', -23.55, -46.63, payload) # historybasic-1h json response
+# results = backtest(store, '11-01', '02-28', trigger=0.1, exit=1.0, prec_days=2)
+
+# hourly values are stored as float64, the same representation the JS source
+# works with after parsing the json response
+DTYPE = np.dtype('<f8')
+HOURS_PER_DAY = 24
+
+DATA_FILE = 'precipitation.f8'
+INDEX_FILE = 'locations.json'
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+@dataclass
+class Location:
+    id: str
+    lat: float
+    lon: float
+    start_date: str
+    offset: int
+    hours: int
+
+
+@dataclass
+class SeasonResult:
+    location_id: str
+    years: np.ndarray
+    prec_avg: np.ndarray
+    prec_days: np.ndarray
+    prec_actual: np.ndarray
+    prec_hist: int
+    payout_percentage: np.ndarray
+
+
+class PrecipitationStore(object):
+    """Columnar store for hourly precipitation with one contiguous float64 array
+    per location in a single data file. The data file is memory-mapped, series
+    are read as views on the mapping and only the pages touched are loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.locations = {}
+        self._data = None
+
+        os.makedirs(path, exist_ok=True)
+
+        if os.path.exists(self._index_file()):
+            with open(self._index_file()) as file:
+                for location in json.load(file):
+                    self.locations[location['id']] = Location(**location)
+
+    def add_location(self, location_id, lat, lon, start_date, values):
+        """Appends the hourly series of a location starting at start_date (yyyy-mm-dd) 00:00."""
+        if location_id in self.locations:
+            raise ValueError('ERROR location {} already stored'.format(location_id))
+
+        values = np.asarray(values, dtype=DTYPE)
+        offset = os.path.getsize(self._data_file()) // DTYPE.itemsize if os.path.exists(self._data_file()) else 0
+
+        with open(self._data_file(), 'ab') as file:
+            file.write(values.tobytes())
+
+        self.locations[location_id] = Location(location_id, lat, lon, start_date, offset, len(values))
+        self._data = None
+        self._save()
+
+    def add_history_1h(self, location_id, lat, lon, payload):
+        """Appends a historybasic-1h json response (dict) of a location."""
+        history = payload['history_1h']
+        self.add_location(
+            location_id,
+            lat,
+            lon,
+            history['time'][0][:10],
+            history['precipitation'])
+
+    def location_ids(self) -> list:
+        return list(self.locations.keys())
+
+    def series(self, location_id) -> np.ndarray:
+        location = self.locations[location_id]
+        return self._mapping()[location.offset:location.offset + location.hours]
+
+    def period(self, location_id, start_date, end_date) -> np.ndarray:
+        """Hourly values from start_date 00:00 to end_date 23:00 (both yyyy-mm-dd),
+        the range returned by historybasic for startdate/enddate.
+        """
+        location = self.locations[location_id]
+        (start, end) = period_hours(location, start_date, end_date)
+
+        if start < 0 or end > location.hours:
+            raise ValueError('ERROR period {} - {} not covered for location {}'.format(
+                start_date, end_date, location_id))
+
+        return self.series(location_id)[start:end]
+
+    def _mapping(self) -> np.ndarray:
+        if self._data is None:
+            self._data = np.memmap(self._data_file(), dtype=DTYPE, mode='r')
+
+        return self._data
+
+    def _data_file(self) -> str:
+        return os.path.join(self.path, DATA_FILE)
+
+    def _index_file(self) -> str:
+        return os.path.join(self.path, INDEX_FILE)
+
+    def _save(self):
+        with open(self._index_file(), 'w') as file:
+            json.dump([location.__dict__ for location in self.locations.values()], file)
+
+
+def aggregate(hourly) -> tuple:
+    """Returns (precAvg, precDays) exactly as computed by historybasic in meteoblue.js."""
+    (prec_avg, prec_days) = aggregate_seasons(np.asarray(hourly, dtype=DTYPE)[None, :])
+    return (float(prec_avg[0]), int(prec_days[0]))
+
+
+def aggregate_seasons(hourly) -> tuple:
+    """Vectorized version of aggregate for a (seasons, hours) matrix. The JS
+    reduce sums from left to right, np.sum uses pairwise summation and would not
+    reproduce the float results. The last element of np.cumsum is the left to
+    right sum.
+    """
+    hourly = np.asarray(hourly, dtype=DTYPE)
+    (seasons, hours) = hourly.shape
+
+    if hours == 0:
+        return (np.full(seasons, np.nan), np.zeros(seasons, dtype=np.int64))
+
+    days = hours / HOURS_PER_DAY
+    prec_avg = np.cumsum(hourly, axis=1)[:, -1] / days
+
+    # a last partial day is padded with zeros, which leaves its sum unchanged
+    padding = -hours % HOURS_PER_DAY
+    if padding > 0:
+        hourly = np.concatenate([hourly, np.zeros((seasons, padding), dtype=DTYPE)], axis=1)
+
+    daily = np.cumsum(hourly.reshape(seasons, -1, HOURS_PER_DAY), axis=2)[:, :, -1]
+    prec_days = np.count_nonzero(daily > 0, axis=1)
+
+    return (prec_avg, prec_days)
+
+
+def to_prec_actual(prec_avg, prec_multiplier=PRECIPITATION_MULTIPLIER) -> np.ndarray:
+    """precAvg * precMultiplier as uint256 seen by the contract (truncated, and
+    capped below PRECIPITATION_MAX as the oracle callback rejects larger values).
+    The JS source hands the float to Functions.encodeUint256 unchanged.
+    """
+    prec = np.floor(np.asarray(prec_avg, dtype=DTYPE) * prec_multiplier)
+    return np.clip(prec, 0, PRECIPITATION_MAX - 1).astype(np.uint64)
+
+
+def season_periods(location: Location, start_md, end_md) -> list:
+    """All (year, start_date, end_date) seasons fully covered by the series of a
+    location. Seasons with end_md before start_md end in the following year.
+    """
+    first = _date(location.start_date)
+    last = datetime.datetime.combine(first, datetime.time()) + datetime.timedelta(hours=location.hours - 1)
+    wraps = end_md < start_md
+
+    periods = []
+    for year in range(first.year, last.year + 1):
+        start_date = _date('{}-{}'.format(year, start_md))
+        end_date = _date('{}-{}'.format(year + 1 if wraps else year, end_md))
+
+        if start_date >= first and datetime.datetime.combine(end_date, datetime.time(23)) <= last:
+            periods.append((year, start_date.strftime(DATE_FORMAT), end_date.strftime(DATE_FORMAT)))
+
+    return periods
+
+
+def aggregate_periods(location: Location, series, periods) -> tuple:
+    """(precAvg, precDays) arrays for the (year, start_date, end_date) periods of
+    the hourly series of a location.
+    """
+    prec_avg = np.zeros(len(periods), dtype=DTYPE)
+    prec_days = np.zeros(len(periods), dtype=np.int64)
+
+    # seasons with the same number of hours (leap years) are aggregated together
+    spans = [period_hours(location, p[1], p[2]) for p in periods]
+    for hours in sorted(set([end - start for (start, end) in spans])):
+        idx = [i for i, (start, end) in enumerate(spans) if end - start == hours]
+        hourly = np.stack([series[spans[i][0]:spans[i][1]] for i in idx])
+        (prec_avg[idx], prec_days[idx]) = aggregate_seasons(hourly)
+
+    return (prec_avg, prec_days)
+
+
+def backtest_location(
+    store: PrecipitationStore,
+    location_id,
+    start_md,
+    end_md,
+    trigger,
+    exit,
+    prec_days,
+    prec_hist=None,
+    prec_multiplier=PRECIPITATION_MULTIPLIER,
+) -> SeasonResult:
+    """Evaluates the payout percentage of every historical season of a location.
+    trigger/exit are fractions (0.1 = 10%). Without prec_hist (mm) the average
+    over all seasons is used, as in the calibration of a new risk.
+    """
+    location = store.locations[location_id]
+    periods = season_periods(location, start_md, end_md)
+    series = store.series(location_id)
+
+    years = np.array([p[0] for p in periods], dtype=np.int64)
+    (prec_avg, season_days) = aggregate_periods(location, series, periods)
+    prec_actual = to_prec_actual(prec_avg, prec_multiplier)
+
+    if prec_hist is None:
+        prec_hist = float(prec_avg.mean()) if len(periods) > 0 else 0.0
+
+    prec_hist_uint = int(prec_hist * prec_multiplier)
+    payout_percentage = np.zeros(len(periods), dtype=np.uint64)
+
+    if len(periods) > 0 and prec_hist_uint > 0:
+        payout_percentage = calculate_payout_percentage(
+            int(PERCENTAGE_MULTIPLIER * trigger),
+            int(PERCENTAGE_MULTIPLIER * exit),
+            prec_hist_uint,
+            prec_days,
+            prec_actual,
+            season_days)
+
+    return SeasonResult(
+        location_id=location_id,
+        years=years,
+        prec_avg=prec_avg,
+        prec_days=season_days,
+        prec_actual=prec_actual,
+        prec_hist=prec_hist_uint,
+        payout_percentage=payout_percentage)
+
+
+def backtest(
+    store: PrecipitationStore,
+    start_md,
+    end_md,
+    trigger,
+    exit,
+    prec_days,
+    prec_hist=None,
+    location_ids=None,
+    prec_multiplier=PRECIPITATION_MULTIPLIER,
+):
+    """Streams the backtest results location by location, only the series of the
+    current location is touched. prec_hist may be a dict location_id -> mm.
+    """
+    for location_id in (location_ids or store.location_ids()):
+        location_prec_hist = prec_hist.get(location_id) if isinstance(prec_hist, dict) else prec_hist
+
+        yield backtest_location(
+            store,
+            location_id,
+            start_md,
+            end_md,
+            trigger,
+            exit,
+            prec_days,
+            prec_hist=location_prec_hist,
+            prec_multiplier=prec_multiplier)
+
+
+def print_results(results):
+    print('location seasons prec_hist payouts mean_payout_percentage')
+
+    for r in results:
+        payouts = int(np.count_nonzero(r.payout_percentage))
+        mean = float(r.payout_percentage.mean()) / PERCENTAGE_MULTIPLIER if len(r.years) > 0 else 0.0
+        print('{} {} {} {} {:.4f}'.format(r.location_id, len(r.years), r.prec_hist, payouts, mean))
+
+
+def period_hours(location: Location, start_date, end_date) -> tuple:
+    """Hour offsets [start, end) of a period within the series of a location."""
+    first = _date(location.start_date)
+    start = (_date(start_date) - first).days * HOURS_PER_DAY
+    end = ((_date(end_date) - first).days + 1) * HOURS_PER_DAY
+    return (start, end)
+
+
+def _date(value):
+    if isinstance(value, datetime.date):
+        return value
+
+    return datetime.datetime.strptime(value, DATE_FORMAT).date()
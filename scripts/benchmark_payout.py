@@ -0,0 +1,69 @@
+import sys
+import time
+
+import numpy as np
+
+from scripts.payout import (
+    PERCENTAGE_MULTIPLIER,
+    PRECIPITATION_MAX,
+    PRECIPITATION_MULTIPLIER,
+    calculate_payout_percentage,
+    calculate_payout,
+)
+
+# throughput benchmark for the vectorized payout engine
+# usage (from the project root, outside of brownie):
+# python -m scripts.benchmark_payout [evaluations]
+
+EVALUATIONS_DEFAULT = 10**7
+
+# evaluations per vectorized call, bounds the memory used for temporary arrays
+CHUNK_SIZE = 10**6
+
+SEED = 42
+SUM_INSURED_MAX = 10**12
+
+
+def random_scenarios(rng, size) -> tuple:
+    trigger = rng.integers(0, PERCENTAGE_MULTIPLIER // 2, size, dtype=np.uint64)
+    exit = trigger + rng.integers(1, PERCENTAGE_MULTIPLIER, size, dtype=np.uint64)
+    prec_hist = rng.integers(1 * PRECIPITATION_MULTIPLIER, 20 * PRECIPITATION_MULTIPLIER, size, dtype=np.uint64)
+    prec_days = rng.integers(1, 5, size, dtype=np.uint64)
+    prec_actual = rng.integers(0, PRECIPITATION_MAX, size, dtype=np.uint64)
+    prec_days_actual = rng.integers(0, 10, size, dtype=np.uint64)
+    sum_insured = rng.integers(0, SUM_INSURED_MAX, size, dtype=np.uint64)
+
+    return (trigger, exit, prec_hist, prec_days, prec_actual, prec_days_actual, sum_insured)
+
+
+def main(evaluations=EVALUATIONS_DEFAULT):
+    rng = np.random.default_rng(SEED)
+    chunk = min(CHUNK_SIZE, evaluations)
+    scenarios = random_scenarios(rng, chunk)
+
+    duration = 0.0
+    payout_total = 0
+    done = 0
+
+    while done < evaluations:
+        size = min(chunk, evaluations - done)
+        args = [s[:size] for s in scenarios]
+
+        start = time.perf_counter()
+        percentage = calculate_payout_percentage(*args[:6])
+        payout = calculate_payout(percentage, args[6])
+        duration += time.perf_counter() - start
+
+        payout_total += int(payout.sum(dtype=np.uint64))
+        done += size
+
+    print('evaluations {}'.format(evaluations))
+    print('duration {:.3f}s'.format(duration))
+    print('throughput {:.0f} evaluations/s'.format(evaluations / duration))
+    print('payout total {}'.format(payout_total))
+
+    return duration
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else EVALUATIONS_DEFAULT)
@@ -0,0 +1,81 @@
+import multiprocessing
+import sys
+
+import numpy as np
+
+from scripts.payout import (
+    PERCENTAGE_MULTIPLIER,
+    PRECIPITATION_MULTIPLIER,
+)
+
+from scripts.solvency import (
+    PlaceDistribution,
+    create_portfolio,
+    print_report,
+    simulate,
+)
+
+# throughput benchmark for the monte carlo solvency simulation on a synthetic portfolio
+# usage (from the project root, outside of brownie):
+# python -m scripts.benchmark_solvency [trials]
+# runs the simulation with a single process and with one process per core
+
+TRIALS_DEFAULT = 10**6
+
+SEED = 42
+PLACES = 100
+RISKS = 500
+POLICIES = 50000
+BUNDLES = 100
+SUM_INSURED_MAX = 5000
+
+
+def synthetic_portfolio(rng):
+    places = ['place.{}'.format(idx) for idx in range(PLACES)]
+    risks = [{
+        'id': 'risk.{}'.format(idx),
+        'placeId': places[idx % PLACES],
+        'trigger': int(PERCENTAGE_MULTIPLIER * 0.1),
+        'exit': int(PERCENTAGE_MULTIPLIER * 1.0),
+        'precHist': int(PRECIPITATION_MULTIPLIER * rng.uniform(2.0, 8.0)),
+        'precDays': int(rng.integers(1, 5)),
+    } for idx in range(RISKS)]
+
+    policies = [(
+        risks[int(rng.integers(0, RISKS))]['id'],
+        int(rng.integers(0, BUNDLES)),
+        int(rng.integers(100, SUM_INSURED_MAX)),
+    ) for idx in range(POLICIES)]
+
+    capital = int(1.2 * sum([p[2] for p in policies]) / BUNDLES)
+    bundles = [{
+        'id': idx,
+        'capital': capital,
+        'lockedCapital': capital,
+        'balance': capital,
+    } for idx in range(BUNDLES)]
+
+    portfolio = create_portfolio(risks, policies, bundles)
+    distributions = {place: PlaceDistribution(shape=2.0, scale=2.5, days_mean=4.0) for place in places}
+
+    return (portfolio, distributions)
+
+
+def main(trials=TRIALS_DEFAULT):
+    rng = np.random.default_rng(SEED)
+    (portfolio, distributions) = synthetic_portfolio(rng)
+
+    durations = {}
+    for processes in sorted(set([1, multiprocessing.cpu_count()])):
+        report = simulate(portfolio, distributions, trials=trials, seed=SEED, processes=processes)
+        durations[processes] = report.duration
+        print('processes {} trials {} duration {:.2f}s throughput {:.0f} trials/s'.format(
+            processes, trials, report.duration, trials / report.duration))
+
+    print_report(report)
+
+    return durations
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else TRIALS_DEFAULT)
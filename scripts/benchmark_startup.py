@@ -0,0 +1,55 @@
+import statistics
+import subprocess
+import sys
+import time
+
+# cold start benchmark for the brownie console including the rain deploy scripts
+# usage (from the project root, outside of brownie):
+# python scripts/benchmark_startup.py [runs]
+# compare the numbers on the commits before/after a change affecting script startup
+
+RUNS_DEFAULT = 5
+
+CONSOLE_COMMAND = ['brownie', 'console']
+CONSOLE_INPUT = '\n'.join([
+    'from scripts.deploy_rain import *',
+    'from scripts.util import get_package',
+    "get_package('gif-contracts')",
+    "get_package('gif-interface')",
+    'exit()',
+    ''
+])
+
+
+def time_console_startup() -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        CONSOLE_COMMAND,
+        input=CONSOLE_INPUT,
+        text=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True)
+
+    return time.perf_counter() - start
+
+
+def main(runs=RUNS_DEFAULT):
+    durations = []
+
+    for run in range(runs):
+        duration = time_console_startup()
+        durations.append(duration)
+        print('run {} {:.2f}s'.format(run, duration))
+
+    print('-----------------------------')
+    print('runs {}'.format(runs))
+    print('min {:.2f}s'.format(min(durations)))
+    print('median {:.2f}s'.format(statistics.median(durations)))
+    print('max {:.2f}s'.format(max(durations)))
+
+    return durations
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RUNS_DEFAULT)
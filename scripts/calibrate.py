@@ -0,0 +1,151 @@
+import calendar
+import datetime
+import json
+import multiprocessing
+
+import numpy as np
+
+from scripts.backtest import (
+    Location,
+    aggregate_periods,
+    season_periods,
+)
+
+from scripts.history import HistoryCache, get_history_cache
+from scripts.payout import PERCENTAGE_MULTIPLIER, PRECIPITATION_MULTIPLIER
+
+# calibration of precHist and precDays for many places and seasons from the cached hourly history
+# from scripts.calibrate import calibrate, save_risks
+# places = [{'placeId': '10001.saopaulo', 'lat': -23.550620, 'long': -46.634370}]
+# seasons = [{'start': '11-01', 'end': '02-28', 'year': 2023}]
+# risks = calibrate(places, seasons, api_key=api_key)
+# save_risks(risks, 'risks.json')
+# from scripts.deploy_rain import create_risks
+# riskIds = create_risks(product, insurer, risks)
+
+HISTORY_YEARS_DEFAULT = 10
+
+# precDays is set to the number of rainy days reached in 90% of the historical seasons
+PREC_DAYS_QUANTILE = 0.1
+
+TRIGGER_DEFAULT = 0.1
+EXIT_DEFAULT = 1.0
+
+# same as COORD_MULTIPLIER in RainProduct
+COORD_MULTIPLIER = 10**6
+
+
+def calibrate(
+    places,
+    seasons,
+    history_years=HISTORY_YEARS_DEFAULT,
+    trigger=TRIGGER_DEFAULT,
+    exit=EXIT_DEFAULT,
+    prec_days_quantile=PREC_DAYS_QUANTILE,
+    processes=None,
+    cache_dir=None,
+    api_key=None,
+) -> list:
+    """Computes the createRisk parameters for every place and season. Each place is
+    handled by a worker process that loads (or fetches) its hourly history from
+    the shared cache once and aggregates all seasons from it. Seasons are dicts
+    with start/end (mm-dd) and the year of the season to insure.
+    Returns a list of risk dicts in createRisk argument order and contract units.
+    """
+    cache_dir = cache_dir or get_history_cache().path
+    tasks = [(place, seasons, history_years, trigger, exit, prec_days_quantile, cache_dir, api_key) for place in places]
+
+    if processes == 1:
+        results = [_calibrate_place(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(_calibrate_place, tasks)
+
+    return [risk for place_risks in results for risk in place_risks]
+
+
+def calibrate_place(
+    place,
+    payload,
+    seasons,
+    history_years=HISTORY_YEARS_DEFAULT,
+    trigger=TRIGGER_DEFAULT,
+    exit=EXIT_DEFAULT,
+    prec_days_quantile=PREC_DAYS_QUANTILE,
+) -> list:
+    history = payload['history_1h']
+    series = np.asarray(history['precipitation'], dtype=np.float64)
+    location = Location(place['placeId'], place['lat'], place['long'], history['time'][0][:10], 0, len(series))
+
+    risks = []
+    for season in seasons:
+        first_year = season['year'] - history_years
+        periods = [p for p in season_periods(location, season['start'], season['end'])
+                   if first_year <= p[0] < season['year']]
+
+        if len(periods) < history_years:
+            raise ValueError('ERROR history for {} covers {} of {} seasons {} - {}'.format(
+                place['placeId'], len(periods), history_years, season['start'], season['end']))
+
+        (prec_avg, prec_days) = aggregate_periods(location, series, periods)
+        (start_date, end_date) = season_dates(season)
+
+        risks.append({
+            'startDate': start_date,
+            'endDate': end_date,
+            'placeId': place['placeId'],
+            'lat': int(COORD_MULTIPLIER * place['lat']),
+            'long': int(COORD_MULTIPLIER * place['long']),
+            'trigger': int(PERCENTAGE_MULTIPLIER * trigger),
+            'exit': int(PERCENTAGE_MULTIPLIER * exit),
+            'precHist': int(PRECIPITATION_MULTIPLIER * prec_avg.mean()),
+            'precDays': int(np.floor(np.quantile(prec_days, prec_days_quantile))),
+        })
+
+    return risks
+
+
+def history_range(seasons, history_years=HISTORY_YEARS_DEFAULT) -> tuple:
+    """Single (startdate, enddate) range covering the history of all seasons, it
+    ends with the last historical season (before the season to insure).
+    """
+    first_year = min([s['year'] for s in seasons]) - history_years
+    end_dates = ['{}-{}'.format(s['year'] if s['end'] < s['start'] else s['year'] - 1, s['end']) for s in seasons]
+
+    return ('{}-01-01'.format(first_year), max(end_dates))
+
+
+def season_dates(season) -> tuple:
+    """Start and end timestamps (00:00 UTC) of the season to insure. The oracle
+    source converts them back to yyyy-mm-dd dates.
+    """
+    year = season['year']
+    end_year = year + 1 if season['end'] < season['start'] else year
+
+    return (
+        _timestamp('{}-{}'.format(year, season['start'])),
+        _timestamp('{}-{}'.format(end_year, season['end'])))
+
+
+def save_risks(risks, file_name):
+    with open(file_name, 'w') as file:
+        json.dump(risks, file, indent=2)
+
+
+def load_risks(file_name) -> list:
+    with open(file_name) as file:
+        return json.load(file)
+
+
+def _calibrate_place(task) -> list:
+    (place, seasons, history_years, trigger, exit, prec_days_quantile, cache_dir, api_key) = task
+    cache = HistoryCache(cache_dir)
+
+    (start_date, end_date) = history_range(seasons, history_years)
+    payload = cache.get_or_fetch(place['lat'], place['long'], start_date, end_date, api_key=api_key)
+
+    return calibrate_place(place, payload, seasons, history_years, trigger, exit, prec_days_quantile)
+
+
+def _timestamp(date) -> int:
+    return calendar.timegm(datetime.datetime.strptime(date, '%Y-%m-%d').timetuple())
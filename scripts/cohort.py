@@ -0,0 +1,68 @@
+from web3 import Web3
+
+# off-chain merkle tree for RainProduct.createCohort and RainProduct.materializeCohortPolicy.
+# leafs and pair hashing match RainProduct.getCohortLeaf and the sorted pair hashing
+# of the openzeppelin MerkleProof library.
+# from scripts.cohort import CohortTree
+# tree = CohortTree([(holder, sumInsured, premium), ...])
+# product.createCohort(riskId, tree.root, len(tree), tree.sum_insured, tree.premium, {'from': insurer})
+# product.materializeCohortPolicy(riskId, *tree.member(index), tree.proof(index), {'from': keeper})
+
+
+def cohort_leaf(index, holder, sum_insured, premium) -> bytes:
+    return bytes(Web3.solidityKeccak(
+        ['uint256', 'address', 'uint256', 'uint256'],
+        [index, Web3.toChecksumAddress(str(holder)), sum_insured, premium]))
+
+
+def hash_pair(a: bytes, b: bytes) -> bytes:
+    return bytes(Web3.solidityKeccak(['bytes32', 'bytes32'], sorted([a, b])))
+
+
+class CohortTree(object):
+    """Merkle tree over the cohort members (holder, sumInsured, premium).
+    The position of a member in the list is its cohort index. A node without
+    sibling is moved up unchanged, its proof is one element shorter.
+    """
+
+    def __init__(self, members):
+        self.members = [(str(holder), int(sum_insured), int(premium)) for (holder, sum_insured, premium) in members]
+        assert len(self.members) > 0, 'ERROR empty cohort'
+
+        self.sum_insured = sum([member[1] for member in self.members])
+        self.premium = sum([member[2] for member in self.members])
+
+        leafs = [cohort_leaf(index, *member) for index, member in enumerate(self.members)]
+        self.levels = [leafs]
+
+        while len(self.levels[-1]) > 1:
+            nodes = self.levels[-1]
+            parents = [hash_pair(nodes[i], nodes[i + 1]) for i in range(0, len(nodes) - 1, 2)]
+
+            if len(nodes) % 2 == 1:
+                parents.append(nodes[-1])
+
+            self.levels.append(parents)
+
+    def __len__(self):
+        return len(self.members)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def member(self, index) -> tuple:
+        """Returns (index, holder, sumInsured, premium) as needed for materializeCohortPolicy."""
+        return (index,) + self.members[index]
+
+    def proof(self, index) -> list:
+        proof = []
+
+        for nodes in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(nodes):
+                proof.append(nodes[sibling])
+
+            index //= 2
+
+        return proof
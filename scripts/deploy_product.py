@@ -17,7 +17,27 @@ from scripts.product import (
 
 from scripts.instance import GifInstance
 
+from scripts.deployment import (
+    COMPONENT_TYPE_PRODUCT,
+    COMPONENT_TYPE_ORACLE,
+    COMPONENT_TYPE_RISKPOOL,
+    COMPONENT_STATE_ACTIVE,
+    read_deployment_descriptor,
+)
+
+from scripts.profiler import (
+    PHASE_INSTANCE,
+    PHASE_BUNDLE,
+    PHASE_RISK,
+    PHASE_POLICY,
+    profile_phase,
+    profile_transactions,
+)
+
+from scripts.readmodel import get_read_model
+
 from scripts.util import (
+    batch_call,
     contract_from_address,
     get_package
 )
@@ -108,10 +128,17 @@ def verify_deploy_base(
     investor=a[INVESTOR]
     customer=a[CUSTOMER1]
 
-    registry_address = product.getRegistry()
-    product_id = product.getId()
-    oracle_id = product.getOracleId()
-    riskpool_id = product.getRiskpoolId()
+    (
+        registry_address,
+        product_id,
+        oracle_id,
+        riskpool_id
+    ) = batch_call([
+        (product.getRegistry, []),
+        (product.getId, []),
+        (product.getOracleId, []),
+        (product.getRiskpoolId, []),
+    ])
 
     (
         instance,
@@ -125,41 +152,68 @@ def verify_deploy_base(
         riskpool_id=riskpool_id
     )
 
+    # contract objects provide name and abi in the same way as contract classes
     instanceService = instance.getInstanceService()
-    verify_element('Registry', instanceService.getRegistry(), registry_address)
-    verify_element('InstanceOperator', instanceService.getInstanceOperator(), instanceOperator)
-    verify_element('InstanceWallet', instanceService.getInstanceWallet(), instanceWallet)
-
-    verify_element('RiskpoolId', riskpool.getId(), riskpool_id)
-    verify_element('RiskpoolType', instanceService.getComponentType(riskpool_id), 2)
-    verify_element('RiskpoolState', instanceService.getComponentState(riskpool_id), 3)
-    verify_element('RiskpoolContract', riskpool.address, instanceService.getComponent(riskpool_id))
-    verify_element('RiskpoolKeeper', riskpool.owner(), riskpoolKeeper)
-    verify_element('RiskpoolWallet', instanceService.getRiskpoolWallet(riskpool_id), riskpoolWallet)
-    verify_element('RiskpoolBalance', instanceService.getBalance(riskpool_id), erc20_token.balanceOf(riskpoolWallet))
-    verify_element('RiskpoolToken', riskpool.getErc20Token(), erc20_token.address)
-
-    verify_element('ProductId', product.getId(), product_id)
-    verify_element('ProductType', instanceService.getComponentType(product_id), 1)
-    verify_element('ProductState', instanceService.getComponentState(product_id), 3)
-    verify_element('ProductContract', product.address, instanceService.getComponent(product_id))
-    verify_element('ProductOwner', product.owner(), productOwner)
-    verify_element('ProductToken', product.getToken(), erc20_token.address)
-    verify_element('ProductOracle', product.getOracleId(), oracle_id)
-    verify_element('ProductRiskpool', product.getRiskpoolId(), riskpool_id)
-
-    print('InstanceWalletBalance {:.2f}'.format(erc20_token.balanceOf(instanceService.getInstanceWallet())/10**erc20_token.decimals()))
-    print('RiskpoolWalletTVL {:.2f}'.format(instanceService.getTotalValueLocked(riskpool_id)/10**erc20_token.decimals()))
-    print('RiskpoolWalletCapacity {:.2f}'.format(instanceService.getCapacity(riskpool_id)/10**erc20_token.decimals()))
-    print('RiskpoolWalletBalance {:.2f}'.format(erc20_token.balanceOf(instanceService.getRiskpoolWallet(riskpool_id))/10**erc20_token.decimals()))
-
-    print('RiskpoolBundles {}'.format(riskpool.bundles()))
-    print('ProductApplications {}'.format(product.applications()))
+    descriptor = read_deployment_descriptor(
+        instanceService,
+        product,
+        oracle,
+        riskpool,
+        product_id=product_id,
+        oracle_id=oracle_id,
+        riskpool_id=riskpool_id,
+        token=erc20_token)
+
+    d = descriptor
+    verify_element('Registry', d.registry, registry_address)
+    verify_element('InstanceOperator', d.instance_operator, instanceOperator)
+    verify_element('InstanceWallet', d.instance_wallet, instanceWallet)
+
+    verify_element('RiskpoolId', d.riskpool.id, riskpool_id)
+    verify_element('RiskpoolType', d.riskpool.type, COMPONENT_TYPE_RISKPOOL)
+    verify_element('RiskpoolState', d.riskpool.state, COMPONENT_STATE_ACTIVE)
+    verify_element('RiskpoolContract', riskpool.address, d.riskpool.address)
+    verify_element('RiskpoolKeeper', d.riskpool.owner, riskpoolKeeper)
+    verify_element('RiskpoolWallet', d.riskpool_wallet, riskpoolWallet)
+    verify_element('RiskpoolBalance', d.riskpool_balance, d.riskpool_wallet_balance)
+    verify_element('RiskpoolToken', d.riskpool_token, erc20_token.address)
+
+    verify_element('ProductId', d.product.id, product_id)
+    verify_element('ProductType', d.product.type, COMPONENT_TYPE_PRODUCT)
+    verify_element('ProductState', d.product.state, COMPONENT_STATE_ACTIVE)
+    verify_element('ProductContract', product.address, d.product.address)
+    verify_element('ProductOwner', d.product.owner, productOwner)
+    verify_element('ProductToken', d.product_token, erc20_token.address)
+    verify_element('ProductOracle', d.product_oracle_id, oracle_id)
+    verify_element('ProductRiskpool', d.product_riskpool_id, riskpool_id)
+
+    mult_token = 10**d.token_decimals
+    print('InstanceWalletBalance {:.2f}'.format(d.instance_wallet_balance/mult_token))
+    print('RiskpoolWalletTVL {:.2f}'.format(d.riskpool_tvl/mult_token))
+    print('RiskpoolWalletCapacity {:.2f}'.format(d.riskpool_capacity/mult_token))
+    print('RiskpoolWalletBalance {:.2f}'.format(d.riskpool_wallet_balance/mult_token))
+
+    rm = get_read_model()
+    rm.sync()
+    (bundles, applications) = rm.mutable([
+        (riskpool.bundles, []),
+        (product.applications, []),
+    ])
+
+    print('RiskpoolBundles {}'.format(bundles))
+    print('ProductApplications {}'.format(applications))
+
+    deployment = {
+        ERC20_TOKEN: erc20_token,
+        INSTANCE_SERVICE: instanceService,
+        PRODUCT: product,
+        RISKPOOL: riskpool,
+    }
 
     print('--- inspect_bundles(d) ---')
-    inspect_bundles(stakeholder_accounts)
+    inspect_bundles(deployment)
     print('--- inspect_applications(d) ---')
-    inspect_applications(stakeholder_accounts)
+    inspect_applications(deployment)
 
 
 def verify_element(
@@ -433,7 +487,32 @@ def all_in_1_base(
     chainLinkOracleAddress=None,
     chainLinkJobId=None,
     chainLinkPaymentAmount=None,
+    profile_file=None,
 ):
+    # record all transactions of the deploy and setup in profile_file (json lines)
+    if profile_file:
+        with profile_transactions(profile_file) as profiler:
+            result = all_in_1_base(
+                base_name,
+                tokenContractClass,
+                productContractClass,
+                oracleContractClass,
+                riskpoolContractClass,
+                create_bundle,
+                create_risk,
+                create_policy,
+                stakeholders_accounts,
+                registry_address,
+                token_address,
+                deploy_all=deploy_all,
+                publish_source=publish_source,
+                chainLinkOracleAddress=chainLinkOracleAddress,
+                chainLinkJobId=chainLinkJobId,
+                chainLinkPaymentAmount=chainLinkPaymentAmount)
+
+        profiler.print_summary()
+        return result
+
     a = stakeholders_accounts or stakeholders_accounts_ganache()
 
     # assess balances at beginning of deploy
@@ -443,36 +522,37 @@ def all_in_1_base(
     print('inital balances: {}'.format(balances_before))
     print('--------------------------------------------------------------------')
 
-    # deploy full setup including tokens, and gif instance
-    if deploy_all:
-        print('====== deploy token ======')
-        token = tokenContractClass.deploy({'from':a[INSTANCE_OPERATOR]}, publish_source=publish_source)
-        print('====== deploy gif instance ======')
-        instance = GifInstance(
-            instanceOperator=a[INSTANCE_OPERATOR], 
-            instanceWallet=a[INSTANCE_WALLET],
-            publish_source=publish_source)
-
-    # where available reuse tokens and gif instance from existing deployments
-    else:
-        if token_address or get_address('token'):
-            print('====== reusing token ======')
-            token = contract_from_address(
-                interface.IERC20Metadata, 
-                token_address or get_address('token'))
-        else:
+    with profile_phase(PHASE_INSTANCE):
+        # deploy full setup including tokens, and gif instance
+        if deploy_all:
             print('====== deploy token ======')
             token = tokenContractClass.deploy({'from':a[INSTANCE_OPERATOR]}, publish_source=publish_source)
+            print('====== deploy gif instance ======')
+            instance = GifInstance(
+                instanceOperator=a[INSTANCE_OPERATOR], 
+                instanceWallet=a[INSTANCE_WALLET],
+                publish_source=publish_source)
+
+        # where available reuse tokens and gif instance from existing deployments
+        else:
+            if token_address or get_address('token'):
+                print('====== reusing token ======')
+                token = contract_from_address(
+                    interface.IERC20Metadata, 
+                    token_address or get_address('token'))
+            else:
+                print('====== deploy token ======')
+                token = tokenContractClass.deploy({'from':a[INSTANCE_OPERATOR]}, publish_source=publish_source)
 
-        print('====== reusing gif instance ======')
-        instance = GifInstance(
-            instanceOperator=a[INSTANCE_OPERATOR], 
-            instanceWallet=a[INSTANCE_WALLET],
-            registryAddress=registry_address or get_address('registry'),
-            publish_source=publish_source)
+            print('====== reusing gif instance ======')
+            instance = GifInstance(
+                instanceOperator=a[INSTANCE_OPERATOR], 
+                instanceWallet=a[INSTANCE_WALLET],
+                registryAddress=registry_address or get_address('registry'),
+                publish_source=publish_source)
 
     print('====== token setup ======')
-    print('- token {} {}'.format(token.symbol(), token))
+    print('- token {} {}'.format(get_read_model().token_symbol(token), token))
 
     # populate deployment hashmap
     deployment = _copy_map(a)
@@ -535,29 +615,32 @@ def all_in_1_base(
 
     print('====== create risk bundle ======')
 
-    # approval for payouts or pulling out funds by investor
-    token.approve(
-        instance_service.getTreasuryAddress(),
-        RISKPOOL_WALLET_ALLOWANCE,
-        {'from': deployment[RISKPOOL_WALLET]})
+    with profile_phase(PHASE_BUNDLE):
+        # approval for payouts or pulling out funds by investor
+        token.approve(
+            instance_service.getTreasuryAddress(),
+            RISKPOOL_WALLET_ALLOWANCE,
+            {'from': deployment[RISKPOOL_WALLET]})
 
-    bundle_id = create_bundle(
-        instance, 
-        instanceOperator,
-        riskpool,
-        investor)
+        bundle_id = create_bundle(
+            instance, 
+            instanceOperator,
+            riskpool,
+            investor)
 
     print('====== create risk ======')
-    risk_id = create_risk(product, insurer)
+    with profile_phase(PHASE_RISK):
+        risk_id = create_risk(product, insurer)
 
     print('====== create policy ======')
-    process_id = create_policy(
-        instance, 
-        instanceOperator,
-        product,
-        risk_id,
-        customer,
-        insurer)
+    with profile_phase(PHASE_POLICY):
+        process_id = create_policy(
+            instance, 
+            instanceOperator,
+            product,
+            risk_id,
+            customer,
+            insurer)
 
     balances_after_setup = _get_balances(a)
     print('--------------------------------------------------------------------')
@@ -648,46 +731,25 @@ def get_address(name):
 def inspect_applications(d):
     instanceService = d[INSTANCE_SERVICE]
     product = d[PRODUCT]
-    riskpool = d[RISKPOOL]
     token = d[ERC20_TOKEN]
 
-    mult_token = 10**token.decimals()
-
-    processIds = product.applications()
+    rm = get_read_model()
+    mult_token = 10**rm.token_decimals(token)
 
     # print header row
     print('i customer product id type state object premium suminsured')
 
     # print individual rows
-    for idx in range(processIds):
-        processId = product.getApplicationId(idx) 
-        metadata = instanceService.getMetadata(processId)
-        customer = metadata[0]
-        productId = metadata[1]
-
-        application = instanceService.getApplication(processId)
-        state = application[0]
-        premium = application[1]
-        suminsured = application[2]
-        appdata = application[3]
-
-        if state == 2:
-            policy = instanceService.getPolicy(processId)
-            state = policy[0]
-            kind = 'policy'
-        else:
-            policy = None
-            kind = 'application'
-
+    for idx, policy in enumerate(rm.applications(instanceService, product)):
         print('{} {} {} {} {} {} {:.1f} {:.1f}'.format(
             idx,
-            _shortenAddress(customer),
-            productId,
-            processId,
-            kind,
-            state,
-            premium/mult_token,
-            suminsured/mult_token,
+            _shortenAddress(policy.owner),
+            policy.product_id,
+            policy.process_id,
+            policy.kind,
+            policy.state,
+            policy.premium/mult_token,
+            policy.sum_insured/mult_token,
         ))
 
 
@@ -700,26 +762,8 @@ def _shortenAddress(address) -> str:
 def get_bundle_data(
     instanceService,
     riskpool
-):
-    bundle_nft = contract_from_address(interface.IERC721, instanceService.getBundleToken())
-    active_bundles = riskpool.activeBundles()
-    bundle_data = []
-
-    for idx in range(active_bundles):
-        bundle_id = riskpool.getActiveBundleId(idx)
-        bundle = instanceService.getBundle(bundle_id).dict()
-
-        bundle_data.append({
-            'idx':idx,
-            'owner':bundle_nft.ownerOf(bundle['tokenId']),
-            'riskpoolId':bundle['riskpoolId'],
-            'bundleId':bundle_id,
-            'capital':bundle['capital'],
-            'locked':bundle['lockedCapital'],
-            'capacity':bundle['capital'] - bundle['lockedCapital']
-        })
-
-    return bundle_data
+) -> list:
+    return get_read_model().bundles(instanceService, riskpool)
 
 
 def inspect_bundles(d):
@@ -727,25 +771,24 @@ def inspect_bundles(d):
     riskpool = d[RISKPOOL]
     token = d[ERC20_TOKEN]
 
-    mult_token = 10 ** token.decimals()
-    bundleData = get_bundle_data(instanceService, riskpool)
+    rm = get_read_model()
+    mult_token = 10 ** rm.token_decimals(token)
+    symbol = rm.token_symbol(token)
 
     # print header row
     print('i owner riskpool bundle token capital locked capacity')
 
     # print individual rows
-    for idx in range(len(bundleData)):
-        b = bundleData[idx]
-
+    for b in get_bundle_data(instanceService, riskpool):
         print('{} {} {} {} {} {:.1f} {:.1f} {:.1f}'.format(
-            b['idx'],
-            _shortenAddress(b['owner']),
-            b['riskpoolId'],
-            b['bundleId'],
-            token.symbol(),
-            b['capital']/mult_token,
-            b['locked']/mult_token,
-            b['capacity']/mult_token
+            b.idx,
+            _shortenAddress(b.owner),
+            b.riskpool_id,
+            b.id,
+            symbol,
+            b.capital/mult_token,
+            b.locked_capital/mult_token,
+            b.capacity/mult_token
         ))
 
 
@@ -784,82 +827,69 @@ def from_registry_base(
     instance = GifInstance(registryAddress=registryAddress)
     instance_service = instance.getInstanceService()
 
-    products = instance_service.products()
-    oracles = instance_service.oracles()
-    riskpools = instance_service.riskpools()
+    descriptor = read_deployment_descriptor(
+        instance_service,
+        product_contract_class,
+        oracle_contract_class,
+        riskpool_contract_class,
+        product_id=product_id,
+        oracle_id=oracle_id,
+        riskpool_id=riskpool_id)
 
-    product = None
-    oracle = None
-    riskpool = None
+    product = _component_from_descriptor(
+        'product',
+        descriptor.products,
+        product_id,
+        descriptor.product,
+        COMPONENT_TYPE_PRODUCT,
+        product_contract_class)
+
+    oracle = _component_from_descriptor(
+        'oracle',
+        descriptor.oracles,
+        oracle_id,
+        descriptor.oracle,
+        COMPONENT_TYPE_ORACLE,
+        oracle_contract_class)
+
+    riskpool = _component_from_descriptor(
+        'riskpool',
+        descriptor.riskpools,
+        riskpool_id,
+        descriptor.riskpool,
+        COMPONENT_TYPE_RISKPOOL,
+        riskpool_contract_class)
 
-    if products >= 1:
-        if product_id > 0:
-            component_id = product_id
-        else:
-            component_id = instance_service.getProductId(products-1)
-
-            if products > 1:
-                print('1 product expected, {} products available'.format(products))
-                print('returning last product available')
-        
-        component_address = instance_service.getComponent(component_id)
-        product = contract_from_address(product_contract_class, component_address)
-
-        if product.getType() != 1:
-            product = None
-            print('component (type={}) with id {} is not product'.format(product.getType(), component_id))
-            print('no product returned (None)')
-    else:
-        print('1 product expected, no product available')
-        print('no product returned (None)')
+    return (instance, product, oracle, riskpool)
 
-    if oracles >= 1:
-        if oracle_id > 0:
-            component_id = oracle_id
-        else:
-            component_id = instance_service.getOracleId(oracles-1)
-
-            if oracles > 1:
-                print('1 oracle expected, {} oraclea available'.format(oracles))
-                print('returning last oracle available')
-        
-        component_address = instance_service.getComponent(component_id)
-        oracle = contract_from_address(oracle_contract_class, component_address)
-
-        if oracle.getType() != 0:
-            oracle = None
-            print('component (type={}) with id {} is not oracle'.format(oracle.getType(), component_id))
-            print('no oracle returned (None)')
-    else:
-        print('1 oracle expected, no oracle available')
-        print('no oracle returned (None)')
 
-    if riskpools >= 1:
-        if riskpool_id > 0:
-            component_id = riskpool_id
-        else:
-            component_id = instance_service.getRiskpoolId(riskpools-1)
-
-            if riskpools > 1:
-                print('1 riskpool expected, {} riskpools available'.format(riskpools))
-                print('returning last riskpool available')
-        
-        component_address = instance_service.getComponent(component_id)
-        riskpool = contract_from_address(riskpool_contract_class, component_address)
-
-        if riskpool.getType() != 2:
-            riskpool = None
-            print('component (type={}) with id {} is not riskpool'.format(component.getType(), component_id))
-            print('no riskpool returned (None)')
-    else:
-        print('1 riskpool expected, no riskpools available')
-        print('no riskpool returned (None)')
+def _component_from_descriptor(
+    name,
+    components,
+    component_id,
+    component,
+    component_type,
+    contract_class
+):
+    if components == 0 or component is None:
+        print('1 {} expected, no {} available'.format(name, name))
+        print('no {} returned (None)'.format(name))
+        return None
 
-    return (instance, product, oracle, riskpool)
+    if component_id == 0 and components > 1:
+        print('1 {} expected, {} {}s available'.format(name, components, name))
+        print('returning last {} available'.format(name))
+
+    if component.type != component_type:
+        print('component (type={}) with id {} is not {}'.format(component.type, component.id, name))
+        print('no {} returned (None)'.format(name))
+        return None
+
+    return contract_from_address(contract_class, component.address)
 
 
 def to_token_amount(token, amount):
-    return amount * 10 ** token.decimals()
+    return amount * 10 ** get_read_model().token_decimals(token)
 
 
 def _copy_map(map_in):
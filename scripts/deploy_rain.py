@@ -26,6 +26,8 @@ from scripts.deploy_product import (
     to_token_amount
 )
 
+from scripts.readmodel import get_read_model
+
 from scripts.util import (
     contract_from_address,
     s2b32
@@ -64,6 +66,7 @@ def help():
     print('verify_deploy(d, usdc, product)')
     print('instanceService.getBundle(bundleId).dict()')
     print('instanceService.getPolicy(processId).dict()')
+    print('* to profile gas and latency of all deploy/setup transactions add profile_file=\'tx_profile.jsonl\' to all_in_1')
 
 
 def help_testnet():
@@ -105,7 +108,8 @@ def create_bundle(
     instance_operator,
     riskpool,
     investor,
-    bundle_funding = BUNDLE_FUNDING
+    bundle_funding = BUNDLE_FUNDING,
+    bundle_filter = bytes(0)
 ):
     # fund riskpool with risk bundle
     token = get_riskpool_token(riskpool)
@@ -118,8 +122,7 @@ def create_bundle(
         token,
         funding_amount)
 
-    # create new risk bundle
-    bundle_filter = bytes(0)
+    # create new risk bundle, see riskpool.encodeBundleFilter for non empty filters
     tx = riskpool.createBundle(
         bundle_filter,
         funding_amount, 
@@ -140,12 +143,39 @@ def create_risk(
     precHist = PRECIP_HIST,
     precDays = PRECIP_HIST_DAYS
 ):    
-    multiplier = product.getPercentageMultiplier()
-    coordMultiplier = product.getCoordinatesMultiplier()
-    precMultiplier = product.getPrecipitationMultiplier()
+    (multiplier, coordMultiplier, precMultiplier) = get_read_model().multipliers(product)
     tx = product.createRisk(startDate, endDate, placeId, coordMultiplier * lat, coordMultiplier * long, multiplier * trigger, multiplier * exit, precHist * precMultiplier, precDays, {'from': insurer})
     return tx.events['LogRainRiskDataCreated']['riskId']
 
+def create_risks(
+    product,
+    insurer,
+    risks
+):
+    # risks as produced by scripts.calibrate (contract units, placeId as string)
+    # transactions are sent without waiting for each confirmation
+    txs = []
+    for risk in risks:
+        placeId = s2b32(risk['placeId']) if isinstance(risk['placeId'], str) else risk['placeId']
+        txs.append(product.createRisk(
+            risk['startDate'],
+            risk['endDate'],
+            placeId,
+            risk['lat'],
+            risk['long'],
+            risk['trigger'],
+            risk['exit'],
+            risk['precHist'],
+            risk['precDays'],
+            {'from': insurer, 'required_confs': 0}))
+
+    riskIds = []
+    for tx in txs:
+        tx.wait(1)
+        riskIds.append(tx.events['LogRainRiskDataCreated']['riskId'])
+
+    return riskIds
+
 def create_policy(
     instance, 
     instance_operator,
@@ -177,7 +207,8 @@ def all_in_1(
     publish_source=False,
     chainLinkOracleAddress=None,
     chainLinkJobId=None,
-    chainLinkPaymentAmount=None
+    chainLinkPaymentAmount=None,
+    profile_file=None
 ):
 
     return all_in_1_base(
@@ -196,7 +227,8 @@ def all_in_1(
         publish_source=publish_source,
         chainLinkOracleAddress=chainLinkOracleAddress,
         chainLinkJobId=chainLinkJobId,
-        chainLinkPaymentAmount=chainLinkPaymentAmount)
+        chainLinkPaymentAmount=chainLinkPaymentAmount,
+        profile_file=profile_file)
 
 
 def verify_deploy(
@@ -0,0 +1,221 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from brownie import interface
+
+from scripts.const import ZERO_ADDRESS
+
+from scripts.util import (
+    batch_call,
+    contract_from_address,
+)
+
+# enum ComponentType {Oracle, Product, Riskpool}
+COMPONENT_TYPE_ORACLE = 0
+COMPONENT_TYPE_PRODUCT = 1
+COMPONENT_TYPE_RISKPOOL = 2
+
+# enum ComponentState {Created, Proposed, Declined, Active, Paused, Suspended, Archived}
+COMPONENT_STATE_ACTIVE = 3
+
+
+@dataclass
+class ComponentDescriptor:
+    id: int
+    address: str
+    type: int
+    state: int
+    owner: str
+
+
+@dataclass
+class DeploymentDescriptor:
+    registry: str
+    instance_operator: str
+    instance_wallet: str
+    products: int
+    oracles: int
+    riskpools: int
+    product: Optional[ComponentDescriptor]
+    oracle: Optional[ComponentDescriptor]
+    riskpool: Optional[ComponentDescriptor]
+    product_token: str = ZERO_ADDRESS
+    product_oracle_id: int = 0
+    product_riskpool_id: int = 0
+    riskpool_token: str = ZERO_ADDRESS
+    riskpool_wallet: str = ZERO_ADDRESS
+    riskpool_balance: int = 0
+    riskpool_tvl: int = 0
+    riskpool_capacity: int = 0
+    riskpool_wallet_balance: int = 0
+    instance_wallet_balance: int = 0
+    token_decimals: int = 0
+
+
+def read_deployment_descriptor(
+    instance_service,
+    product_contract_class,
+    oracle_contract_class,
+    riskpool_contract_class,
+    product_id=0,
+    oracle_id=0,
+    riskpool_id=0,
+    token=None
+) -> DeploymentDescriptor:
+    """Reads ids, addresses, types, states, owners, wallets and balances of the
+    instance components with a few batched rpc requests (one per dependency
+    level) instead of one rpc per value. Component ids set to 0 are resolved
+    to the last registered component of the respective type.
+    """
+    component_ids = {
+        COMPONENT_TYPE_PRODUCT: product_id,
+        COMPONENT_TYPE_ORACLE: oracle_id,
+        COMPONENT_TYPE_RISKPOOL: riskpool_id,
+    }
+
+    # 1st batch: instance level data and component counts
+    (
+        registry,
+        instance_operator,
+        instance_wallet,
+        products,
+        oracles,
+        riskpools,
+    ) = batch_call([
+        (instance_service.getRegistry, []),
+        (instance_service.getInstanceOperator, []),
+        (instance_service.getInstanceWallet, []),
+        (instance_service.products, []),
+        (instance_service.oracles, []),
+        (instance_service.riskpools, []),
+    ])
+
+    # 2nd batch: ids of the last registered components where no id is provided
+    id_lookups = []
+    for (component_type, count, get_id) in [
+        (COMPONENT_TYPE_PRODUCT, products, instance_service.getProductId),
+        (COMPONENT_TYPE_ORACLE, oracles, instance_service.getOracleId),
+        (COMPONENT_TYPE_RISKPOOL, riskpools, instance_service.getRiskpoolId),
+    ]:
+        if component_ids[component_type] == 0 and count > 0:
+            id_lookups.append((component_type, (get_id, [count - 1])))
+
+    for (component_type, _), component_id in zip(
+        id_lookups,
+        batch_call([call for (_, call) in id_lookups])
+    ):
+        component_ids[component_type] = component_id
+
+    # 3rd batch: component addresses, types and states, riskpool book keeping
+    types = [
+        component_type for component_type in component_ids.keys()
+        if component_ids[component_type] > 0]
+
+    calls = []
+    for component_type in types:
+        component_id = component_ids[component_type]
+        calls.append((instance_service.getComponent, [component_id]))
+        calls.append((instance_service.getComponentType, [component_id]))
+        calls.append((instance_service.getComponentState, [component_id]))
+
+    if component_ids[COMPONENT_TYPE_RISKPOOL] > 0:
+        component_id = component_ids[COMPONENT_TYPE_RISKPOOL]
+        calls.append((instance_service.getRiskpoolWallet, [component_id]))
+        calls.append((instance_service.getBalance, [component_id]))
+        calls.append((instance_service.getTotalValueLocked, [component_id]))
+        calls.append((instance_service.getCapacity, [component_id]))
+
+    values = batch_call(calls)
+
+    components = {}
+    for idx, component_type in enumerate(types):
+        (address, actual_type, state) = values[3 * idx:3 * idx + 3]
+        components[component_type] = ComponentDescriptor(
+            component_ids[component_type],
+            address,
+            actual_type,
+            state,
+            ZERO_ADDRESS)
+
+    descriptor = DeploymentDescriptor(
+        registry,
+        instance_operator,
+        instance_wallet,
+        products,
+        oracles,
+        riskpools,
+        components.get(COMPONENT_TYPE_PRODUCT),
+        components.get(COMPONENT_TYPE_ORACLE),
+        components.get(COMPONENT_TYPE_RISKPOOL))
+
+    if component_ids[COMPONENT_TYPE_RISKPOOL] > 0:
+        (
+            descriptor.riskpool_wallet,
+            descriptor.riskpool_balance,
+            descriptor.riskpool_tvl,
+            descriptor.riskpool_capacity,
+        ) = values[3 * len(types):]
+
+    # 4th batch: data provided by the component contracts themselves
+    product = _contract(descriptor.product, COMPONENT_TYPE_PRODUCT, product_contract_class)
+    oracle = _contract(descriptor.oracle, COMPONENT_TYPE_ORACLE, oracle_contract_class)
+    riskpool = _contract(descriptor.riskpool, COMPONENT_TYPE_RISKPOOL, riskpool_contract_class)
+
+    owned = [
+        (component, contract) for (component, contract) in [
+            (descriptor.product, product),
+            (descriptor.oracle, oracle),
+            (descriptor.riskpool, riskpool),
+        ] if contract is not None]
+
+    calls = [(contract.owner, []) for (_, contract) in owned]
+
+    if product is not None:
+        calls.append((product.getToken, []))
+        calls.append((product.getOracleId, []))
+        calls.append((product.getRiskpoolId, []))
+
+    if riskpool is not None:
+        calls.append((riskpool.getErc20Token, []))
+
+    values = iter(batch_call(calls))
+
+    for (component, _) in owned:
+        component.owner = next(values)
+
+    if product is not None:
+        descriptor.product_token = next(values)
+        descriptor.product_oracle_id = next(values)
+        descriptor.product_riskpool_id = next(values)
+
+    if riskpool is not None:
+        descriptor.riskpool_token = next(values)
+
+    # 5th batch: token balances of instance and riskpool wallet
+    if token is None and descriptor.riskpool_token != ZERO_ADDRESS:
+        token = contract_from_address(interface.IERC20Metadata, descriptor.riskpool_token)
+
+    if token is not None:
+        calls = [
+            (token.decimals, []),
+            (token.balanceOf, [descriptor.instance_wallet]),
+        ]
+
+        if riskpool is not None:
+            calls.append((token.balanceOf, [descriptor.riskpool_wallet]))
+
+        values = batch_call(calls)
+        descriptor.token_decimals = values[0]
+        descriptor.instance_wallet_balance = values[1]
+
+        if riskpool is not None:
+            descriptor.riskpool_wallet_balance = values[2]
+
+    return descriptor
+
+
+def _contract(component: Optional[ComponentDescriptor], component_type: int, contract_class):
+    if component is None or component.type != component_type:
+        return None
+
+    return contract_from_address(contract_class, component.address)
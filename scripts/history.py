@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import sys
+
+from collections import OrderedDict
+
+import numpy as np
+import requests
+
+from scripts.backtest import aggregate, to_prec_actual
+from scripts.payout import PRECIPITATION_MULTIPLIER
+
+# local cache for meteoblue historybasic-1h payloads
+# from scripts.history import get_history_cache
+# payload = get_history_cache().get_or_fetch(-23.550620, -46.634370, '2023-01-01', '2023-03-31', api_key=api_key)
+# usage from the js test harness (prints the cached payload as json):
+# python -m scripts.history -23.550620 -46.634370 2023-01-01 2023-03-31
+
+HISTORY_CACHE_DIR = os.getenv('HISTORY_CACHE_DIR', '.history_cache')
+HISTORY_CACHE_MAX_BYTES = int(os.getenv('HISTORY_CACHE_MAX_BYTES', str(512 * 1024**2)))
+
+# decoded payloads kept in memory per process
+MEMORY_CACHE_ENTRIES = 256
+
+# same coordinate resolution as COORD_MULTIPLIER in RainProduct
+COORD_DECIMALS = 6
+
+METEOBLUE_URL = 'https://my.meteoblue.com/packages/historybasic-1h?lat={}&lon={}&startdate={}&enddate={}&format=json&apikey={}'
+
+_history_cache = None
+
+
+class HistoryCache(object):
+    """Content addressed cache of history_1h payloads keyed by (lat, lon, startdate,
+    enddate). Payloads are stored as compressed numpy archives, one file per key.
+    The file modification time serves as access time for the least recently used
+    eviction, so several processes can share the same cache directory.
+    """
+
+    def __init__(self, path=HISTORY_CACHE_DIR, max_bytes=HISTORY_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+
+        os.makedirs(path, exist_ok=True)
+
+    def get(self, lat, lon, start_date, end_date) -> dict:
+        """Returns the cached payload or None."""
+        key = history_key(lat, lon, start_date, end_date)
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self._touch(key)
+            self.hits += 1
+            return self._memory[key]
+
+        file_name = self._file(key)
+        if not os.path.exists(file_name):
+            self.misses += 1
+            return None
+
+        with np.load(file_name) as archive:
+            payload = {
+                'history_1h': {
+                    'time': archive['time'].tolist(),
+                    'precipitation': archive['precipitation'],
+                }
+            }
+
+        self._touch(key)
+        self._remember(key, payload)
+        self.hits += 1
+
+        return payload
+
+    def put(self, lat, lon, start_date, end_date, payload) -> str:
+        """Stores the payload, archives larger than max_bytes are not cached."""
+        key = history_key(lat, lon, start_date, end_date)
+        history = payload['history_1h']
+
+        # write to a temporary file first, readers never see partial archives
+        file_name = self._file(key)
+        tmp_file_name = '{}.{}.tmp'.format(file_name, os.getpid())
+
+        with open(tmp_file_name, 'wb') as file:
+            np.savez_compressed(
+                file,
+                time=np.array(history['time'], dtype=str),
+                precipitation=np.array(history['precipitation'], dtype=np.float64))
+
+        # would evict every other entry and itself right away
+        if os.path.getsize(tmp_file_name) > self.max_bytes:
+            os.remove(tmp_file_name)
+            return key
+
+        os.replace(tmp_file_name, file_name)
+
+        self._remember(key, _decode(history))
+        self.evict()
+
+        return key
+
+    def get_or_fetch(self, lat, lon, start_date, end_date, fetch=None, api_key=None) -> dict:
+        payload = self.get(lat, lon, start_date, end_date)
+
+        if payload is None:
+            fetch = fetch or fetch_history_1h
+            payload = fetch(lat, lon, start_date, end_date, api_key)
+            self.put(lat, lon, start_date, end_date, payload)
+            payload = _decode(payload['history_1h'])
+
+        return payload
+
+    def evict(self):
+        """Removes the least recently used payloads until the cache fits max_bytes."""
+        entries = []
+        for file_name in os.listdir(self.path):
+            if file_name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.path, file_name))
+                entries.append((stat.st_mtime, stat.st_size, file_name))
+
+        total = sum([size for (_, size, _) in entries])
+
+        for (_, size, file_name) in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            os.remove(os.path.join(self.path, file_name))
+            self._memory.pop(file_name[:-len('.npz')], None)
+            total -= size
+
+    def clear(self):
+        for file_name in os.listdir(self.path):
+            if file_name.endswith('.npz'):
+                os.remove(os.path.join(self.path, file_name))
+
+        self._memory.clear()
+
+    def _remember(self, key, payload):
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > MEMORY_CACHE_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key):
+        try:
+            os.utime(self._file(key))
+        except FileNotFoundError:
+            # evicted by another process
+            self._memory.pop(key, None)
+
+    def _file(self, key) -> str:
+        return os.path.join(self.path, '{}.npz'.format(key))
+
+
+def get_history_cache() -> HistoryCache:
+    global _history_cache
+
+    if _history_cache is None:
+        _history_cache = HistoryCache()
+
+    return _history_cache
+
+
+def _decode(history) -> dict:
+    return {
+        'history_1h': {
+            'time': list(history['time']),
+            'precipitation': np.array(history['precipitation'], dtype=np.float64),
+        }
+    }
+
+
+def history_key(lat, lon, start_date, end_date) -> str:
+    content = '{:.{d}f},{:.{d}f},{},{}'.format(
+        float(lat), float(lon), start_date, end_date, d=COORD_DECIMALS)
+
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def fetch_history_1h(lat, lon, start_date, end_date, api_key) -> dict:
+    if not api_key:
+        raise ValueError('ERROR meteoblue api key not set')
+
+    response = requests.get(METEOBLUE_URL.format(lat, lon, start_date, end_date, api_key))
+    response.raise_for_status()
+    payload = response.json()
+
+    if 'error_message' in payload:
+        raise ValueError('ERROR meteoblue: {}'.format(payload['error_message']))
+
+    return payload
+
+
+def oracle_response(
+    lat,
+    lon,
+    start_date,
+    end_date,
+    prec_multiplier=PRECIPITATION_MULTIPLIER,
+    cache=None,
+    api_key=None
+) -> tuple:
+    """(precActual, precDays) as returned by meteoblue.js for a risk, to be used
+    as mocked oracle response on a local chain.
+    """
+    cache = cache or get_history_cache()
+    payload = cache.get_or_fetch(lat, lon, start_date, end_date, api_key=api_key)
+    (prec_avg, prec_days) = aggregate(payload['history_1h']['precipitation'])
+
+    return (int(to_prec_actual(prec_avg, prec_multiplier)), prec_days)
+
+
+def add_to_store(
+    store,
+    location_id,
+    lat,
+    lon,
+    start_date,
+    end_date,
+    cache=None,
+    api_key=None
+):
+    """Adds the (cached) hourly history of a location to a backtest PrecipitationStore."""
+    cache = cache or get_history_cache()
+    payload = cache.get_or_fetch(lat, lon, start_date, end_date, api_key=api_key)
+    store.add_history_1h(location_id, lat, lon, payload)
+
+
+def main(lat, lon, start_date, end_date):
+    payload = get_history_cache().get_or_fetch(
+        lat, lon, start_date, end_date,
+        api_key=os.getenv('METEOBLUE_API_KEY'))
+
+    history = payload['history_1h']
+    print(json.dumps({
+        'history_1h': {
+            'time': history['time'],
+            'precipitation': np.asarray(history['precipitation']).tolist(),
+        }
+    }))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:5])
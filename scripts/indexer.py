@@ -0,0 +1,128 @@
+from brownie import web3
+
+# reads RainProduct events for a single policy, risk or policy holder.
+# query() uses topic filters of the node, scan() downloads and decodes all product
+# logs and filters afterwards (the only option before the event params were indexed).
+# from scripts.indexer import RainIndexer
+# indexer = RainIndexer(product)
+# events = indexer.policy_events(policyId)
+
+# events with the policy id as first indexed topic
+POLICY_EVENTS = [
+    'LogRainPolicyApplicationCreated',
+    'LogRainPolicyCreated',
+    'LogRainClaimCreated',
+    'LogRainPayoutCreated',
+    'LogRainPolicyProcessed',
+]
+
+# events with the risk id as first indexed topic
+RISK_EVENTS = [
+    'LogRainRiskDataCreated',
+    'LogRainRiskDataRequested',
+    'LogRainRiskDataRequestCancelled',
+    'LogRainRiskDataReceived',
+    'LogRainRiskProcessed',
+    'LogRainCohortCreated',
+    'LogRainCohortPolicyMaterialized',
+    'LogRainCohortClosed',
+    'LogRainPayoutClaimModeSet',
+]
+
+# events with the policy holder as second indexed topic
+HOLDER_EVENTS = [
+    'LogRainPolicyApplicationCreated',
+    'LogRainPolicyCreated',
+]
+
+# policy events with the risk id as third indexed topic
+POLICY_RISK_EVENTS = HOLDER_EVENTS
+
+
+class RainIndexer(object):
+
+    def __init__(self, product, from_block=0):
+        self.address = product.address
+        self.from_block = from_block
+        self.contract = web3.eth.contract(address=product.address, abi=product.abi)
+        self.topics = dict(product.topics)
+        self.names = {topic: name for name, topic in self.topics.items()}
+
+    def policy_events(self, policy_id, to_block='latest', full_scan=False) -> list:
+        if full_scan:
+            return self.scan(POLICY_EVENTS, 'policyId', _to_hex32(policy_id), to_block)
+
+        return self.query(POLICY_EVENTS, [_to_hex32(policy_id)], to_block)
+
+    def risk_events(self, risk_id, to_block='latest', full_scan=False) -> list:
+        """Risk events and the creation of the policies for the risk."""
+        if full_scan:
+            return self.scan(RISK_EVENTS + POLICY_RISK_EVENTS, 'riskId', _to_hex32(risk_id), to_block)
+
+        events = self.query(RISK_EVENTS, [_to_hex32(risk_id)], to_block)
+        events += self.query(POLICY_RISK_EVENTS, [None, None, _to_hex32(risk_id)], to_block)
+
+        return _sort(events)
+
+    def holder_events(self, holder, to_block='latest', full_scan=False) -> list:
+        if full_scan:
+            return self.scan(HOLDER_EVENTS, 'policyHolder', str(holder).lower(), to_block)
+
+        return self.query(HOLDER_EVENTS, [None, _address_topic(holder)], to_block)
+
+    def query(self, event_names, topics, to_block='latest') -> list:
+        """Logs of the given events matching the topics (event params 1..3), decoded."""
+        logs = web3.eth.get_logs({
+            'address': self.address,
+            'fromBlock': self.from_block,
+            'toBlock': to_block,
+            'topics': [[self.topics[name] for name in event_names]] + topics})
+
+        return [self.decode(log) for log in logs]
+
+    def scan(self, event_names, arg, value, to_block='latest') -> list:
+        logs = web3.eth.get_logs({
+            'address': self.address,
+            'fromBlock': self.from_block,
+            'toBlock': to_block})
+
+        events = []
+        for log in logs:
+            name = self.names.get(_to_hex32(log['topics'][0]))
+            if name not in event_names:
+                continue
+
+            event = self.decode(log)
+            if _normalize(event['args'].get(arg)) == value:
+                events.append(event)
+
+        return events
+
+    def decode(self, log):
+        name = self.names[_to_hex32(log['topics'][0])]
+        return self.contract.events[name]().processLog(log)
+
+
+def _sort(events) -> list:
+    return sorted(events, key=lambda event: (event['blockNumber'], event['logIndex']))
+
+
+def _to_hex32(value) -> str:
+    if isinstance(value, str):
+        return value.lower()
+
+    return '0x' + bytes(value).hex()
+
+
+def _address_topic(address) -> str:
+    return '0x' + '0' * 24 + str(address).lower()[2:]
+
+
+def _normalize(value):
+    if isinstance(value, (bytes, bytearray)):
+        return _to_hex32(value)
+
+    if isinstance(value, str):
+        return value.lower()
+
+    return value
@@ -10,23 +10,131 @@ from brownie.network.account import Account
 from brownie import (
     Wei,
     Contract, 
+    chain,
     network,
     interface
 )
 
 from scripts.const import (
     GIF_RELEASE,
+    ZERO_ADDRESS,
+    INSTANCE_SERVICE_NAME,
+    INSTANCE_OPERATOR_SERVICE_NAME,
+    COMPONENT_OWNER_SERVICE_NAME,
+    TREASURY_NAME,
 )
 
 from scripts.util import (
+    batch_call,
     encode_function_data,
     get_account,
+    get_contract_class,
     get_package,
     s2h,
     s2b,
     contract_from_address,
 )
 
+# contract classes are resolved once per process via get_contract_class
+GIF_CONTRACTS = 'gif-contracts'
+
+# on-disk store for resolved registry addresses
+REGISTRY_CACHE_FILE = 'gif_registry_cache.json'
+
+# local dev chains are reset frequently, keep resolved addresses in memory only
+CHAIN_IDS_WITHOUT_REGISTRY_CACHE_FILE = [1337]
+
+# contracts needed to attach to an existing gif instance
+REGISTRY_CONTRACT_NAMES = [
+    INSTANCE_SERVICE_NAME,
+    COMPONENT_OWNER_SERVICE_NAME,
+    INSTANCE_OPERATOR_SERVICE_NAME,
+    TREASURY_NAME,
+]
+
+
+class GifRegistryCache(object):
+
+    def __init__(self, file_name=REGISTRY_CACHE_FILE):
+        self.file_name = file_name
+        self.addresses = self._load()
+
+    def resolve(
+        self,
+        registry: interface.IRegistry,
+        names,
+        release=GIF_RELEASE
+    ) -> dict:
+        key = self._key(chain.id, registry.address, release)
+        resolved = self.addresses.get(key, {})
+        missing = [name for name in names if name not in resolved]
+
+        # resolve all missing names with a single batched rpc
+        if len(missing) > 0:
+            addresses = batch_call([
+                (registry.getContract, [s2b(name)]) for name in missing])
+
+            for name, address in zip(missing, addresses):
+                # don't cache names that are not (yet) registered
+                if address != ZERO_ADDRESS:
+                    resolved[name] = address
+
+            self.addresses[key] = resolved
+            self._save()
+
+        return { name: resolved.get(name, ZERO_ADDRESS) for name in names }
+
+    def invalidate(self, registry_address=None, chain_id=None):
+        for key in list(self.addresses.keys()):
+            (key_chain_id, key_registry_address, _) = key.split(':')
+
+            if chain_id is not None and int(key_chain_id) != chain_id:
+                continue
+
+            if registry_address is not None and key_registry_address != str(registry_address).lower():
+                continue
+
+            del self.addresses[key]
+
+        self._save()
+
+    def _key(self, chain_id, registry_address, release) -> str:
+        return '{}:{}:{}'.format(chain_id, str(registry_address).lower(), release)
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.file_name):
+            return {}
+
+        with open(self.file_name) as file:
+            return json.load(file)
+
+    def _save(self):
+        if chain.id in CHAIN_IDS_WITHOUT_REGISTRY_CACHE_FILE:
+            return
+
+        persistent = {
+            key: addresses for key, addresses in self.addresses.items()
+            if int(key.split(':')[0]) not in CHAIN_IDS_WITHOUT_REGISTRY_CACHE_FILE }
+
+        with open(self.file_name, 'w') as file:
+            json.dump(persistent, file, indent=2, sort_keys=True)
+
+
+_registry_cache = None
+
+def get_registry_cache() -> GifRegistryCache:
+    global _registry_cache
+
+    if _registry_cache is None:
+        _registry_cache = GifRegistryCache()
+
+    return _registry_cache
+
+
+def invalidate_registry_cache(registry_address=None, chain_id=None):
+    get_registry_cache().invalidate(registry_address, chain_id)
+
+
 class GifRegistry(object):
 
     def __init__(
@@ -35,10 +143,11 @@ class GifRegistry(object):
         registryAddress: Account,
         publish_source=False
     ):
-        gif = get_package('gif-contracts')
+        gif = get_package(GIF_CONTRACTS)
+        addresses = None
 
         if instanceOperator is not None and registryAddress is None:
-            controller = gif.RegistryController.deploy(
+            controller = get_contract_class(GIF_CONTRACTS, 'RegistryController').deploy(
                 {'from': instanceOperator},
                 publish_source=publish_source)
 
@@ -46,22 +155,23 @@ class GifRegistry(object):
                 s2b(GIF_RELEASE),
                 initializer=controller.initializeRegistry)
 
-            proxy = gif.CoreProxy.deploy(
+            proxy = get_contract_class(GIF_CONTRACTS, 'CoreProxy').deploy(
                 controller.address,
                 encoded_initializer, 
                 {'from': instanceOperator},
                 publish_source=publish_source)
 
-            registry = contract_from_address(gif.RegistryController, proxy.address)
+            registry = contract_from_address(get_contract_class(GIF_CONTRACTS, 'RegistryController'), proxy.address)
             registry.register(s2b('Registry'), proxy.address, {'from': instanceOperator})
             registry.register(s2b('RegistryController'), controller.address, {'from': instanceOperator})
 
             registryAddress = proxy.address
 
         elif registryAddress is not None:
-            registry = contract_from_address(gif.RegistryController, registryAddress)
-            instanceOperatorServiceAddress = registry.getContract(s2b('InstanceOperatorService'))
-            instanceOperatorService = contract_from_address(gif.InstanceOperatorService, instanceOperatorServiceAddress)
+            registry = contract_from_address(interface.IRegistry, registryAddress)
+            addresses = get_registry_cache().resolve(registry, REGISTRY_CONTRACT_NAMES)
+            instanceOperatorServiceAddress = addresses[INSTANCE_OPERATOR_SERVICE_NAME]
+            instanceOperatorService = contract_from_address(get_contract_class(GIF_CONTRACTS, 'InstanceOperatorService'), instanceOperatorServiceAddress)
             
             instanceOperator = instanceOperatorService.owner()
 
@@ -75,7 +185,8 @@ class GifRegistry(object):
 
         print('owner {}'.format(instanceOperator))
         print('registry.address {}'.format(self.registry.address))
-        print('registry.getContract(\'InstanceOperatorService\') {}'.format(self.registry.getContract(s2b('InstanceOperatorService'))))
+        if addresses is not None:
+            print('registry.getContract(\'InstanceOperatorService\') {}'.format(addresses[INSTANCE_OPERATOR_SERVICE_NAME]))
 
     def getOwner(self) -> Account:
         return self.instanceOperator
@@ -111,64 +222,65 @@ class GifInstance(GifRegistry):
 
 
     def createFromRegistry(self):
-        gif = self.gif
         registry = self.getRegistry()
         instanceOperator = self.getOwner()
 
+        # addresses are resolved (and cached) in a single batched call
+        addresses = get_registry_cache().resolve(registry, REGISTRY_CONTRACT_NAMES)
+
         # minimal set of contracts
         self.instanceService = contract_from_address(
-            gif.InstanceService,
-            registry.getContract(s2b('InstanceService')))
+            get_contract_class(GIF_CONTRACTS, 'InstanceService'),
+            addresses[INSTANCE_SERVICE_NAME])
         
         self.componentOwnerService = contract_from_address(
-            gif.ComponentOwnerService,
-            registry.getContract(s2b('ComponentOwnerService')))
+            get_contract_class(GIF_CONTRACTS, 'ComponentOwnerService'),
+            addresses[COMPONENT_OWNER_SERVICE_NAME])
 
         self.instanceOperatorService = contract_from_address(
-            gif.InstanceOperatorService,
-            registry.getContract(s2b('InstanceOperatorService')))
+            get_contract_class(GIF_CONTRACTS, 'InstanceOperatorService'),
+            addresses[INSTANCE_OPERATOR_SERVICE_NAME])
         
         # other contracts needed
         self.treasury = contract_from_address(
-            gif.TreasuryModule,
-            registry.getContract(s2b('Treasury')))
+            get_contract_class(GIF_CONTRACTS, 'TreasuryModule'),
+            addresses[TREASURY_NAME])
 
 
     def deployWithRegistry(self, publish_source=False):
-        gif = self.gif
         registry = self.getRegistry()
         instanceOperator = self.getOwner()
 
-        self.bundleToken = deployGifToken("BundleToken", gif.BundleToken, registry, instanceOperator, publish_source)
-        self.riskpoolToken = deployGifToken("RiskpoolToken", gif.RiskpoolToken, registry, instanceOperator, publish_source)
+        self.bundleToken = deployGifToken("BundleToken", get_contract_class(GIF_CONTRACTS, 'BundleToken'), registry, instanceOperator, publish_source)
+        self.riskpoolToken = deployGifToken("RiskpoolToken", get_contract_class(GIF_CONTRACTS, 'RiskpoolToken'), registry, instanceOperator, publish_source)
 
         # modules (need to be deployed first)
         # deploy order needs to respect module dependencies
-        self.access = deployGifModuleV2("Access", gif.AccessController, registry, instanceOperator, gif, publish_source)
-        self.component = deployGifModuleV2("Component", gif.ComponentController, registry, instanceOperator, gif, publish_source)
-        self.query = deployGifModuleV2("Query", gif.QueryModule, registry, instanceOperator, gif, publish_source)
-        self.license = deployGifModuleV2("License", gif.LicenseController, registry, instanceOperator, gif, publish_source)
-        self.policy = deployGifModuleV2("Policy", gif.PolicyController, registry, instanceOperator, gif, publish_source)
-        self.bundle = deployGifModuleV2("Bundle", gif.BundleController, registry, instanceOperator, gif, publish_source)
-        self.pool = deployGifModuleV2("Pool", gif.PoolController, registry, instanceOperator, gif, publish_source)
-        self.treasury = deployGifModuleV2("Treasury", gif.TreasuryModule, registry, instanceOperator, gif, publish_source)
+        self.access = deployGifModuleV2("Access", get_contract_class(GIF_CONTRACTS, 'AccessController'), registry, instanceOperator, publish_source)
+        self.component = deployGifModuleV2("Component", get_contract_class(GIF_CONTRACTS, 'ComponentController'), registry, instanceOperator, publish_source)
+        self.query = deployGifModuleV2("Query", get_contract_class(GIF_CONTRACTS, 'QueryModule'), registry, instanceOperator, publish_source)
+        self.license = deployGifModuleV2("License", get_contract_class(GIF_CONTRACTS, 'LicenseController'), registry, instanceOperator, publish_source)
+        self.policy = deployGifModuleV2("Policy", get_contract_class(GIF_CONTRACTS, 'PolicyController'), registry, instanceOperator, publish_source)
+        self.bundle = deployGifModuleV2("Bundle", get_contract_class(GIF_CONTRACTS, 'BundleController'), registry, instanceOperator, publish_source)
+        self.pool = deployGifModuleV2("Pool", get_contract_class(GIF_CONTRACTS, 'PoolController'), registry, instanceOperator, publish_source)
+        self.treasury = deployGifModuleV2("Treasury", get_contract_class(GIF_CONTRACTS, 'TreasuryModule'), registry, instanceOperator, publish_source)
 
         # TODO these contracts do not work with proxy pattern
-        self.policyFlow = deployGifService(gif.PolicyDefaultFlow, registry, instanceOperator, publish_source)
+        self.policyFlow = deployGifService(get_contract_class(GIF_CONTRACTS, 'PolicyDefaultFlow'), registry, instanceOperator, publish_source)
 
         # services
-        self.instanceService = deployGifModuleV2("InstanceService", gif.InstanceService, registry, instanceOperator, gif, publish_source)
-        self.componentOwnerService = deployGifModuleV2("ComponentOwnerService", gif.ComponentOwnerService, registry, instanceOperator, gif, publish_source)
-        self.oracleService = deployGifModuleV2("OracleService", gif.OracleService, registry, instanceOperator, gif, publish_source)
-        self.riskpoolService = deployGifModuleV2("RiskpoolService", gif.RiskpoolService, registry, instanceOperator, gif, publish_source)
+        self.instanceService = deployGifModuleV2("InstanceService", get_contract_class(GIF_CONTRACTS, 'InstanceService'), registry, instanceOperator, publish_source)
+        self.componentOwnerService = deployGifModuleV2("ComponentOwnerService", get_contract_class(GIF_CONTRACTS, 'ComponentOwnerService'), registry, instanceOperator, publish_source)
+        self.oracleService = deployGifModuleV2("OracleService", get_contract_class(GIF_CONTRACTS, 'OracleService'), registry, instanceOperator, publish_source)
+        self.riskpoolService = deployGifModuleV2("RiskpoolService", get_contract_class(GIF_CONTRACTS, 'RiskpoolService'), registry, instanceOperator, publish_source)
 
         # TODO these contracts do not work with proxy pattern
-        self.productService = deployGifService(gif.ProductService, registry, instanceOperator, publish_source)
+        self.productService = deployGifService(get_contract_class(GIF_CONTRACTS, 'ProductService'), registry, instanceOperator, publish_source)
 
         # needs to be the last module to register as it will 
         # perform some post deploy wirings and changes the address 
         # of the instance operator service to its true address
-        self.instanceOperatorService = deployGifModuleV2("InstanceOperatorService", gif.InstanceOperatorService, registry, instanceOperator, gif, publish_source)
+        self.instanceOperatorService = deployGifModuleV2("InstanceOperatorService", get_contract_class(GIF_CONTRACTS, 'InstanceOperatorService'), registry, instanceOperator, publish_source)
 
         # post deploy wiring steps
         # self.bundleToken.setBundleModule(self.bundle)
@@ -176,6 +288,9 @@ class GifInstance(GifRegistry):
         # ensure that the instance has 32 contracts when freshly deployed
         assert 32 == registry.contracts()
 
+        # drop addresses resolved for a previous deployment with the same registry address
+        invalidate_registry_cache(registry.address)
+
     def getTreasury(self) -> interface.ITreasury:
         return self.treasury
 
@@ -251,7 +366,6 @@ def deployGifModuleV2(
     controllerClass,
     registry, 
     owner,
-    gif,
     publish_source=False
 ):
     print('module {} deploy controller'.format(moduleName))
@@ -264,7 +378,7 @@ def deployGifModuleV2(
         initializer=controller.initialize)
 
     print('module {} deploy proxy'.format(moduleName))
-    proxy = gif.CoreProxy.deploy(
+    proxy = get_contract_class(GIF_CONTRACTS, 'CoreProxy').deploy(
         controller.address, 
         encoded_initializer, 
         {'from': owner},
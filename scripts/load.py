@@ -0,0 +1,423 @@
+import random
+import time
+
+from brownie.network import accounts
+
+from brownie import (
+    Usdc,
+    RainProduct,
+    RainOracle,
+    RainRiskpool,
+)
+
+from scripts.const import (
+    INSTANCE_OPERATOR,
+    INSTANCE_WALLET,
+    ORACLE_PROVIDER,
+    CHAINLINK_NODE_OPERATOR,
+    RISKPOOL_KEEPER,
+    RISKPOOL_WALLET,
+    INVESTOR,
+    PRODUCT_OWNER,
+    INSURER,
+)
+
+from scripts.deploy_product import (
+    stakeholders_accounts_ganache,
+    RISKPOOL_WALLET_ALLOWANCE,
+)
+
+from scripts.instance import GifInstance
+from scripts.pipeline import TxPipeline
+from scripts.product import GifProductComplete
+from scripts.util import s2b32
+
+# load generation for the local dev chain (ganache)
+# from scripts.load import deploy_load_setup, generate_load
+# d = deploy_load_setup()
+# report = generate_load(d, seed=42, risks=500, policies=50000, bundles=100)
+
+LOAD_BASE_NAME = 'RainLoad'
+
+SEED_DEFAULT = 42
+RISKS_DEFAULT = 10
+POLICIES_DEFAULT = 100
+BUNDLES_DEFAULT = 2
+HOLDERS_DEFAULT = 20
+INSURERS_DEFAULT = 4
+SETTLE_BATCH_SIZE_DEFAULT = 25
+
+SUM_INSURED_MIN = 100
+SUM_INSURED_MAX = 5000
+PREMIUM_RATE = 0.15
+
+# native token funding for generated holder and insurer accounts
+ACCOUNT_FUNDING = '1 ether'
+
+# precipitation multiplier of the oracle response relative to precHist
+PAYOUT_NONE = 'none'
+PAYOUT_FULL = 'full'
+PAYOUT_UNIFORM = 'uniform'
+PAYOUT_MIXED = 'mixed'
+
+PAYOUT_DISTRIBUTIONS = {
+    PAYOUT_NONE: lambda rng: 0.5,
+    PAYOUT_FULL: lambda rng: 3.0,
+    PAYOUT_UNIFORM: lambda rng: rng.uniform(0.0, 3.0),
+    # 80% of the risks without payout
+    PAYOUT_MIXED: lambda rng: rng.uniform(0.0, 1.0) if rng.random() < 0.8 else rng.uniform(1.0, 3.0),
+}
+
+PHASE_SETUP = 'setup'
+PHASE_ISSUANCE = 'issuance'
+PHASE_ORACLE = 'oracle'
+PHASE_SETTLEMENT = 'settlement'
+
+
+def deploy_load_setup(stakeholders_accounts=None) -> dict:
+    a = stakeholders_accounts or stakeholders_accounts_ganache()
+
+    token = Usdc.deploy({'from': a[INSTANCE_OPERATOR]})
+    instance = GifInstance(
+        instanceOperator=a[INSTANCE_OPERATOR],
+        instanceWallet=a[INSTANCE_WALLET])
+
+    # load tests use the chainlink (mock) operator based oracle
+    deployment = GifProductComplete(
+        instance,
+        RainProduct,
+        RainOracle,
+        RainRiskpool,
+        a[PRODUCT_OWNER],
+        a[INSURER],
+        a[ORACLE_PROVIDER],
+        a[RISKPOOL_KEEPER],
+        a[RISKPOOL_WALLET],
+        a[INVESTOR],
+        token,
+        a[CHAINLINK_NODE_OPERATOR],
+        name=LOAD_BASE_NAME)
+
+    token.approve(
+        instance.getTreasury(),
+        RISKPOOL_WALLET_ALLOWANCE,
+        {'from': a[RISKPOOL_WALLET]})
+
+    return {
+        'accounts': a,
+        'token': token,
+        'instance': instance,
+        'product': deployment.getProduct().getContract(),
+        'oracle': deployment.getOracle().getContract(),
+        'clOperator': deployment.getOracle().getClOperator(),
+        'riskpool': deployment.getRiskpool().getContract(),
+    }
+
+
+def generate_load(
+    d,
+    seed=SEED_DEFAULT,
+    risks=RISKS_DEFAULT,
+    policies=POLICIES_DEFAULT,
+    bundles=BUNDLES_DEFAULT,
+    holders=HOLDERS_DEFAULT,
+    insurers=INSURERS_DEFAULT,
+    payout_distribution=PAYOUT_MIXED,
+    settle_batch_size=SETTLE_BATCH_SIZE_DEFAULT,
+) -> dict:
+    rng = random.Random(seed)
+    stats = LoadStats()
+
+    a = d['accounts']
+    token = d['token']
+    instance = d['instance']
+    product = d['product']
+    riskpool = d['riskpool']
+    treasury = instance.getTreasury()
+    operator = a[INSTANCE_OPERATOR]
+
+    print('====== load setup (seed {}) ======'.format(seed))
+    risk_specs = [_random_risk(rng, idx) for idx in range(risks)]
+    policy_specs = [_random_policy(rng, risks, holders) for idx in range(policies)]
+
+    sum_insured_total = sum([p['sumInsured'] for p in policy_specs])
+    bundle_funding = int(1.2 * sum_insured_total / bundles) + 1
+
+    insurer_accounts = _create_insurers(d, insurers)
+    holder_accounts = _create_holders(d, holders, policy_specs, stats)
+
+    # bundles
+    riskpool.setMaximumNumberOfActiveBundles(bundles, {'from': a[RISKPOOL_KEEPER]})
+    stats.add(PHASE_SETUP, 'transfer', token.transfer(a[INVESTOR], bundles * bundle_funding, {'from': operator}))
+    stats.add(PHASE_SETUP, 'approve', token.approve(treasury, bundles * bundle_funding, {'from': a[INVESTOR]}))
+
+    for idx in range(bundles):
+        stats.add(PHASE_SETUP, 'createBundle', riskpool.createBundle(bytes(0), bundle_funding, {'from': a[INVESTOR]}))
+
+    # risks
+    multiplier = product.getPercentageMultiplier()
+    coord_multiplier = product.getCoordinatesMultiplier()
+    prec_multiplier = product.getPrecipitationMultiplier()
+
+    pipeline = TxPipeline(insurer_accounts)
+    for r in risk_specs:
+        pipeline.submit(
+            product.createRisk,
+            r['startDate'],
+            r['endDate'],
+            r['placeId'],
+            int(coord_multiplier * r['lat']),
+            int(coord_multiplier * r['long']),
+            int(multiplier * r['trigger']),
+            int(multiplier * r['exit']),
+            int(prec_multiplier * r['precHist']),
+            r['precDays'])
+
+    risk_ids = []
+    for tx in pipeline.flush():
+        stats.add(PHASE_SETUP, 'createRisk', tx)
+        risk_ids.append(tx.events['LogRainRiskDataCreated']['riskId'])
+
+    # policies issued in parallel from all insurer accounts
+    print('====== issuing {} policies with {} insurers ======'.format(policies, insurers))
+    stats.start(PHASE_ISSUANCE)
+
+    policy_ids = {risk_id: [] for risk_id in risk_ids}
+    for p in policy_specs:
+        pipeline.submit(
+            product.applyForPolicy,
+            holder_accounts[p['holder']],
+            p['premium'],
+            p['sumInsured'],
+            risk_ids[p['risk']])
+
+    for p, tx in zip(policy_specs, pipeline.flush()):
+        stats.add(PHASE_ISSUANCE, 'applyForPolicy', tx)
+        policy_ids[risk_ids[p['risk']]].append(
+            tx.events['LogRainPolicyApplicationCreated']['policyId'])
+
+    stats.stop(PHASE_ISSUANCE)
+
+    # mock oracle responses
+    print('====== oracle responses ({}) ======'.format(payout_distribution))
+    stats.start(PHASE_ORACLE)
+
+    responded_at = {}
+    precipitation = PAYOUT_DISTRIBUTIONS[payout_distribution]
+    for idx, risk_id in enumerate(risk_ids):
+        if len(policy_ids[risk_id]) == 0:
+            continue
+
+        prec_actual = int(prec_multiplier * risk_specs[idx]['precHist'] * precipitation(rng))
+        _respond(d, risk_id, policy_ids[risk_id][0], prec_actual, stats)
+        responded_at[risk_id] = time.perf_counter()
+
+    stats.stop(PHASE_ORACLE)
+
+    # settlement
+    print('====== settlement (batch size {}) ======'.format(settle_batch_size))
+    stats.start(PHASE_SETTLEMENT)
+
+    # settlement time: processPoliciesForRisk calls for the risk
+    # settlement latency: oracle response until all policies of the risk are settled
+    settlement_time = {}
+    settlement_latency = {}
+    for idx, risk_id in enumerate(risk_ids):
+        if risk_id not in responded_at:
+            continue
+
+        start = time.perf_counter()
+        insurer = insurer_accounts[idx % len(insurer_accounts)]
+        while product.policies(risk_id) > 0:
+            tx = product.processPoliciesForRisk(risk_id, settle_batch_size, {'from': insurer})
+            stats.add(PHASE_SETTLEMENT, 'processPoliciesForRisk', tx)
+
+        settled_at = time.perf_counter()
+        settlement_time[risk_id] = settled_at - start
+        settlement_latency[risk_id] = settled_at - responded_at[risk_id]
+
+    stats.stop(PHASE_SETTLEMENT)
+
+    report = stats.report()
+    report['settlement_time'] = settlement_time
+    report['settlement_latency'] = settlement_latency
+    _print_report(report)
+
+    return report
+
+
+class LoadStats(object):
+
+    def __init__(self):
+        self.gas = {}
+        self.transactions = {}
+        self.started_at = {}
+        self.duration = {}
+
+    def start(self, phase):
+        self.started_at[phase] = time.perf_counter()
+
+    def stop(self, phase):
+        self.duration[phase] = time.perf_counter() - self.started_at[phase]
+
+    def add(self, phase, operation, tx):
+        self.gas.setdefault(operation, []).append(tx.gas_used)
+        self.transactions[phase] = self.transactions.get(phase, 0) + 1
+
+    def report(self) -> dict:
+        throughput = {}
+        for phase, duration in self.duration.items():
+            throughput[phase] = self.transactions.get(phase, 0) / duration if duration > 0 else 0
+
+        gas = {}
+        for operation, values in self.gas.items():
+            values = sorted(values)
+            gas[operation] = {
+                'count': len(values),
+                'p50': _percentile(values, 50),
+                'p90': _percentile(values, 90),
+                'p99': _percentile(values, 99),
+                'max': values[-1],
+            }
+
+        return {
+            'transactions': dict(self.transactions),
+            'duration': dict(self.duration),
+            'throughput': throughput,
+            'gas': gas,
+        }
+
+
+def _create_insurers(d, insurers) -> list:
+    a = d['accounts']
+    product = d['product']
+
+    insurer_accounts = [a[INSURER]]
+    role = product.INSURER_ROLE()
+
+    for idx in range(insurers - 1):
+        insurer = accounts.add()
+        a[INSTANCE_OPERATOR].transfer(insurer, ACCOUNT_FUNDING)
+        product.grantRole(role, insurer, {'from': a[PRODUCT_OWNER]})
+        insurer_accounts.append(insurer)
+
+    return insurer_accounts
+
+
+def _create_holders(d, holders, policy_specs, stats) -> list:
+    a = d['accounts']
+    token = d['token']
+    treasury = d['instance'].getTreasury()
+    operator = a[INSTANCE_OPERATOR]
+
+    premiums = [0] * holders
+    for p in policy_specs:
+        premiums[p['holder']] += p['premium']
+
+    holder_accounts = []
+    for idx in range(holders):
+        holder = accounts.add()
+        operator.transfer(holder, ACCOUNT_FUNDING)
+
+        if premiums[idx] > 0:
+            stats.add(PHASE_SETUP, 'transfer', token.transfer(holder, premiums[idx], {'from': operator}))
+            stats.add(PHASE_SETUP, 'approve', token.approve(treasury, premiums[idx], {'from': holder}))
+
+        holder_accounts.append(holder)
+
+    return holder_accounts
+
+
+def _respond(d, risk_id, process_id, prec_actual, stats):
+    a = d['accounts']
+    product = d['product']
+    oracle = d['oracle']
+    cl_operator = d['clOperator']
+
+    tx = product.triggerOracle(process_id, "", "", {'from': a[INSURER]})
+    stats.add(PHASE_ORACLE, 'triggerOracle', tx)
+
+    cl_request = tx.events['OracleRequest'][0]
+    risk = product.getRisk(risk_id).dict()
+    data = oracle.encodeFulfillParameters(
+        cl_request['requestId'],
+        risk['placeId'],
+        risk['startDate'],
+        risk['endDate'],
+        prec_actual)
+
+    tx = cl_operator.fulfillOracleRequest2(
+        cl_request['requestId'],
+        cl_request['payment'],
+        cl_request['callbackAddr'],
+        cl_request['callbackFunctionId'],
+        cl_request['cancelExpiration'],
+        data,
+        {'from': a[CHAINLINK_NODE_OPERATOR]})
+    stats.add(PHASE_ORACLE, 'oracleFulfill', tx)
+
+
+def _random_risk(rng, idx) -> dict:
+    start_date = int(time.time()) + rng.randint(100, 1000)
+    return {
+        'placeId': s2b32('{}.load'.format(10000 + idx)),
+        'startDate': start_date,
+        'endDate': start_date + rng.randint(7, 90) * 24 * 3600,
+        'lat': rng.uniform(-35.0, 5.0),
+        'long': rng.uniform(-75.0, -35.0),
+        'trigger': rng.choice([0.05, 0.1, 0.2]),
+        'exit': 1.0,
+        'precHist': round(rng.uniform(1.0, 10.0), 2),
+        'precDays': rng.randint(1, 5),
+    }
+
+
+def _random_policy(rng, risks, holders) -> dict:
+    sum_insured = rng.randint(SUM_INSURED_MIN, SUM_INSURED_MAX)
+    return {
+        'risk': rng.randrange(risks),
+        'holder': rng.randrange(holders),
+        'sumInsured': sum_insured,
+        'premium': int(PREMIUM_RATE * sum_insured),
+    }
+
+
+def _percentile(sorted_values, percentile) -> int:
+    idx = max(0, int(round(percentile / 100 * len(sorted_values))) - 1)
+    return sorted_values[idx]
+
+
+def _print_report(report):
+    print('--- load report ---')
+    for phase, throughput in report['throughput'].items():
+        print('{} txs {} duration {:.2f}s throughput {:.2f} tx/s'.format(
+            phase,
+            report['transactions'].get(phase, 0),
+            report['duration'][phase],
+            throughput))
+
+    print('-----------------------------')
+    print('operation count p50 p90 p99 max')
+    for operation, g in report['gas'].items():
+        print('{} {} {} {} {} {}'.format(
+            operation, g['count'], g['p50'], g['p90'], g['p99'], g['max']))
+
+    settlement_time = sorted(report['settlement_time'].values())
+    if len(settlement_time) > 0:
+        print('-----------------------------')
+        print('risks settled {} settlement time p50 {:.2f}s max {:.2f}s'.format(
+            len(settlement_time),
+            settlement_time[len(settlement_time) // 2],
+            settlement_time[-1]))
+
+        settlement_latency = sorted(report['settlement_latency'].values())
+        print('settlement latency after oracle response p50 {:.2f}s max {:.2f}s'.format(
+            settlement_latency[len(settlement_latency) // 2],
+            settlement_latency[-1]))
+
+    print('=============================')
+
+
+def main():
+    d = deploy_load_setup()
+    generate_load(d)
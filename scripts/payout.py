@@ -0,0 +1,84 @@
+import numpy as np
+
+# vectorized off-chain versions of RainProduct.calculatePayoutPercentage and
+# RainProduct.calculatePayout. all arithmetic is done on unsigned integers with
+# the truncating division of the contract, results are bit-for-bit identical
+# to the contract for precipitation values below PRECIPITATION_MAX.
+# from scripts.payout import calculate_payout_percentage, calculate_payout
+
+# constants as defined in RainProduct
+PERCENTAGE_MULTIPLIER = 2**24
+PRECIPITATION_MULTIPLIER = 100
+PRECIPITATION_MAX = 10000
+
+# trigger/exit are fractions of PERCENTAGE_MULTIPLIER, sum insured amounts are token amounts
+DTYPE = np.uint64
+
+
+def calculate_payout_percentage(
+    trigger,
+    exit,
+    prec_hist,
+    prec_days,
+    prec_actual,
+    prec_days_actual
+) -> np.ndarray:
+    trigger = np.asarray(trigger, dtype=DTYPE)
+    exit = np.asarray(exit, dtype=DTYPE)
+    prec_hist = np.asarray(prec_hist, dtype=DTYPE)
+    prec_days = np.asarray(prec_days, dtype=DTYPE)
+    prec_actual = np.asarray(prec_actual, dtype=DTYPE)
+    prec_days_actual = np.asarray(prec_days_actual, dtype=DTYPE)
+
+    # the contract returns 0 before dividing in the cases below
+    # all divisions are done on masked values to keep numpy from dividing by zero
+    pays = (prec_days_actual >= prec_days) & (prec_actual > prec_hist)
+
+    _validate(trigger, prec_hist, prec_actual, pays)
+
+    hist = np.where(pays, prec_hist, 1)
+    extra = np.zeros(np.broadcast(hist, prec_actual).shape, dtype=DTYPE)
+    np.floor_divide(
+        DTYPE(PERCENTAGE_MULTIPLIER) * (prec_actual - np.minimum(prec_actual, prec_hist)),
+        hist,
+        out=extra)
+
+    pays &= extra > trigger
+
+    # the contract reverts with a division by zero for these inputs
+    if np.any(pays & (exit == 0)):
+        raise ValueError('ERROR division by zero for exit == 0')
+
+    # min(M, M * extra / exit) == M * min(extra, exit) / exit for exit > 0,
+    # capping extra keeps the product below 2**64
+    exit_safe = np.maximum(exit, 1)
+    percentage = DTYPE(PERCENTAGE_MULTIPLIER) * np.minimum(extra, exit_safe) // exit_safe
+
+    return np.where(pays, percentage, DTYPE(0))
+
+
+def calculate_payout(payout_percentage, sum_insured_amount) -> np.ndarray:
+    payout_percentage = np.asarray(payout_percentage, dtype=DTYPE)
+    sum_insured_amount = np.asarray(sum_insured_amount, dtype=DTYPE)
+
+    if np.any(payout_percentage > PERCENTAGE_MULTIPLIER):
+        raise ValueError('ERROR payout percentage larger than PERCENTAGE_MULTIPLIER')
+
+    # percentage * amount / M without the 2**64 overflow of percentage * amount:
+    # with amount = q * M + r the product q * M * percentage is divisible by M
+    q = sum_insured_amount >> DTYPE(24)
+    r = sum_insured_amount & DTYPE(PERCENTAGE_MULTIPLIER - 1)
+
+    return payout_percentage * q + ((payout_percentage * r) >> DTYPE(24))
+
+
+def _validate(trigger, prec_hist, prec_actual, pays):
+    if np.any(prec_actual >= PRECIPITATION_MAX):
+        raise ValueError('ERROR precipitation value not below PRECIPITATION_MAX')
+
+    if np.any(trigger > PERCENTAGE_MULTIPLIER):
+        raise ValueError('ERROR trigger larger than PERCENTAGE_MULTIPLIER')
+
+    # the contract reverts with a division by zero for these inputs
+    if np.any(pays & (prec_hist == 0)):
+        raise ValueError('ERROR division by zero for precHist == 0')
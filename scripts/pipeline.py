@@ -0,0 +1,281 @@
+import time
+
+from brownie import network, web3
+from brownie.network.transaction import Status
+
+# spreads transactions over several signers (eg INSURER_ROLE accounts)
+# from scripts.pipeline import TxPipeline
+# pipeline = TxPipeline([insurer, insurer2, insurer3])
+# pending = [pipeline.submit(product.applyForPolicy, holder, premium, sumInsured, riskId) for ...]
+# receipts = pipeline.flush()
+
+# max unconfirmed transactions per signer
+MAX_PENDING_DEFAULT = 16
+
+# seconds without confirmation until a transaction is resubmitted with a higher gas price
+STUCK_TIMEOUT = 60.0
+
+# gas price increment of a resubmission, nodes require at least +10%
+REPLACE_INCREMENT = 1.125
+GAS_PRICE_MULTIPLIER = 1.1
+
+POLL_INTERVAL = 0.05
+
+# node error messages for a nonce already used
+NONCE_ERRORS = ['nonce too low', 'correct nonce', 'already known', 'replacement transaction underpriced']
+
+# brownie error messages for replacing a transaction mined in the meantime
+MINED_ERRORS = ['already confirmed', 'already mined']
+
+
+class NonceTracker(object):
+    """Next nonce per signer address. Nonces are only consumed for transactions
+    accepted by the node, the tracker is resynced from the pending transaction
+    count of the node after a failed submission.
+    """
+
+    def __init__(self):
+        self._nonces = {}
+
+    def peek(self, address) -> int:
+        if address not in self._nonces:
+            self.sync(address)
+
+        return self._nonces[address]
+
+    def advance(self, address):
+        self._nonces[address] += 1
+
+    def sync(self, address):
+        self._nonces[address] = web3.eth.get_transaction_count(address, 'pending')
+
+
+class GasPricer(object):
+    """Gas price for new transactions, reread from the node at most once per block.
+    A positive gas price configured for the active brownie network (eg 1 wei
+    for the local ganache chain) is used as is.
+    """
+
+    def __init__(self, multiplier=GAS_PRICE_MULTIPLIER, max_gas_price=None):
+        self.multiplier = multiplier
+        self.max_gas_price = max_gas_price
+        self._block = None
+        self._gas_price = None
+
+    def gas_price(self) -> int:
+        # 'auto' and unset are configured as False (bool is an int subclass)
+        configured = network.gas_price()
+        if isinstance(configured, int) and not isinstance(configured, bool) and configured > 0:
+            return configured
+
+        block = web3.eth.block_number
+        if block != self._block:
+            self._block = block
+            self._gas_price = int(web3.eth.gas_price * self.multiplier)
+
+        return self.cap(self._gas_price)
+
+    def cap(self, gas_price) -> int:
+        if self.max_gas_price is None:
+            return gas_price
+
+        return min(gas_price, self.max_gas_price)
+
+
+class PendingTransaction(object):
+    """A transaction for a fixed signer and nonce. Resubmissions with a higher
+    gas price keep the nonce, whichever of the submitted transactions is mined
+    becomes the receipt.
+    """
+
+    def __init__(self, signer, nonce, method, args, tx, gas_price):
+        self.signer = signer
+        self.nonce = nonce
+        self.method = method
+        self.args = args
+        self.gas_price = gas_price
+        self.submitted_at = time.time()
+        self.txs = [tx]
+        self.receipt = None
+
+    def confirmed(self) -> bool:
+        if self.receipt is not None:
+            return True
+
+        for tx in self.txs:
+            if tx.status in [Status.Confirmed, Status.Reverted]:
+                self.receipt = tx
+                return True
+
+        return False
+
+    def stuck(self, timeout) -> bool:
+        return self.receipt is None and time.time() - self.submitted_at > timeout
+
+
+class TxPipeline(object):
+    """Submits contract transactions round robin over several signers without
+    waiting for the previous transaction. Each signer has at most max_pending
+    unconfirmed transactions and a local nonce, transactions that stay
+    unconfirmed for stuck_timeout seconds are resubmitted with the same nonce
+    and a higher gas price. Confirmation is tracked per (signer, nonce), the
+    order in which the node mines the transactions of different signers
+    does not matter.
+    """
+
+    def __init__(
+        self,
+        signers,
+        max_pending=MAX_PENDING_DEFAULT,
+        stuck_timeout=STUCK_TIMEOUT,
+        replace_increment=REPLACE_INCREMENT,
+        max_gas_price=None,
+    ):
+        self.signers = list(signers)
+        self.max_pending = max_pending
+        self.stuck_timeout = stuck_timeout
+        self.replace_increment = replace_increment
+
+        self.nonces = NonceTracker()
+        self.gas_pricer = GasPricer(max_gas_price=max_gas_price)
+
+        self.submitted = 0
+        self.resubmitted = 0
+        self.failed = 0
+
+        self._next_signer = 0
+        self._pending = {str(signer): [] for signer in self.signers}
+        self._submitted = []
+
+    def submit(self, method, *args, signer=None) -> PendingTransaction:
+        """Sends method(*args) from the given signer or the next signer with
+        capacity. Raises the brownie exception for transactions that fail
+        before being broadcast (eg a revert found by the gas estimation).
+        """
+        if signer is None:
+            signer = self._select_signer()
+
+        address = str(signer)
+        self._wait_for_capacity(address)
+
+        gas_price = self.gas_pricer.gas_price()
+        tx = self._send(signer, method, args, gas_price)
+
+        pending = PendingTransaction(signer, tx.nonce, method, args, tx, gas_price)
+        self._pending[address].append(pending)
+        self._submitted.append(pending)
+        self.submitted += 1
+
+        return pending
+
+    def wait(self, pending: PendingTransaction):
+        """Returns the receipt of the mined transaction (confirmed or reverted)."""
+        while not self.poll(pending):
+            time.sleep(POLL_INTERVAL)
+
+        return pending.receipt
+
+    def flush(self) -> list:
+        """Waits for all submitted transactions, receipts are returned in submission order."""
+        receipts = [self.wait(pending) for pending in self._submitted]
+        self._submitted = []
+
+        return receipts
+
+    def poll(self, pending: PendingTransaction) -> bool:
+        if pending.confirmed():
+            self._release(pending)
+            return True
+
+        if pending.stuck(self.stuck_timeout):
+            self._resubmit(pending)
+
+        return False
+
+    def pending_count(self) -> int:
+        return sum([len(pending) for pending in self._pending.values()])
+
+    def _select_signer(self):
+        # round robin, prefer signers with free capacity
+        for offset in range(len(self.signers)):
+            signer = self.signers[(self._next_signer + offset) % len(self.signers)]
+            if len(self._pending[str(signer)]) < self.max_pending:
+                self._next_signer = (self._next_signer + offset + 1) % len(self.signers)
+                return signer
+
+        signer = self.signers[self._next_signer]
+        self._next_signer = (self._next_signer + 1) % len(self.signers)
+        return signer
+
+    def _wait_for_capacity(self, address):
+        pending = self._pending[address]
+        while len(pending) >= self.max_pending:
+            self.wait(pending[0])
+
+    def _send(self, signer, method, args, gas_price):
+        address = str(signer)
+
+        for attempt in range(2):
+            nonce = self.nonces.peek(address)
+
+            try:
+                tx = method(*args, {
+                    'from': signer,
+                    'nonce': nonce,
+                    'gas_price': gas_price,
+                    'required_confs': 0})
+
+                self.nonces.advance(address)
+                return tx
+
+            except Exception as e:
+                # nonce taken by a transaction sent outside of the pipeline
+                self.nonces.sync(address)
+
+                if attempt > 0 or not _is_nonce_error(e):
+                    self.failed += 1
+                    raise
+
+    def _resubmit(self, pending: PendingTransaction):
+        # mined since the transaction was found to be stuck
+        if pending.confirmed():
+            return
+
+        gas_price = self.gas_pricer.cap(max(
+            int(pending.gas_price * self.replace_increment),
+            self.gas_pricer.gas_price()))
+
+        if gas_price <= pending.gas_price:
+            # gas price at max_gas_price, keep waiting
+            pending.submitted_at = time.time()
+            return
+
+        try:
+            tx = pending.txs[-1].replace(gas_price=gas_price)
+        except Exception as e:
+            # mined in the meantime
+            if _is_nonce_error(e) or _is_mined_error(e):
+                pending.submitted_at = time.time()
+                return
+
+            raise
+
+        pending.txs.append(tx)
+        pending.gas_price = gas_price
+        pending.submitted_at = time.time()
+        self.resubmitted += 1
+
+    def _release(self, pending: PendingTransaction):
+        signer_pending = self._pending[str(pending.signer)]
+        if pending in signer_pending:
+            signer_pending.remove(pending)
+
+
+def _is_nonce_error(e) -> bool:
+    message = str(e).lower()
+    return any([error in message for error in NONCE_ERRORS])
+
+
+def _is_mined_error(e) -> bool:
+    message = str(e).lower()
+    return any([error in message for error in MINED_ERRORS])
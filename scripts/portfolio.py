@@ -0,0 +1,98 @@
+from brownie import web3
+
+from scripts.const import BUNDLE_NAME
+from scripts.instance import GifInstance, get_registry_cache
+from scripts.solvency import BUNDLE_UNKNOWN, Portfolio, create_portfolio
+from scripts.util import batch_call
+
+# IBundle.LogBundlePolicyCollateralized(uint256 bundleId, bytes32 processId, uint256 amount, uint256 capacityAmount)
+LOG_BUNDLE_POLICY_COLLATERALIZED = 'LogBundlePolicyCollateralized(uint256,bytes32,uint256,uint256)'
+
+
+def read_portfolio(
+    instance: GifInstance,
+    product,
+    riskpool,
+    from_block=0
+) -> Portfolio:
+    """Reads the active policies per risk (policies not yet processed), the risk
+    parameters and the active bundles of the riskpool. The bundle of a policy is
+    taken from the bundle controller collateralization events.
+    """
+    instance_service = instance.getInstanceService()
+
+    risk_ids = batch_call([
+        (product.getRiskId['uint256'], [idx]) for idx in range(product.risks())])
+
+    risks = batch_call([
+        (product.getRisk, [risk_id]) for risk_id in risk_ids])
+
+    policy_counts = batch_call([
+        (product.policies, [risk_id]) for risk_id in risk_ids])
+
+    policy_risks = []
+    calls = []
+    for risk_id, policy_count in zip(risk_ids, policy_counts):
+        for idx in range(policy_count):
+            policy_risks.append(risk_id)
+            calls.append((product.getPolicyId, [risk_id, idx]))
+
+    policy_ids = batch_call(calls)
+    applications = batch_call([
+        (instance_service.getApplication, [policy_id]) for policy_id in policy_ids])
+
+    bundle_ids = batch_call([
+        (riskpool.getActiveBundleId, [idx]) for idx in range(riskpool.activeBundles())])
+
+    bundles = batch_call([
+        (instance_service.getBundle, [bundle_id]) for bundle_id in bundle_ids])
+
+    policy_bundles = read_policy_bundles(instance, from_block)
+
+    return create_portfolio(
+        risks=[{
+            'id': risk_id,
+            'placeId': risk['placeId'],
+            'trigger': risk['trigger'],
+            'exit': risk['exit'],
+            'precHist': risk['precHist'],
+            'precDays': risk['precDays'],
+        } for risk_id, risk in zip(risk_ids, risks)],
+        policies=[(
+            risk_id,
+            policy_bundles.get(_to_hex(policy_id), BUNDLE_UNKNOWN),
+            application['sumInsuredAmount'],
+        ) for risk_id, policy_id, application in zip(policy_risks, policy_ids, applications)],
+        bundles=[{
+            'id': bundle['id'],
+            'capital': bundle['capital'],
+            'lockedCapital': bundle['lockedCapital'],
+            'balance': bundle['balance'],
+        } for bundle in bundles])
+
+
+def read_policy_bundles(instance: GifInstance, from_block=0) -> dict:
+    """Returns a dict processId (hex) -> bundleId for all collateralized policies."""
+    bundle_controller = get_registry_cache().resolve(instance.getRegistry(), [BUNDLE_NAME])[BUNDLE_NAME]
+
+    logs = web3.eth.get_logs({
+        'address': bundle_controller,
+        'fromBlock': from_block,
+        'toBlock': 'latest',
+        'topics': [web3.keccak(text=LOG_BUNDLE_POLICY_COLLATERALIZED).hex()]})
+
+    policy_bundles = {}
+    for log in logs:
+        data = bytes(log['data']) if not isinstance(log['data'], str) else bytes.fromhex(log['data'][2:])
+        bundle_id = int.from_bytes(data[0:32], 'big')
+        process_id = '0x' + data[32:64].hex()
+        policy_bundles[process_id] = bundle_id
+
+    return policy_bundles
+
+
+def _to_hex(process_id) -> str:
+    if isinstance(process_id, str):
+        return process_id.lower()
+
+    return '0x' + bytes(process_id).hex()
@@ -18,6 +18,13 @@ from scripts.util import (
 
 from scripts.instance import GifInstance
 
+from scripts.profiler import (
+    PHASE_ORACLE,
+    PHASE_RISKPOOL,
+    PHASE_PRODUCT,
+    profile_phase,
+)
+
 # product contract names
 NAME_DEFAULT = 'Protection'
 
@@ -406,41 +413,44 @@ class GifProductComplete(object):
         self.token = erc20Token
         baseName = '{}_{}'.format(name, str(int(time.time()))) # FIXME
 
-        self.oracle = GifOracle(
+        with profile_phase(PHASE_ORACLE):
+            self.oracle = GifOracle(
+                    instance,
+                    oracleContractClass,
+                    oracleProvider, 
+                    # TODO analyze how to set a separate chainlink operator node account
+                    chainlinkNodeOperator,
+                    '{}_Oracle'.format(baseName),
+                    publish_source,
+                    chainLinkTokenAddress,
+                    chainLinkOracleAddress,
+                    chainLinkJobId,
+                    chainLinkPaymentAmount,
+                    oracleAddress)
+
+        with profile_phase(PHASE_RISKPOOL):
+            self.riskpool = GifRiskpool(
+                instance, 
+                riskpoolContractClass,
+                riskpoolKeeper, 
+                '{}_Riskpool'.format(baseName),
+                erc20Token, 
+                riskpoolWallet, 
+                investor, 
+                instanceService.getFullCollateralizationLevel(),
+                publish_source)
+
+        with profile_phase(PHASE_PRODUCT):
+            self.product = GifProduct(
                 instance,
-                oracleContractClass,
-                oracleProvider, 
-                # TODO analyze how to set a separate chainlink operator node account
-                chainlinkNodeOperator,
-                '{}_Oracle'.format(baseName),
-                publish_source,
-                chainLinkTokenAddress,
-                chainLinkOracleAddress,
-                chainLinkJobId,
-                chainLinkPaymentAmount,
-                oracleAddress)
-
-        self.riskpool = GifRiskpool(
-            instance, 
-            riskpoolContractClass,
-            riskpoolKeeper, 
-            '{}_Riskpool'.format(baseName),
-            erc20Token, 
-            riskpoolWallet, 
-            investor, 
-            instanceService.getFullCollateralizationLevel(),
-            publish_source)
-
-        self.product = GifProduct(
-            instance,
-            productContractClass,
-            productOwner, 
-            insurer, 
-            '{}_Product'.format(baseName),
-            erc20Token, 
-            self.oracle,
-            self.riskpool,
-            publish_source)
+                productContractClass,
+                productOwner, 
+                insurer, 
+                '{}_Product'.format(baseName),
+                erc20Token, 
+                self.oracle,
+                self.riskpool,
+                publish_source)
 
     def getToken(self):
         return self.token
@@ -0,0 +1,199 @@
+import inspect
+import json
+import os
+import time
+
+from contextlib import contextmanager
+
+from brownie.network.account import _PrivateKeyAccount
+
+# phases used by the deploy and setup scripts
+PHASE_INSTANCE = 'instance'
+PHASE_ORACLE = 'oracle'
+PHASE_RISKPOOL = 'riskpool'
+PHASE_PRODUCT = 'product'
+PHASE_BUNDLE = 'bundle'
+PHASE_RISK = 'risk'
+PHASE_POLICY = 'policy'
+PHASE_NONE = '-'
+
+# profiling records are written as json lines to this file by default
+PROFILE_FILE_DEFAULT = 'tx_profile.jsonl'
+
+_active_profiler = None
+
+
+class TxProfiler(object):
+    """Records gas usage, calldata size, confirmation latency and the calling
+    script function for every transaction and deployment sent from a brownie
+    account while the profiler is active.
+    """
+
+    def __init__(self, file_name=PROFILE_FILE_DEFAULT):
+        self.file_name = file_name
+        self.records = []
+        self.phases = [PHASE_NONE]
+        self._transfer = None
+        self._deploy = None
+
+    def start(self):
+        global _active_profiler
+
+        if _active_profiler is not None:
+            raise RuntimeError('ERROR a transaction profiler is already active')
+
+        self._transfer = _PrivateKeyAccount.transfer
+        self._deploy = _PrivateKeyAccount.deploy
+
+        profiler = self
+        transfer = self._transfer
+        deploy = self._deploy
+
+        def profiled_transfer(account, *args, **kwargs):
+            start = time.perf_counter()
+            tx = transfer(account, *args, **kwargs)
+            profiler._record(tx, time.perf_counter() - start)
+            return tx
+
+        def profiled_deploy(account, *args, **kwargs):
+            start = time.perf_counter()
+            contract = deploy(account, *args, **kwargs)
+            profiler._record(getattr(contract, 'tx', contract), time.perf_counter() - start)
+            return contract
+
+        _PrivateKeyAccount.transfer = profiled_transfer
+        _PrivateKeyAccount.deploy = profiled_deploy
+        _active_profiler = self
+
+        if os.path.exists(self.file_name):
+            os.remove(self.file_name)
+
+    def stop(self):
+        global _active_profiler
+
+        _PrivateKeyAccount.transfer = self._transfer
+        _PrivateKeyAccount.deploy = self._deploy
+        _active_profiler = None
+
+    def push_phase(self, phase):
+        self.phases.append(phase)
+
+    def pop_phase(self):
+        self.phases.pop()
+
+    def summary(self) -> dict:
+        summary = {}
+
+        for record in self.records:
+            phase = record['phase']
+            if phase not in summary:
+                summary[phase] = {
+                    'transactions': 0,
+                    'gas_used': 0,
+                    'calldata_size': 0,
+                    'latency': 0.0,
+                    'max_gas_used': 0,
+                    'max_gas_function': None,
+                }
+
+            s = summary[phase]
+            s['transactions'] += 1
+            s['gas_used'] += record['gas_used']
+            s['calldata_size'] += record['calldata_size']
+            s['latency'] += record['latency']
+
+            if record['gas_used'] > s['max_gas_used']:
+                s['max_gas_used'] = record['gas_used']
+                s['max_gas_function'] = '{}.{}'.format(record['contract'], record['function'])
+
+        return summary
+
+    def print_summary(self):
+        summary = self.summary()
+
+        print('--- transaction profile ({}) ---'.format(self.file_name))
+        print('phase txs gas calldata[bytes] latency[s] max_gas max_gas_function')
+
+        total_gas = 0
+        total_latency = 0.0
+        for phase, s in summary.items():
+            total_gas += s['gas_used']
+            total_latency += s['latency']
+
+            print('{} {} {} {} {:.2f} {} {}'.format(
+                phase,
+                s['transactions'],
+                s['gas_used'],
+                s['calldata_size'],
+                s['latency'],
+                s['max_gas_used'],
+                s['max_gas_function']))
+
+        print('-----------------------------')
+        print('total txs {} gas {} latency {:.2f}s'.format(
+            len(self.records),
+            total_gas,
+            total_latency))
+        print('=============================')
+
+    def _record(self, tx, latency):
+        record = {
+            'phase': self.phases[-1],
+            'tx_hash': tx.txid,
+            'block_number': tx.block_number,
+            'status': int(tx.status),
+            'contract': tx.contract_name,
+            'function': tx.fn_name or ('constructor' if tx.contract_address else 'transfer'),
+            'sender': str(tx.sender),
+            'gas_used': tx.gas_used,
+            'gas_price': tx.gas_price,
+            'calldata_size': (len(tx.input) - 2) // 2,
+            'latency': latency,
+            'caller': _get_caller(),
+        }
+
+        self.records.append(record)
+
+        with open(self.file_name, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+
+
+@contextmanager
+def profile_transactions(file_name=PROFILE_FILE_DEFAULT):
+    profiler = TxProfiler(file_name)
+    profiler.start()
+
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+
+
+@contextmanager
+def profile_phase(phase):
+    profiler = _active_profiler
+
+    if profiler is None:
+        yield
+        return
+
+    profiler.push_phase(phase)
+
+    try:
+        yield
+    finally:
+        profiler.pop_phase()
+
+
+def _get_caller() -> str:
+    # first frame outside of this module and outside of brownie
+    for frame_info in inspect.stack()[2:]:
+        module = inspect.getmodule(frame_info.frame)
+        module_name = module.__name__ if module else ''
+
+        if module_name == __name__ or module_name.startswith('brownie'):
+            continue
+
+        return '{}.{}'.format(module_name, frame_info.function)
+
+    return None
@@ -0,0 +1,279 @@
+from dataclasses import dataclass
+
+from brownie import interface, network, web3
+
+from scripts.util import batch_call, contract_from_address
+
+# memoized contract reads for the deploy and inspection scripts.
+# immutable values (token decimals and symbol, product multipliers, bundle token)
+# are read once per network and contract. mutable values (risks, applications,
+# policies, bundles) are read once per block, each accessor reads all its values
+# at the latest block.
+# from scripts.readmodel import get_read_model
+# rm = get_read_model()
+# (multiplier, coordMultiplier, precMultiplier) = rm.multipliers(product)
+# risks = rm.risks(product)
+
+# enum ApplicationState {Applied, Revoked, Underwritten, Declined}
+APPLICATION_STATE_UNDERWRITTEN = 2
+
+
+@dataclass
+class Risk:
+    __slots__ = (
+        'id', 'place_id', 'start_date', 'end_date', 'lat', 'long', 'trigger', 'exit', 'prec_hist', 'prec_days',
+        'request_triggered', 'response_at', 'prec_actual', 'prec_days_actual', 'payout_percentage')
+
+    id: str
+    place_id: str
+    start_date: int
+    end_date: int
+    lat: int
+    long: int
+    trigger: int
+    exit: int
+    prec_hist: int
+    prec_days: int
+    request_triggered: bool
+    response_at: int
+    prec_actual: int
+    prec_days_actual: int
+    payout_percentage: int
+
+
+@dataclass
+class Policy:
+    """Application or policy (kind) of a product, state is the application state
+    for applications and the policy state for policies.
+    """
+    __slots__ = (
+        'process_id', 'owner', 'product_id', 'risk_id', 'kind', 'state',
+        'premium', 'sum_insured', 'premium_paid', 'payout_amount')
+
+    process_id: str
+    owner: str
+    product_id: int
+    risk_id: str
+    kind: str
+    state: int
+    premium: int
+    sum_insured: int
+    premium_paid: int
+    payout_amount: int
+
+
+@dataclass
+class Bundle:
+    __slots__ = ('idx', 'id', 'owner', 'riskpool_id', 'token_id', 'state', 'capital', 'locked_capital', 'balance')
+
+    idx: int
+    id: int
+    owner: str
+    riskpool_id: int
+    token_id: int
+    state: int
+    capital: int
+    locked_capital: int
+    balance: int
+
+    @property
+    def capacity(self) -> int:
+        return self.capital - self.locked_capital
+
+
+class ReadModel(object):
+
+    def __init__(self):
+        self._immutable = {}
+        self._mutable = {}
+        self._block_number = None
+        self._block_hash = None
+
+    def sync(self) -> int:
+        """Pins mutable reads to the latest block, cached values of older blocks are dropped.
+        The block hash is compared as well, local chains reuse block numbers after a revert.
+        """
+        block = web3.eth.get_block('latest')
+
+        if block['number'] != self._block_number or block['hash'] != self._block_hash:
+            self._block_number = block['number']
+            self._block_hash = block['hash']
+            self._mutable = {}
+
+        return self._block_number
+
+    def invalidate(self):
+        self._immutable = {}
+        self._mutable = {}
+        self._block_number = None
+        self._block_hash = None
+
+    def immutable(self, calls) -> list:
+        """Memoized batch_call for values that never change for a deployed contract."""
+        return self._memoized(self._immutable, calls, 'latest')
+
+    def mutable(self, calls) -> list:
+        """Memoized batch_call for values read at the block of the last sync()."""
+        if self._block_number is None:
+            self.sync()
+
+        return self._memoized(self._mutable, calls, self._block_number)
+
+    def token_decimals(self, token) -> int:
+        return self.immutable([(token.decimals, [])])[0]
+
+    def token_symbol(self, token) -> str:
+        return self.immutable([(token.symbol, [])])[0]
+
+    def multipliers(self, product) -> tuple:
+        """Returns (percentage, coordinates, precipitation) multipliers of the product."""
+        return tuple(self.immutable([
+            (product.getPercentageMultiplier, []),
+            (product.getCoordinatesMultiplier, []),
+            (product.getPrecipitationMultiplier, []),
+        ]))
+
+    def risks(self, product) -> list:
+        self.sync()
+        (risk_count,) = self.mutable([(product.risks, [])])
+        risk_ids = self.mutable([(product.getRiskId['uint256'], [idx]) for idx in range(risk_count)])
+        risks = self.mutable([(product.getRisk, [risk_id]) for risk_id in risk_ids])
+        return [_to_risk(risk) for risk in risks]
+
+    def risk(self, product, risk_id) -> Risk:
+        self.sync()
+        (risk,) = self.mutable([(product.getRisk, [risk_id])])
+        return _to_risk(risk)
+
+    def applications(self, instance_service, product) -> list:
+        """Applications and policies created via product.applyForPolicy."""
+        self.sync()
+        (application_count,) = self.mutable([(product.applications, [])])
+        process_ids = self.mutable([(product.getApplicationId, [idx]) for idx in range(application_count)])
+        return self._policies(instance_service, process_ids)
+
+    def policies(self, instance_service, process_ids) -> list:
+        self.sync()
+        return self._policies(instance_service, process_ids)
+
+    def bundles(self, instance_service, riskpool) -> list:
+        """Active bundles of the riskpool."""
+        (bundle_token_address,) = self.immutable([(instance_service.getBundleToken, [])])
+        bundle_token = contract_from_address(interface.IERC721, bundle_token_address)
+
+        self.sync()
+        (active_bundles,) = self.mutable([(riskpool.activeBundles, [])])
+        bundle_ids = self.mutable([(riskpool.getActiveBundleId, [idx]) for idx in range(active_bundles)])
+        bundles = self.mutable([(instance_service.getBundle, [bundle_id]) for bundle_id in bundle_ids])
+        owners = self.mutable([(bundle_token.ownerOf, [bundle['tokenId']]) for bundle in bundles])
+
+        return [
+            Bundle(
+                idx=idx,
+                id=bundle_id,
+                owner=owner,
+                riskpool_id=bundle['riskpoolId'],
+                token_id=bundle['tokenId'],
+                state=bundle['state'],
+                capital=bundle['capital'],
+                locked_capital=bundle['lockedCapital'],
+                balance=bundle['balance'])
+            for idx, (bundle_id, bundle, owner) in enumerate(zip(bundle_ids, bundles, owners))]
+
+    def _policies(self, instance_service, process_ids) -> list:
+        metadata = self.mutable([(instance_service.getMetadata, [process_id]) for process_id in process_ids])
+        applications = self.mutable([(instance_service.getApplication, [process_id]) for process_id in process_ids])
+
+        underwritten = [
+            process_id for process_id, application in zip(process_ids, applications)
+            if application['state'] == APPLICATION_STATE_UNDERWRITTEN]
+
+        policies = dict(zip(
+            underwritten,
+            self.mutable([(instance_service.getPolicy, [process_id]) for process_id in underwritten])))
+
+        result = []
+        for process_id, meta, application in zip(process_ids, metadata, applications):
+            policy = policies.get(process_id)
+
+            result.append(Policy(
+                process_id=process_id,
+                owner=meta['owner'],
+                product_id=meta['productId'],
+                risk_id='0x' + bytes(application['data'])[:32].hex(),
+                kind='policy' if policy is not None else 'application',
+                state=policy['state'] if policy is not None else application['state'],
+                premium=application['premiumAmount'],
+                sum_insured=application['sumInsuredAmount'],
+                premium_paid=policy['premiumPaidAmount'] if policy is not None else 0,
+                payout_amount=policy['payoutAmount'] if policy is not None else 0))
+
+        return result
+
+    def _memoized(self, cache, calls, block_identifier) -> list:
+        keys = [_key(method, args) for (method, args) in calls]
+        missing = [(key, call) for key, call in zip(keys, calls) if key not in cache]
+
+        # all values missing in the cache are read with a single batched rpc
+        if len(missing) > 0:
+            values = batch_call([call for (_, call) in missing], block_identifier=block_identifier)
+
+            for (key, _), value in zip(missing, values):
+                cache[key] = value
+
+        return [cache[key] for key in keys]
+
+
+def _to_risk(risk) -> Risk:
+    return Risk(
+        id=risk['id'],
+        place_id=risk['placeId'],
+        start_date=risk['startDate'],
+        end_date=risk['endDate'],
+        lat=risk['lat'],
+        long=risk['long'],
+        trigger=risk['trigger'],
+        exit=risk['exit'],
+        prec_hist=risk['precHist'],
+        prec_days=risk['precDays'],
+        request_triggered=risk['requestTriggered'],
+        response_at=risk['responseAt'],
+        prec_actual=risk['precActual'],
+        prec_days_actual=risk['precDaysActual'],
+        payout_percentage=risk['payoutPercentage'])
+
+
+def _key(method, args) -> tuple:
+    return (
+        network.show_active(),
+        str(method._address).lower(),
+        method.signature,
+        tuple([_freeze(arg) for arg in args]))
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple([_freeze(element) for element in value])
+
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex()
+
+    if isinstance(value, str):
+        return value.lower()
+
+    return value
+
+
+_read_model = None
+
+def get_read_model() -> ReadModel:
+    global _read_model
+
+    if _read_model is None:
+        _read_model = ReadModel()
+
+    return _read_model
+
+
+def invalidate_read_model():
+    get_read_model().invalidate()
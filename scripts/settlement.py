@@ -0,0 +1,339 @@
+import asyncio
+import statistics
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from brownie import chain
+from brownie.network.transaction import Status
+
+from scripts.pipeline import GasPricer, NonceTracker
+from scripts.util import batch_call
+
+# event driven settlement of rain risks
+# from scripts.settlement import SettlementDaemon
+# daemon = SettlementDaemon(product, oracle, [insurer, insurer2])
+# asyncio.run(daemon.run(metrics_port=9100))
+# see tests/test_rain_settlement.py for a run against the local chain
+
+POLL_INTERVAL = 2.0
+
+# gas bound for a single processPoliciesForRisk transaction
+BATCH_GAS_LIMIT = 8000000
+BATCH_GAS_BASE = 60000
+
+# gas per processed policy until measured from the first batches
+POLICY_GAS_ESTIMATE = 250000
+
+# seconds after the oracle response until policies of a risk in claim mode
+# not claimed by the policy holders are processed, None: never
+CLAIM_GRACE_PERIOD = None
+
+# most recent response to payout latencies the p50 is taken from
+LATENCY_WINDOW = 1024
+
+# product and oracle events the daemon subscribes to
+EVENT_REQUESTED = 'LogRainRiskDataRequested'
+EVENT_RECEIVED = 'LogRainRiskDataReceived'
+EVENT_FULFILL = 'LogRainFulfill'
+EVENT_RESPOND = 'LogRainRespond'
+EVENT_PROCESSED = 'LogRainRiskProcessed'
+
+
+class SettlementMetrics(object):
+
+    def __init__(self):
+        self.requests = 0
+        self.responses = 0
+        self.upkeeps = 0
+        self.batches = 0
+        self.policies = 0
+        self.risks_settled = 0
+        self.claim_mode_risks = 0
+        self.failed_transactions = 0
+        self.response_to_payout_count = 0
+        self.response_to_payout_sum = 0.0
+        self.response_to_payout_max = 0.0
+        self.response_to_payout = deque(maxlen=LATENCY_WINDOW)
+
+    def add_response_to_payout(self, latency):
+        self.response_to_payout_count += 1
+        self.response_to_payout_sum += latency
+        self.response_to_payout_max = max(self.response_to_payout_max, latency)
+        self.response_to_payout.append(latency)
+
+    def as_dict(self, queue_depth, pending_upkeeps) -> dict:
+        return {
+            'queue_depth': queue_depth,
+            'pending_upkeeps': pending_upkeeps,
+            'requests': self.requests,
+            'responses': self.responses,
+            'upkeeps': self.upkeeps,
+            'batches': self.batches,
+            'policies': self.policies,
+            'risks_settled': self.risks_settled,
+            'claim_mode_risks': self.claim_mode_risks,
+            'failed_transactions': self.failed_transactions,
+            'response_to_payout_count': self.response_to_payout_count,
+            'response_to_payout_sum': self.response_to_payout_sum,
+            'response_to_payout_p50': statistics.median(self.response_to_payout) if self.response_to_payout else 0.0,
+            'response_to_payout_max': self.response_to_payout_max,
+        }
+
+
+class SettlementDaemon(object):
+    """Follows the oracle request/response events of the product and its oracle,
+    calls performUpkeep for fulfilled but not yet delivered responses (chainlink
+    functions oracle) and processes all policies of a risk once its oracle response
+    is received. Each insurer key settles one risk at a time, batches are sized to
+    stay below BATCH_GAS_LIMIT using the measured gas per policy.
+
+    Risks in payout claim mode are left to the policy holders, the policies not
+    claimed within claim_grace_period (seconds after the oracle response) are
+    processed afterwards. With claim_grace_period None they are never processed.
+
+    All brownie/web3 calls run on a single worker thread, the event loop itself
+    never blocks on the node.
+    """
+
+    def __init__(
+        self,
+        product,
+        oracle,
+        insurers,
+        poll_interval=POLL_INTERVAL,
+        batch_gas_limit=BATCH_GAS_LIMIT,
+        from_block=None,
+        claim_grace_period=CLAIM_GRACE_PERIOD,
+    ):
+        self.product = product
+        self.oracle = oracle
+        self.insurers = list(insurers)
+        self.poll_interval = poll_interval
+        self.batch_gas_limit = batch_gas_limit
+        self.from_block = from_block
+        self.claim_grace_period = claim_grace_period
+
+        self.metrics = SettlementMetrics()
+        self.policy_gas = POLICY_GAS_ESTIMATE
+
+        self._queue = None
+        self._queued = set()
+        self._received_at = {}
+        self._deferred = {}
+        self._pending_fulfills = set()
+        self._nonces = NonceTracker()
+        self._gas_pricer = GasPricer()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._stopped = False
+
+    async def run(self, metrics_port=None, stop_when_idle=False):
+        """Runs until stop() is called. With stop_when_idle the daemon returns as
+        soon as no risk is queued, no upkeep is pending and no batch is running.
+        """
+        self._queue = asyncio.Queue()
+        self._stopped = False
+
+        server = None
+        if metrics_port is not None:
+            server = await asyncio.start_server(self._serve_metrics, port=metrics_port)
+
+        # nonces are tracked locally per insurer key
+        for insurer in self.insurers:
+            await self._call(self._nonces.sync, str(insurer))
+
+        if self.from_block is None:
+            self.from_block = await self._call(lambda: chain.height)
+            await self._recover()
+
+        workers = [asyncio.create_task(self._settle(insurer)) for insurer in self.insurers]
+
+        try:
+            while not self._stopped:
+                await self.poll()
+
+                if stop_when_idle and self._queue.empty() and len(self._pending_fulfills) == 0 and len(self._deferred) == 0:
+                    await self._queue.join()
+                    break
+
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+            if server is not None:
+                server.close()
+
+    def stop(self):
+        self._stopped = True
+
+    async def poll(self):
+        """Reads the events of all new blocks and schedules upkeeps and settlements."""
+        to_block = await self._call(lambda: chain.height)
+        if to_block < self.from_block:
+            return
+
+        for event in await self._events(self.product, EVENT_REQUESTED, to_block):
+            self.metrics.requests += 1
+
+        for event in await self._events(self.oracle, EVENT_FULFILL, to_block):
+            self._pending_fulfills.add(event.args['requestId'])
+
+        for event in await self._events(self.oracle, EVENT_RESPOND, to_block):
+            self._pending_fulfills.discard(event.args['requestId'])
+
+        for event in await self._events(self.product, EVENT_RECEIVED, to_block):
+            self.metrics.responses += 1
+            # the direct chainlink oracle responds within the fulfill transaction
+            self._pending_fulfills.discard(event.args['requestId'])
+            self._enqueue(event.args['riskId'])
+
+        self.from_block = to_block + 1
+
+        if len(self._pending_fulfills) > 0:
+            await self._upkeep()
+
+        # claim mode risks at the end of their grace period
+        if len(self._deferred) > 0:
+            now = await self._call(chain.time)
+            for risk_id, due_at in list(self._deferred.items()):
+                if now >= due_at:
+                    del self._deferred[risk_id]
+                    self._enqueue(risk_id)
+
+    def get_metrics(self) -> dict:
+        queue_depth = self._queue.qsize() if self._queue is not None else 0
+        return self.metrics.as_dict(queue_depth, len(self._pending_fulfills))
+
+    def batch_size(self) -> int:
+        return max(1, (self.batch_gas_limit - BATCH_GAS_BASE) // self.policy_gas)
+
+    async def _recover(self):
+        # risks with an oracle response and unprocessed policies from before the start
+        risk_ids = await self._call(lambda: batch_call([
+            (self.product.getRiskId['uint256'], [idx]) for idx in range(self.product.risks())]))
+
+        risks = await self._call(lambda: batch_call([
+            (self.product.getRisk, [risk_id]) for risk_id in risk_ids]))
+
+        policies = await self._call(lambda: batch_call([
+            (self.product.policies, [risk_id]) for risk_id in risk_ids]))
+
+        for risk_id, risk, policy_count in zip(risk_ids, risks, policies):
+            if risk['responseAt'] > 0 and policy_count > 0:
+                self._enqueue(risk_id)
+
+    def _enqueue(self, risk_id):
+        if risk_id in self._queued:
+            return
+
+        self._queued.add(risk_id)
+        self._received_at[risk_id] = time.time()
+        self._queue.put_nowait(risk_id)
+
+    async def _settle(self, insurer):
+        while True:
+            risk_id = await self._queue.get()
+
+            try:
+                await self._settle_risk(insurer, risk_id)
+            except Exception as e:
+                print('ERROR settlement of risk {} failed: {}'.format(risk_id, e))
+            finally:
+                self._queued.discard(risk_id)
+                self._queue.task_done()
+
+    async def _settle_risk(self, insurer, risk_id):
+        settlement = await self._call(self.product.getSettlement, risk_id)
+        if settlement['claimMode'] and not await self._claim_period_over(risk_id, settlement['responseAt']):
+            self._received_at.pop(risk_id)
+            return
+
+        while await self._call(self.product.policies, risk_id) > 0:
+            tx = await self._send(insurer, self.product.processPoliciesForRisk, risk_id, self.batch_size())
+
+            processed = await self._call(lambda: tx.events[EVENT_PROCESSED]['policies'])
+            self.metrics.batches += 1
+            self.metrics.policies += processed
+
+            if processed > 0:
+                self.policy_gas = max(1, (tx.gas_used - BATCH_GAS_BASE) // processed)
+
+        # time since the daemon has seen the oracle response
+        self.metrics.risks_settled += 1
+        self.metrics.add_response_to_payout(time.time() - self._received_at.pop(risk_id))
+
+    async def _claim_period_over(self, risk_id, response_at) -> bool:
+        if self.claim_grace_period is not None:
+            due_at = response_at + self.claim_grace_period
+            if await self._call(chain.time) >= due_at:
+                return True
+
+            self._deferred[risk_id] = due_at
+
+        self.metrics.claim_mode_risks += 1
+        return False
+
+    async def _upkeep(self):
+        if 'performUpkeep' not in self.oracle.signatures:
+            return
+
+        (upkeep_needed, _) = await self._call(self.oracle.checkUpkeep, b'')
+        if not upkeep_needed:
+            return
+
+        await self._send(self.insurers[0], self.oracle.performUpkeep, b'')
+        self.metrics.upkeeps += 1
+
+    async def _send(self, account, method, *args):
+        address = str(account)
+        nonce = self._nonces.peek(address)
+        self._nonces.advance(address)
+        gas_price = await self._call(self._gas_pricer.gas_price)
+
+        try:
+            tx = await self._call(method, *args, {
+                'from': account,
+                'nonce': nonce,
+                'gas_price': gas_price,
+                'required_confs': 0})
+        except Exception:
+            # not broadcast, resync the nonce with the node
+            self.metrics.failed_transactions += 1
+            await self._call(self._nonces.sync, address)
+            raise
+
+        # brownie confirms pending transactions on a background thread
+        while tx.status == Status.Pending:
+            await asyncio.sleep(self.poll_interval / 10)
+
+        if tx.status != Status.Confirmed:
+            self.metrics.failed_transactions += 1
+            revert_msg = await self._call(lambda: tx.revert_msg)
+            raise RuntimeError('ERROR transaction {} reverted: {}'.format(tx.txid, revert_msg))
+
+        return tx
+
+    async def _events(self, contract, event_type, to_block) -> list:
+        if event_type not in contract.topics:
+            return []
+
+        return await self._call(contract.events.get_sequence, self.from_block, to_block, event_type)
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args))
+
+    async def _serve_metrics(self, reader, writer):
+        # prometheus text format
+        await reader.readline()
+        lines = ['rain_settlement_{} {}'.format(name, value) for name, value in self.get_metrics().items()]
+        body = '\n'.join(lines) + '\n'
+
+        writer.write('HTTP/1.0 200 OK\r\nContent-Type: text/plain\r\nContent-Length: {}\r\n\r\n{}'.format(
+            len(body), body).encode())
+
+        await writer.drain()
+        writer.close()
+
@@ -1,5 +1,9 @@
+from brownie import chain
 from brownie.network import accounts
-from brownie.network.account import Account
+from brownie.network.account import Account, LocalAccount
+
+from eth_account import Account as EthAccount
+from eth_account.messages import encode_structured_data
 
 from scripts.instance import GifInstance
 
@@ -47,6 +51,50 @@ def fund_customer(
     coin.approve(instance.getTreasury(), amount, {'from': account})
 
 
+def sign_permit(
+    coin,
+    owner: LocalAccount,
+    spender,
+    amount: int,
+    deadline: int
+):
+    # EIP-2612 permit signature (v, r, s) of owner for spender (eg the GIF treasury)
+    permit = {
+        'types': {
+            'EIP712Domain': [
+                {'name': 'name', 'type': 'string'},
+                {'name': 'version', 'type': 'string'},
+                {'name': 'chainId', 'type': 'uint256'},
+                {'name': 'verifyingContract', 'type': 'address'},
+            ],
+            'Permit': [
+                {'name': 'owner', 'type': 'address'},
+                {'name': 'spender', 'type': 'address'},
+                {'name': 'value', 'type': 'uint256'},
+                {'name': 'nonce', 'type': 'uint256'},
+                {'name': 'deadline', 'type': 'uint256'},
+            ],
+        },
+        'primaryType': 'Permit',
+        'domain': {
+            'name': coin.name(),
+            'version': '1',
+            'chainId': chain.id,
+            'verifyingContract': str(coin),
+        },
+        'message': {
+            'owner': str(owner),
+            'spender': str(spender),
+            'value': amount,
+            'nonce': coin.nonces(owner),
+            'deadline': deadline,
+        },
+    }
+
+    signed = EthAccount.sign_message(encode_structured_data(permit), owner.private_key)
+    return (signed.v, signed.r.to_bytes(32, 'big'), signed.s.to_bytes(32, 'big'))
+
+
 def apply_for_policy(
     instance: GifInstance, 
     owner: Account,
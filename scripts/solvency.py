@@ -0,0 +1,297 @@
+import multiprocessing
+import time
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from scripts.payout import (
+    PERCENTAGE_MULTIPLIER,
+    PRECIPITATION_MAX,
+    PRECIPITATION_MULTIPLIER,
+    calculate_payout_percentage,
+    calculate_payout,
+)
+
+# monte carlo simulation of riskpool losses for the active rain portfolio
+# from scripts.portfolio import read_portfolio
+# from scripts.solvency import PlaceDistribution, simulate
+# portfolio = read_portfolio(instance, product, riskpool)
+# distributions = {place_id: PlaceDistribution(shape=2.0, scale=3.0, days_mean=5.0) for place_id in portfolio.places}
+# report = simulate(portfolio, distributions, trials=10**6)
+
+TRIALS_DEFAULT = 10**5
+CHUNK_SIZE_DEFAULT = 10**4
+SEED_DEFAULT = 42
+
+# loss quantiles reported, capital at risk is taken at CAPITAL_AT_RISK_QUANTILE
+LOSS_QUANTILES = [0.5, 0.9, 0.95, 0.99, 0.995]
+CAPITAL_AT_RISK_QUANTILE = 0.995
+
+# policies without a known bundle only count for the riskpool loss
+BUNDLE_UNKNOWN = -1
+
+# policy groups evaluated per step, bounds the (trials x groups) payout matrix of a chunk
+POLICY_GROUP_BLOCK = 512
+
+
+@dataclass
+class PlaceDistribution:
+    """Distribution of the precipitation (mm) and of the number of rainy days for
+    one place. Precipitation is drawn from a gamma distribution unless empirical
+    samples are provided, rainy days are drawn from a poisson distribution.
+    """
+    shape: float = 1.0
+    scale: float = 1.0
+    days_mean: float = 0.0
+    samples: Optional[np.ndarray] = None
+    days_samples: Optional[np.ndarray] = None
+
+
+@dataclass
+class Portfolio:
+    """Active rain portfolio with one entry per risk and per bundle. The sum insured
+    of the policies is aggregated per risk and per (risk, bundle). For the losses
+    policies are grouped by (risk, sum insured) to apply the per policy truncation
+    of calculatePayout. Amounts are in token units.
+    """
+    places: list
+    risk_ids: list
+    risk_place: np.ndarray
+    trigger: np.ndarray
+    exit: np.ndarray
+    prec_hist: np.ndarray
+    prec_days: np.ndarray
+    risk_sum_insured: np.ndarray
+    group_risk: np.ndarray
+    group_sum_insured: np.ndarray
+    group_policies: np.ndarray
+    exposure: np.ndarray
+    bundle_ids: list
+    bundle_capital: np.ndarray
+    bundle_locked_capital: np.ndarray
+    bundle_balance: np.ndarray
+    policies: int = 0
+    riskpool_capital: int = 0
+
+
+@dataclass
+class SolvencyReport:
+    trials: int
+    duration: float
+    sum_insured: int
+    riskpool_capital: int
+    loss_mean: float
+    loss_std: float
+    loss_max: int
+    loss_quantiles: dict
+    capital_at_risk: float
+    expected_shortfall: float
+    ruin_probability: float
+    bundle_exhaustion_probability: dict
+    any_bundle_exhaustion_probability: float
+    losses: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+def create_portfolio(
+    risks,
+    policies,
+    bundles
+) -> Portfolio:
+    """Creates a portfolio from plain python data.
+    risks: list of dicts with keys id, placeId, trigger, exit, precHist, precDays (contract units)
+    policies: list of (riskId, bundleId, sumInsured) tuples, bundleId may be BUNDLE_UNKNOWN
+    bundles: list of dicts with keys id, capital, lockedCapital, balance
+    """
+    places = sorted(set([r['placeId'] for r in risks]))
+    place_idx = {place: idx for idx, place in enumerate(places)}
+    risk_idx = {r['id']: idx for idx, r in enumerate(risks)}
+    bundle_idx = {b['id']: idx for idx, b in enumerate(bundles)}
+
+    # policies of the same risk are simulated together
+    risk_sum_insured = [0] * len(risks)
+    groups = {}
+    exposure = np.zeros((len(risks), len(bundles)), dtype=np.float64)
+    for (risk_id, bundle_id, sum_insured) in policies:
+        risk_sum_insured[risk_idx[risk_id]] += sum_insured
+
+        group = (risk_idx[risk_id], sum_insured)
+        groups[group] = groups.get(group, 0) + 1
+
+        if bundle_id in bundle_idx:
+            exposure[risk_idx[risk_id], bundle_idx[bundle_id]] += sum_insured
+
+    return Portfolio(
+        places=places,
+        risk_ids=[r['id'] for r in risks],
+        risk_place=np.array([place_idx[r['placeId']] for r in risks], dtype=np.int64),
+        trigger=np.array([r['trigger'] for r in risks], dtype=np.uint64),
+        exit=np.array([r['exit'] for r in risks], dtype=np.uint64),
+        prec_hist=np.array([r['precHist'] for r in risks], dtype=np.uint64),
+        prec_days=np.array([r['precDays'] for r in risks], dtype=np.uint64),
+        risk_sum_insured=np.array(risk_sum_insured, dtype=np.uint64),
+        group_risk=np.array([risk for (risk, _) in groups], dtype=np.int64),
+        group_sum_insured=np.array([sum_insured for (_, sum_insured) in groups], dtype=np.uint64),
+        group_policies=np.array(list(groups.values()), dtype=np.uint64),
+        exposure=exposure,
+        bundle_ids=[b['id'] for b in bundles],
+        bundle_capital=np.array([b['capital'] for b in bundles], dtype=np.float64),
+        bundle_locked_capital=np.array([b['lockedCapital'] for b in bundles], dtype=np.float64),
+        bundle_balance=np.array([b['balance'] for b in bundles], dtype=np.float64),
+        policies=len(policies),
+        riskpool_capital=sum([b['capital'] for b in bundles]))
+
+
+def simulate(
+    portfolio: Portfolio,
+    distributions: dict,
+    trials=TRIALS_DEFAULT,
+    seed=SEED_DEFAULT,
+    processes=None,
+    chunk_size=CHUNK_SIZE_DEFAULT,
+    keep_losses=False,
+) -> SolvencyReport:
+    """Runs the monte carlo simulation in chunks of trials over a pool of worker
+    processes (defaults to one per core, processes=1 runs in the current process).
+    All risks of a place share the precipitation drawn for that place in a trial.
+    """
+    start = time.perf_counter()
+
+    missing = [place for place in portfolio.places if place not in distributions]
+    if len(missing) > 0:
+        raise ValueError('ERROR no precipitation distribution for places {}'.format(missing))
+
+    place_distributions = [distributions[place] for place in portfolio.places]
+    chunks = [min(chunk_size, trials - offset) for offset in range(0, trials, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = list(zip(chunks, seeds))
+
+    if processes == 1:
+        _init_worker(portfolio, place_distributions)
+        results = [_simulate_chunk(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes, _init_worker, (portfolio, place_distributions)) as pool:
+            results = pool.map(_simulate_chunk, tasks)
+
+    losses = np.concatenate([r[0] for r in results])
+    exhausted = np.sum([r[1] for r in results], axis=0)
+    any_exhausted = sum([r[2] for r in results])
+
+    return _report(portfolio, losses, exhausted, any_exhausted, time.perf_counter() - start, keep_losses)
+
+
+def print_report(report: SolvencyReport):
+    print('--- solvency simulation ({} trials, {:.2f}s) ---'.format(report.trials, report.duration))
+    print('sum insured {} riskpool capital {}'.format(report.sum_insured, report.riskpool_capital))
+    print('loss mean {:.2f} std {:.2f} max {}'.format(report.loss_mean, report.loss_std, report.loss_max))
+
+    for quantile, loss in report.loss_quantiles.items():
+        print('loss q{} {:.2f}'.format(quantile, loss))
+
+    print('capital at risk (q{}) {:.2f} expected shortfall {:.2f}'.format(
+        CAPITAL_AT_RISK_QUANTILE, report.capital_at_risk, report.expected_shortfall))
+    print('ruin probability {:.6f}'.format(report.ruin_probability))
+    print('-----------------------------')
+
+    # only bundles that may be exhausted are listed
+    for bundle_id, probability in report.bundle_exhaustion_probability.items():
+        if probability > 0:
+            print('bundle {} exhaustion probability {:.6f}'.format(bundle_id, probability))
+
+    print('any bundle exhaustion probability {:.6f}'.format(report.any_bundle_exhaustion_probability))
+    print('=============================')
+
+
+# portfolio and distributions are handed to each worker once instead of once per chunk
+_worker_portfolio = None
+_worker_distributions = None
+
+
+def _init_worker(portfolio, place_distributions):
+    global _worker_portfolio, _worker_distributions
+
+    _worker_portfolio = portfolio
+    _worker_distributions = place_distributions
+
+
+def _simulate_chunk(task) -> tuple:
+    (trials, seed_sequence) = task
+    p = _worker_portfolio
+    rng = np.random.default_rng(seed_sequence)
+
+    (prec_actual, prec_days_actual) = _draw(rng, _worker_distributions, trials)
+
+    # payout percentages per trial and risk
+    percentage = calculate_payout_percentage(
+        p.trigger[None, :],
+        p.exit[None, :],
+        p.prec_hist[None, :],
+        p.prec_days[None, :],
+        prec_actual[:, p.risk_place],
+        prec_days_actual[:, p.risk_place])
+
+    # losses per trial, calculatePayout truncates per policy (identical for policies of a group)
+    losses = np.zeros(trials, dtype=np.uint64)
+    for start in range(0, len(p.group_risk), POLICY_GROUP_BLOCK):
+        block = slice(start, start + POLICY_GROUP_BLOCK)
+        payouts = calculate_payout(percentage[:, p.group_risk[block]], p.group_sum_insured[None, block])
+        losses += (payouts * p.group_policies[None, block]).sum(axis=1, dtype=np.uint64)
+
+    # losses per trial and bundle, without truncation (overestimates by less than 1 token per policy)
+    bundle_loss = (percentage / PERCENTAGE_MULTIPLIER) @ p.exposure
+
+    exhausted_trials = bundle_loss > p.bundle_balance[None, :]
+
+    return (
+        losses,
+        exhausted_trials.sum(axis=0),
+        int(np.any(exhausted_trials, axis=1).sum()))
+
+
+def _draw(rng, place_distributions, trials) -> tuple:
+    places = len(place_distributions)
+    prec = np.zeros((trials, places), dtype=np.float64)
+    days = np.zeros((trials, places), dtype=np.float64)
+
+    for idx, d in enumerate(place_distributions):
+        if d.samples is not None:
+            prec[:, idx] = rng.choice(d.samples, trials)
+        else:
+            prec[:, idx] = rng.gamma(d.shape, d.scale, trials)
+
+        if d.days_samples is not None:
+            days[:, idx] = rng.choice(d.days_samples, trials)
+        else:
+            days[:, idx] = rng.poisson(d.days_mean, trials)
+
+    # same fixed point representation and range as accepted by the oracle callback
+    prec_actual = np.clip(np.floor(prec * PRECIPITATION_MULTIPLIER), 0, PRECIPITATION_MAX - 1)
+
+    return (prec_actual.astype(np.uint64), days.astype(np.uint64))
+
+
+def _report(portfolio, losses, exhausted, any_exhausted, duration, keep_losses) -> SolvencyReport:
+    trials = len(losses)
+    losses_float = losses.astype(np.float64)
+
+    capital_at_risk = float(np.quantile(losses_float, CAPITAL_AT_RISK_QUANTILE))
+    tail = losses_float[losses_float >= capital_at_risk]
+
+    return SolvencyReport(
+        trials=trials,
+        duration=duration,
+        sum_insured=int(portfolio.risk_sum_insured.sum(dtype=np.uint64)),
+        riskpool_capital=portfolio.riskpool_capital,
+        loss_mean=float(losses_float.mean()),
+        loss_std=float(losses_float.std()),
+        loss_max=int(losses.max()),
+        loss_quantiles={q: float(np.quantile(losses_float, q)) for q in LOSS_QUANTILES},
+        capital_at_risk=capital_at_risk,
+        expected_shortfall=float(tail.mean()),
+        ruin_probability=float(np.mean(losses_float > portfolio.riskpool_capital)),
+        bundle_exhaustion_probability={
+            bundle_id: float(exhausted[idx]) / trials
+            for idx, bundle_id in enumerate(portfolio.bundle_ids)},
+        any_bundle_exhaustion_probability=any_exhausted / trials,
+        losses=losses if keep_losses else None)
@@ -1,15 +1,21 @@
+import requests
+
 from web3 import Web3
 
 from brownie import (
     Contract, 
 )
 
-from brownie import accounts, config, project
+from brownie import accounts, config, project, web3
 from brownie.convert import to_bytes
 from brownie.network.account import Account
 
 CONFIG_DEPENDENCIES = 'dependencies'
 
+# per process caches for dependency projects and their contract classes
+_packages = {}
+_contract_classes = {}
+
 def s2h(text: str) -> str:
     return Web3.toHex(text.encode('ascii'))
 
@@ -41,17 +47,38 @@ def get_account(mnemonic: str, account_offset: int) -> Account:
         offset=account_offset)
 
 def get_package(substring: str):
+    if substring in _packages:
+        return _packages[substring]
+
     for dependency in config[CONFIG_DEPENDENCIES]:
         if substring in dependency:
             print("using package '{}' for '{}'".format(
                 dependency,
                 substring))
             
-            return project.load(dependency, raise_if_loaded=False)
+            package = project.load(dependency, raise_if_loaded=False)
+            _packages[substring] = package
+            return package
     
     print("no package for substring '{}' found".format(substring))
     return None
 
+def get_contract_class(substring: str, contract_name: str):
+    key = (substring, contract_name)
+    if key not in _contract_classes:
+        package = get_package(substring)
+        if package is None:
+            return None
+
+        _contract_classes[key] = getattr(package, contract_name)
+
+    return _contract_classes[key]
+
+def clear_package_cache():
+    # eg after recompiling a dependency package within the same process
+    _packages.clear()
+    _contract_classes.clear()
+
 # source: https://github.com/brownie-mix/upgrades-mix/blob/main/scripts/helpful_scripts.py 
 def encode_function_data(*args, initializer=None):
     """Encodes the function call so we can work with an initializer.
@@ -75,3 +102,49 @@ def contractFromAddress(contractClass, contractAddress):
 
 def contract_from_address(contractClass, contractAddress):
     return Contract.from_abi(contractClass._name, contractAddress, contractClass.abi)
+
+def batch_call(calls, block_identifier='latest'):
+    """Executes a list of read only contract calls in a single JSON-RPC batch request.
+    Args:
+        calls ([(brownie.network.contract.ContractCall, list)]):
+        List of (contract method, arguments) tuples. Example: `(registry.getContract, [s2b('Treasury')])`.
+        block_identifier (str|int, optional):
+        Block for which the calls are evaluated. Defaults to 'latest'.
+    Returns:
+        [list]: The decoded return values in the order of the provided calls.
+    """
+    if len(calls) == 0:
+        return []
+
+    endpoint_uri = getattr(web3.provider, 'endpoint_uri', None)
+
+    # batch requests are only supported for http providers, fall back to individual calls
+    if endpoint_uri is None or not str(endpoint_uri).startswith('http'):
+        return [method.call(*args, block_identifier=block_identifier) for (method, args) in calls]
+
+    if isinstance(block_identifier, int):
+        block_identifier = hex(block_identifier)
+
+    payload = []
+    for idx, (method, args) in enumerate(calls):
+        payload.append({
+            'jsonrpc': '2.0',
+            'id': idx,
+            'method': 'eth_call',
+            'params': [
+                {'to': method._address, 'data': method.encode_input(*args)},
+                block_identifier]})
+
+    response = requests.post(endpoint_uri, json=payload)
+    response.raise_for_status()
+    results = sorted(response.json(), key=lambda result: result['id'])
+
+    values = []
+    for (method, args), result in zip(calls, results):
+        if 'error' in result:
+            raise ValueError('batch call {}{} failed: {}'.format(
+                method._name, tuple(args), result['error']))
+
+        values.append(method.decode_output(result['result']))
+
+    return values
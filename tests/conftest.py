@@ -18,6 +18,9 @@ from brownie.network import accounts
 from brownie.network.account import Account
 from brownie.network.state import Chain
 
+from brownie import chain, history
+from brownie.network.transaction import Status
+
 from scripts.const import (
     ACCOUNTS_MNEMONIC,
     INSTANCE_OPERATOR,
@@ -75,75 +78,77 @@ def get_filled_account(
     accounts[account_no].transfer(owner, funding)
     return owner
 
-# fixtures with `yield` execute the code that is placed before the `yield` as setup code
-# and code after `yield` is teardown code. 
-# See https://docs.pytest.org/en/7.1.x/how-to/fixtures.html#yield-fixtures-recommended
-@pytest.fixture(autouse=True)
-def run_around_tests():
+# after each test has finished, wait for the confirmation of transactions
+# that are still pending. this is to ensure that the last transaction of the
+# test is finished correctly before the isolation fixtures revert the chain.
+# a hook wrapper around the test call runs before any fixture teardown
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
     try:
         yield
-        # after each test has finished, execute one trx and wait for it to finish. 
-        # this is to ensure that the last transaction of the test is finished correctly. 
     finally:
-        accounts[8].transfer(accounts[9], 1)
-        # dummy_account = get_account(ACCOUNTS_MNEMONIC, 999)
-        # execute_simple_incrementer_trx(dummy_account)
+        wait_for_pending_transactions()
+
+
+def wait_for_pending_transactions():
+    for tx in history.filter(status=Status.Pending):
+        tx.wait(1)
 
 #=== access to gif-contracts contract classes  =======================#
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def gifi(): return get_package('gif-interface')
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def gif(): return get_package('gif-contracts')
 
 #=== actor account fixtures  ===========================================#
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def instanceOperator(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[INSTANCE_OPERATOR])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def instanceWallet(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[INSTANCE_WALLET])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def riskpoolKeeper(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[RISKPOOL_KEEPER])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def riskpoolWallet(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[RISKPOOL_WALLET])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def investor(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[INVESTOR])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def productOwner(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[PRODUCT_OWNER])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def insurer(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[INSURER])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def oracleProvider(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[ORACLE_PROVIDER])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def chainlinkNodeOperator(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[CHAINLINK_NODE_OPERATOR])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def customer(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[CUSTOMER1])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def customer2(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[CUSTOMER2])
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def theOutsider(accounts) -> Account:
     return get_filled_account(accounts, GIF_ACTOR[OUTSIDER])
 
@@ -152,20 +157,20 @@ def theOutsider(accounts) -> Account:
 @pytest.fixture(scope="module")
 def registry(instanceOperator) -> GifRegistry: return GifRegistry(instanceOperator, None)
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def instance(instanceOperator, instanceWallet) -> GifInstance: return GifInstance(instanceOperator, instanceWallet)
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def instanceService(instance): return instance.getInstanceService()
 
 #=== stable coin fixtures ============================================#
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def token(instanceOperator) -> CONTRACT_CLASS_TOKEN: return CONTRACT_CLASS_TOKEN.deploy({'from': instanceOperator})
 
 #=== rain contracts fixtures ========================================#
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def gifProductDeploy(
     instance: GifInstance, 
     productOwner: Account, 
@@ -193,14 +198,44 @@ def gifProductDeploy(
         name=PRODUCT_BASE_NAME,
         publish_source=False)
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def gifProduct(gifProductDeploy) -> GifProduct: return gifProductDeploy.getProduct()
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def product(gifProduct) -> CONTRACT_CLASS_PRODUCT: return gifProduct.getContract()
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def oracle(gifProduct) -> CONTRACT_CLASS_ORACLE: return gifProduct.getOracle().getContract()
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def riskpool(gifProduct) -> CONTRACT_CLASS_RISKPOOL: return gifProduct.getRiskpool().getContract()
+
+#=== deployment snapshot fixtures ==================================#
+
+# deploys the gif instance, token and the complete rain product setup
+# (oracle, riskpool, product) once per test session and snapshots the chain.
+# only brownie's public snapshot api is used: chain.revert() reverts to the
+# latest snapshot and takes it again. fn_isolation snapshots at the start of
+# each test where the chain is always at the deployment state, the latest
+# snapshot therefore remains the deployment state as long as module scoped
+# fixtures do not send transactions
+@pytest.fixture(scope="session")
+def deploymentSnapshot(
+    instance: GifInstance,
+    token: CONTRACT_CLASS_TOKEN,
+    gifProductDeploy: GifProductComplete,
+    customer: Account,
+    customer2: Account,
+    theOutsider: Account,
+) -> int:
+    chain.snapshot()
+    return chain.height
+
+# overrides brownie's module_isolation fixture (which resets the chain to
+# its initial state) to revert to the session deployment snapshot instead.
+# fn_isolation builds on top of this fixture for per test isolation
+@pytest.fixture(scope="module")
+def module_isolation(deploymentSnapshot: int):
+    chain.revert()
+    yield
+    chain.revert()
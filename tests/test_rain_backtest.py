@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from scripts.backtest import (
+    PrecipitationStore,
+    aggregate,
+    backtest,
+    season_periods,
+)
+
+from scripts.payout import (
+    PERCENTAGE_MULTIPLIER,
+    calculate_payout_percentage,
+)
+
+SEED = 42
+START_DATE = '2019-01-01'
+YEARS = 4
+HOURS = (4 * 365 + 1) * 24
+
+
+def test_aggregate_matches_meteoblue_js():
+    rng = np.random.default_rng(SEED)
+
+    # full days, a partial last day and a dry period
+    for hours in [24, 24 * 90, 24 * 7 + 5, 48]:
+        hourly = np.round(rng.gamma(0.3, 2.0, hours) * (rng.random(hours) < 0.1), 2)
+        hourly[:24] = 0.0
+
+        assert aggregate(hourly) == meteoblue_historybasic(list(hourly))
+
+
+def test_backtest_seasons(tmp_path):
+    rng = np.random.default_rng(SEED)
+    store = PrecipitationStore(str(tmp_path))
+
+    for idx in range(3):
+        hourly = np.round(rng.gamma(0.3, 2.0 + idx, HOURS) * (rng.random(HOURS) < 0.2), 2)
+        store.add_location('location.{}'.format(idx), -23.5 + idx, -46.6, START_DATE, hourly)
+
+    # data written by another store instance is read via the memory mapping
+    store = PrecipitationStore(str(tmp_path))
+    assert store.location_ids() == ['location.0', 'location.1', 'location.2']
+
+    trigger = 0.1
+    exit = 1.0
+    precDays = 2
+    results = list(backtest(store, '11-01', '02-28', trigger, exit, precDays))
+
+    for result in results:
+        location = store.locations[result.location_id]
+        periods = season_periods(location, '11-01', '02-28')
+
+        # seasons crossing the year boundary, the last one is not covered
+        assert list(result.years) == [2019, 2020, 2021]
+        assert len(periods) == 3
+
+        for (year, startDate, endDate), precAvg, days in zip(periods, result.prec_avg, result.prec_days):
+            hourly = list(store.period(result.location_id, startDate, endDate))
+            assert (precAvg, days) == meteoblue_historybasic(hourly)
+
+        expected = calculate_payout_percentage(
+            int(PERCENTAGE_MULTIPLIER * trigger),
+            int(PERCENTAGE_MULTIPLIER * exit),
+            result.prec_hist,
+            precDays,
+            result.prec_actual,
+            result.prec_days)
+
+        assert list(result.payout_percentage) == list(expected)
+
+
+def meteoblue_historybasic(precipitationArray):
+    # straight port of historybasic in meteoblue.js
+    chunkSize = 24
+    days = len(precipitationArray) / chunkSize
+
+    precipitationSum = 0
+    for value in precipitationArray:
+        precipitationSum = precipitationSum + value
+
+    precAvg = precipitationSum / days
+
+    precDays = 0
+    for i in range(0, len(precipitationArray), chunkSize):
+        dailyRain = 0
+        for value in precipitationArray[i:i + chunkSize]:
+            dailyRain = dailyRain + value
+
+        if dailyRain > 0:
+            precDays += 1
+
+    return (precAvg, precDays)
@@ -0,0 +1,158 @@
+import brownie
+import pytest
+import time
+
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import fund_customer
+from scripts.instance import GifInstance
+from scripts.util import s2b32
+
+BUNDLE_FUNDING = 10000
+PREMIUM = 300
+SUM_INSURED = 2000
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_bundle_filter_place_prefix(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    riskpoolKeeper: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    instanceService = instance.getInstanceService()
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_investor(instance, instanceOperator, riskpoolWallet, investor, token, 3)
+    riskpool.setMaximumNumberOfActiveBundles(3, {'from': riskpoolKeeper})
+
+    # 1st bundle only covers rio places, 2nd sao paulo places, 3rd everything
+    filterRio = riskpool.encodeBundleFilter([s2b32('2000')], 0, 0, 0)
+    filterSaoPaulo = riskpool.encodeBundleFilter([s2b32('1000'), s2b32('3000')], 0, 0, 0)
+
+    bundleRio = riskpool.createBundle(filterRio, BUNDLE_FUNDING, {'from': investor}).return_value
+    bundleSaoPaulo = riskpool.createBundle(filterSaoPaulo, BUNDLE_FUNDING, {'from': investor}).return_value
+    bundleAll = riskpool.createBundle(bytes(0), BUNDLE_FUNDING, {'from': investor}).return_value
+
+    (placePrefixes, seasonStart, seasonEnd, maxSumInsured) = riskpool.getBundleFilter(bundleSaoPaulo)
+    assert placePrefixes == [s2b32('1000'), s2b32('3000')]
+    assert (seasonStart, seasonEnd, maxSumInsured) == (0, 0, 0)
+    assert riskpool.getBundleFilter(bundleAll)[0] == []
+
+    fund_customer(instance, instanceOperator, customer, token, 3 * PREMIUM)
+
+    riskSaoPaulo = create_risk(product, insurer, s2b32('10001.saopaulo'))
+    riskRio = create_risk(product, insurer, s2b32('20001.rio'))
+    riskBrasilia = create_risk(product, insurer, s2b32('40001.brasilia'))
+
+    product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskSaoPaulo, {'from': insurer})
+    assert locked_capital(instanceService, [bundleRio, bundleSaoPaulo, bundleAll]) == [0, SUM_INSURED, 0]
+
+    product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskRio, {'from': insurer})
+    assert locked_capital(instanceService, [bundleRio, bundleSaoPaulo, bundleAll]) == [SUM_INSURED, SUM_INSURED, 0]
+
+    product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskBrasilia, {'from': insurer})
+    assert locked_capital(instanceService, [bundleRio, bundleSaoPaulo, bundleAll]) == [SUM_INSURED, SUM_INSURED, SUM_INSURED]
+
+
+def test_bundle_filter_season_and_sum_insured(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    riskpoolKeeper: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    instanceService = instance.getInstanceService()
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_investor(instance, instanceOperator, riskpoolWallet, investor, token, 1)
+
+    now = int(time.time())
+    seasonFilter = riskpool.encodeBundleFilter([], now, now + 2000, SUM_INSURED)
+    bundleId = riskpool.createBundle(seasonFilter, BUNDLE_FUNDING, {'from': investor}).return_value
+
+    fund_customer(instance, instanceOperator, customer, token, 3 * PREMIUM)
+
+    riskInSeason = create_risk(product, insurer, s2b32('10001.saopaulo'), now + 100, now + 1000)
+    riskLate = create_risk(product, insurer, s2b32('10001.saopaulo'), now + 100, now + 3000)
+
+    # sum insured above filter maximum
+    tx = product.applyForPolicy(customer, PREMIUM, SUM_INSURED + 1, riskInSeason, {'from': insurer})
+    assert 'LogRainPolicyCreated' not in tx.events
+
+    # risk ends after the season window
+    tx = product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskLate, {'from': insurer})
+    assert 'LogRainPolicyCreated' not in tx.events
+
+    tx = product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskInSeason, {'from': insurer})
+    assert 'LogRainPolicyCreated' in tx.events
+    assert locked_capital(instanceService, [bundleId]) == [SUM_INSURED]
+
+
+def test_bundle_filter_invalid(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+):
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_investor(instance, instanceOperator, riskpoolWallet, investor, token, 1)
+
+    prefixes = [s2b32('{}000'.format(i)) for i in range(riskpool.MAX_PLACE_PREFIXES() + 1)]
+    with brownie.reverts('ERROR:RRP-001:TOO_MANY_PLACE_PREFIXES'):
+        riskpool.createBundle(riskpool.encodeBundleFilter(prefixes, 0, 0, 0), BUNDLE_FUNDING, {'from': investor})
+
+    with brownie.reverts('ERROR:RRP-002:SEASON_END_INVALID'):
+        riskpool.createBundle(riskpool.encodeBundleFilter([], 1000, 1000, 0), BUNDLE_FUNDING, {'from': investor})
+
+    with brownie.reverts('ERROR:RRP-004:PLACE_PREFIX_EMPTY'):
+        riskpool.createBundle(riskpool.encodeBundleFilter([bytes(32)], 0, 0, 0), BUNDLE_FUNDING, {'from': investor})
+
+
+def fund_investor(instance, instanceOperator, riskpoolWallet, investor, token, bundles):
+    token.transfer(investor, bundles * BUNDLE_FUNDING, {'from': instanceOperator})
+    token.approve(instance.getTreasury(), bundles * BUNDLE_FUNDING, {'from': investor})
+    token.approve(instance.getTreasury(), 2**256 - 1, {'from': riskpoolWallet})
+
+
+def locked_capital(instanceService, bundleIds) -> list:
+    return [instanceService.getBundle(bundleId).dict()['lockedCapital'] for bundleId in bundleIds]
+
+
+def create_risk(product, insurer, placeId, startDate=None, endDate=None):
+    multiplier = product.getPercentageMultiplier()
+    coordMultiplier = product.getCoordinatesMultiplier()
+    precMultiplier = product.getPrecipitationMultiplier()
+
+    startDate = startDate or time.time() + 100
+    endDate = endDate or time.time() + 1000
+
+    tx = product.createRisk(
+        startDate, endDate, placeId,
+        coordMultiplier * -23.550620, coordMultiplier * -46.634370,
+        multiplier * 0.1, multiplier * 1.0, precMultiplier * 5.0, 2,
+        {'from': insurer})
+
+    return tx.return_value
@@ -0,0 +1,81 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from scripts.backtest import aggregate
+from scripts.calibrate import calibrate, history_range, season_dates
+from scripts.history import HistoryCache
+from scripts.payout import PRECIPITATION_MULTIPLIER
+
+HISTORY_YEARS = 3
+PLACES = [
+    {'placeId': '10001.saopaulo', 'lat': -23.550620, 'long': -46.634370},
+    {'placeId': '10002.rio', 'lat': -22.906847, 'long': -43.172897},
+]
+SEASONS = [
+    {'start': '11-01', 'end': '02-28', 'year': 2023},
+    {'start': '03-01', 'end': '05-31', 'year': 2023},
+]
+
+
+def test_calibrate(tmp_path):
+    cache = HistoryCache(str(tmp_path))
+    (startDate, endDate) = history_range(SEASONS, HISTORY_YEARS)
+    assert (startDate, endDate) == ('2020-01-01', '2023-02-28')
+
+    payloads = {}
+    for idx, place in enumerate(PLACES):
+        payloads[place['placeId']] = create_payload(startDate, endDate, seed=idx)
+        cache.put(place['lat'], place['long'], startDate, endDate, payloads[place['placeId']])
+
+    risks = calibrate(PLACES, SEASONS, history_years=HISTORY_YEARS, processes=1, cache_dir=str(tmp_path))
+    assert len(risks) == len(PLACES) * len(SEASONS)
+
+    # worker processes give the same result
+    assert calibrate(PLACES, SEASONS, history_years=HISTORY_YEARS, processes=2, cache_dir=str(tmp_path)) == risks
+
+    # 2nd season of the 1st place: march to may 2020, 2021 and 2022
+    risk = risks[1]
+    assert risk['placeId'] == PLACES[0]['placeId']
+    assert (risk['startDate'], risk['endDate']) == season_dates(SEASONS[1])
+
+    history = payloads[PLACES[0]['placeId']]['history_1h']
+    precAvg = []
+    precDays = []
+    for year in [2020, 2021, 2022]:
+        hourly = [value for time, value in zip(history['time'], history['precipitation'])
+                  if '{}-03-01'.format(year) <= time[:10] <= '{}-05-31'.format(year)]
+        (avg, days) = aggregate(hourly)
+        precAvg.append(avg)
+        precDays.append(days)
+
+    assert risk['precHist'] == int(PRECIPITATION_MULTIPLIER * np.mean(precAvg))
+    assert risk['precDays'] == int(np.floor(np.quantile(precDays, 0.1)))
+
+
+def test_calibrate_missing_history(tmp_path):
+    cache = HistoryCache(str(tmp_path))
+    place = PLACES[0]
+    (startDate, endDate) = history_range(SEASONS, HISTORY_YEARS)
+
+    # history starts one year late
+    cache.put(place['lat'], place['long'], startDate, endDate, create_payload('2021-01-01', endDate))
+
+    with pytest.raises(ValueError):
+        calibrate([place], SEASONS, history_years=HISTORY_YEARS, processes=1, cache_dir=str(tmp_path))
+
+
+def create_payload(startDate, endDate, seed=0):
+    start = datetime.datetime.strptime(startDate, '%Y-%m-%d')
+    hours = ((datetime.datetime.strptime(endDate, '%Y-%m-%d') - start).days + 1) * 24
+
+    rng = np.random.default_rng(seed)
+    precipitation = np.round(rng.gamma(0.3, 2.0, hours) * (rng.random(hours) < 0.2), 2)
+
+    return {
+        'history_1h': {
+            'time': [(start + datetime.timedelta(hours=hour)).strftime('%Y-%m-%d %H:%M') for hour in range(hours)],
+            'precipitation': precipitation.tolist(),
+        }
+    }
@@ -0,0 +1,258 @@
+import brownie
+import pytest
+import time
+
+from brownie import chain
+from brownie.network import accounts
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import fund_riskpool
+from scripts.cohort import CohortTree
+from scripts.instance import GifInstance
+from scripts.util import s2b32
+
+RISKPOOL_FUNDING = 200000
+PREMIUM = 30
+SUM_INSURED = 200
+COHORT_SIZE = 10
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_cohort_lifecycle(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+    customer2: Account,
+    theOutsider: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+
+    placeId = s2b32('10001.saopaulo')
+    riskId = create_risk(product, insurer, placeId)
+
+    holders = [customer, customer2] + [accounts.add() for i in range(COHORT_SIZE - 2)]
+    tree = CohortTree([(holder, SUM_INSURED + i, PREMIUM) for i, holder in enumerate(holders)])
+
+    assert product.getCohortLeaf(*tree.member(3)) == '0x' + tree.levels[0][3].hex()
+
+    tx = product.createCohort(riskId, tree.root, len(tree), tree.sum_insured, tree.premium, {'from': insurer})
+    processId = tx.return_value
+    assert 'LogRainCohortCreated' in tx.events
+    assert 'LogRainPolicyCreated' not in tx.events
+
+    cohort = product.getCohort(riskId).dict()
+    assert cohort['root'] == '0x' + tree.root.hex()
+    assert cohort['processId'] == processId
+    assert cohort['members'] == COHORT_SIZE
+    assert cohort['materialized'] == 0
+    assert product.getRiskExposure(riskId) == (tree.sum_insured, tree.premium)
+    assert product.getPolicyData(processId)['riskId'] == riskId
+
+    # the cohort application never becomes a policy
+    with brownie.reverts('ERROR:RAIN-092:COHORT_PROCESS_NOT_SUPPORTED'):
+        product.underwrite(processId, {'from': insurer})
+
+    with brownie.reverts('ERROR:RAIN-092:COHORT_PROCESS_NOT_SUPPORTED'):
+        product.adjustPremiumSumInsured(processId, tree.premium, tree.sum_insured - 1, {'from': insurer})
+
+    assert product.policies(riskId) == 0
+    assert product.getRiskExposure(riskId) == (tree.sum_insured, tree.premium)
+
+    with brownie.reverts('ERROR:RAIN-084:COHORT_ALREADY_EXISTS'):
+        product.createCohort(riskId, tree.root, len(tree), tree.sum_insured, tree.premium, {'from': insurer})
+
+    with brownie.reverts('ERROR:RAIN-086:ORACLE_RESPONSE_MISSING'):
+        product.materializeCohortPolicy(riskId, *tree.member(0), tree.proof(0), {'from': theOutsider})
+
+    # oracle is triggered via the cohort application, full payout
+    respond(gifProduct, product, insurer, riskId, processId, 1000)
+
+    with brownie.reverts('ERROR:RAIN-092:COHORT_PROCESS_NOT_SUPPORTED'):
+        product.processPolicy(processId, {'from': insurer})
+
+    with brownie.reverts('ERROR:RAIN-092:COHORT_PROCESS_NOT_SUPPORTED'):
+        product.claimPayout(processId, {'from': theOutsider})
+
+    # anybody may materialize, payout goes to the committed policy holder
+    balanceBefore = token.balanceOf(customer2)
+    tx = product.materializeCohortPolicy(riskId, *tree.member(1), tree.proof(1), {'from': theOutsider})
+    policyId = tx.return_value
+
+    assert 'LogRainCohortPolicyMaterialized' in tx.events
+    assert 'LogRainPayoutCreated' in tx.events
+    assert token.balanceOf(customer2) == balanceBefore + SUM_INSURED + 1
+    assert product.isCohortPolicyMaterialized(riskId, 1)
+    assert not product.isCohortPolicyMaterialized(riskId, 0)
+    assert product.getPolicyData(policyId)['sumInsured'] == SUM_INSURED + 1
+    assert product.getCohort(riskId)['materialized'] == 1
+    assert product.getRiskExposure(riskId) == (tree.sum_insured - SUM_INSURED - 1, tree.premium - PREMIUM)
+
+    with brownie.reverts('ERROR:RAIN-089:COHORT_POLICY_ALREADY_MATERIALIZED'):
+        product.materializeCohortPolicy(riskId, *tree.member(1), tree.proof(1), {'from': theOutsider})
+
+    # proof of a different member
+    with brownie.reverts('ERROR:RAIN-090:COHORT_PROOF_INVALID'):
+        product.materializeCohortPolicy(riskId, *tree.member(0), tree.proof(2), {'from': theOutsider})
+
+    # sum insured not matching the commitment
+    (index, holder, sumInsured, premium) = tree.member(0)
+    with brownie.reverts('ERROR:RAIN-090:COHORT_PROOF_INVALID'):
+        product.materializeCohortPolicy(riskId, index, holder, 2 * sumInsured, premium, tree.proof(0), {'from': theOutsider})
+
+    with brownie.reverts('ERROR:RAIN-088:COHORT_INDEX_INVALID'):
+        product.materializeCohortPolicy(riskId, COHORT_SIZE, holder, sumInsured, premium, tree.proof(0), {'from': theOutsider})
+
+    product.materializeCohortPolicy(riskId, *tree.member(COHORT_SIZE - 1), tree.proof(COHORT_SIZE - 1), {'from': customer})
+
+    # closing releases the exposure of the remaining members
+    with brownie.reverts():
+        product.closeCohort(riskId, {'from': theOutsider})
+
+    # remaining members may still materialize their policies
+    with brownie.reverts('ERROR:RAIN-094:COHORT_MATERIALIZATION_PERIOD_OPEN'):
+        product.closeCohort(riskId, {'from': insurer})
+
+    chain.sleep(product.COHORT_MATERIALIZATION_PERIOD())
+
+    tx = product.closeCohort(riskId, {'from': insurer})
+    assert tx.events['LogRainCohortClosed'][0]['materialized'] == 2
+    assert product.getRiskExposure(riskId) == (0, 0)
+    assert product.getPlaceExposure(placeId) == (0, 0)
+
+    with brownie.reverts('ERROR:RAIN-085:COHORT_UNKNOWN'):
+        product.materializeCohortPolicy(riskId, *tree.member(0), tree.proof(0), {'from': customer})
+
+
+def test_cohort_without_payout(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+    customer2: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+
+    riskId = create_risk(product, insurer, s2b32('10001.saopaulo'))
+    tree = CohortTree([(customer, SUM_INSURED, PREMIUM), (customer2, SUM_INSURED, PREMIUM)])
+
+    with brownie.reverts('ERROR:RAIN-080:RISK_UNKNOWN'):
+        product.createCohort(s2b32('unknown'), tree.root, len(tree), tree.sum_insured, tree.premium, {'from': insurer})
+
+    with brownie.reverts('ERROR:RAIN-082:COHORT_ROOT_ZERO'):
+        product.createCohort(riskId, bytes(32), len(tree), tree.sum_insured, tree.premium, {'from': insurer})
+
+    product.setRiskExposureCap(riskId, tree.sum_insured - 1, {'from': insurer})
+    with brownie.reverts('ERROR:RAIN-006:RISK_EXPOSURE_CAP_EXCEEDED'):
+        product.createCohort(riskId, tree.root, len(tree), tree.sum_insured, tree.premium, {'from': insurer})
+
+    product.setRiskExposureCap(riskId, 0, {'from': insurer})
+    processId = product.createCohort(riskId, tree.root, len(tree), tree.sum_insured, tree.premium, {'from': insurer}).return_value
+
+    # no payout, nothing to materialize
+    respond(gifProduct, product, insurer, riskId, processId, 100)
+
+    with brownie.reverts('ERROR:RAIN-087:NO_PAYOUT'):
+        product.materializeCohortPolicy(riskId, *tree.member(0), tree.proof(0), {'from': customer})
+
+    chain.sleep(product.COHORT_MATERIALIZATION_PERIOD())
+
+    product.closeCohort(riskId, {'from': insurer})
+    assert product.getRiskExposure(riskId) == (0, 0)
+    assert product.getCohort(riskId)['materialized'] == 0
+
+
+def test_cohort_totals(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+    customer2: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+
+    riskId = create_risk(product, insurer, s2b32('10001.saopaulo'))
+    tree = CohortTree([(customer, SUM_INSURED, PREMIUM), (customer2, SUM_INSURED, PREMIUM)])
+
+    # declared totals below the committed members
+    processId = product.createCohort(riskId, tree.root, len(tree), tree.sum_insured - 1, tree.premium, {'from': insurer}).return_value
+    respond(gifProduct, product, insurer, riskId, processId, 1000)
+
+    product.materializeCohortPolicy(riskId, *tree.member(0), tree.proof(0), {'from': customer})
+    assert product.getCohort(riskId)['sumInsured'] == SUM_INSURED - 1
+
+    with brownie.reverts('ERROR:RAIN-093:COHORT_TOTALS_EXCEEDED'):
+        product.materializeCohortPolicy(riskId, *tree.member(1), tree.proof(1), {'from': customer2})
+
+    assert product.getCohort(riskId)['materialized'] == 1
+    assert not product.isCohortPolicyMaterialized(riskId, 1)
+
+
+def create_risk(product, insurer, placeId):
+    multiplier = product.getPercentageMultiplier()
+    coordMultiplier = product.getCoordinatesMultiplier()
+    precMultiplier = product.getPrecipitationMultiplier()
+
+    startDate = time.time() + 100
+    endDate = startDate + 1000
+
+    tx = product.createRisk(
+        startDate, endDate, placeId,
+        coordMultiplier * -23.550620, coordMultiplier * -46.634370,
+        multiplier * 0.1, multiplier * 1.0, precMultiplier * 5.0, 2,
+        {'from': insurer})
+
+    return tx.return_value
+
+
+def respond(gifProduct, product, insurer, riskId, processId, precActual):
+    oracle = gifProduct.getOracle().getContract()
+    clOperator = gifProduct.getOracle().getClOperator()
+    risk = product.getRisk(riskId).dict()
+
+    tx = product.triggerOracle(processId, "", "", {'from': insurer})
+    clRequestEvent = tx.events['OracleRequest'][0]
+
+    data = oracle.encodeFulfillParameters(
+        clRequestEvent['requestId'],
+        risk['placeId'],
+        risk['startDate'],
+        risk['endDate'],
+        precActual)
+
+    clOperator.fulfillOracleRequest2(
+        clRequestEvent['requestId'],
+        clRequestEvent['payment'],
+        clRequestEvent['callbackAddr'],
+        clRequestEvent['callbackFunctionId'],
+        clRequestEvent['cancelExpiration'],
+        data)
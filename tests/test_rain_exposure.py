@@ -0,0 +1,193 @@
+import brownie
+import pytest
+import time
+
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import (
+    fund_riskpool,
+    fund_customer,
+)
+
+from scripts.instance import GifInstance
+from scripts.util import s2b32
+
+RISKPOOL_FUNDING = 200000
+PREMIUM = [300, 400, 500]
+SUM_INSURED = [2000, 3000, 4000]
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_risk_and_place_exposure(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, sum(PREMIUM))
+
+    # two seasons for the same place, one risk at another place
+    placeId = s2b32('10001.saopaulo')
+    placeId2 = s2b32('20001.rio')
+    riskId = create_risk(product, insurer, placeId, 100)
+    riskId2 = create_risk(product, insurer, placeId, 2000)
+    riskId3 = create_risk(product, insurer, placeId2, 100)
+
+    assert product.getRiskExposure(riskId) == (0, 0)
+    assert product.getPlaceExposure(placeId) == (0, 0)
+
+    policyId = product.applyForPolicy(customer, PREMIUM[0], SUM_INSURED[0], riskId, {'from': insurer}).return_value
+    product.applyForPolicy(customer, PREMIUM[1], SUM_INSURED[1], riskId2, {'from': insurer})
+    product.applyForPolicy(customer, PREMIUM[2], SUM_INSURED[2], riskId3, {'from': insurer})
+
+    assert product.getRiskExposure(riskId) == (SUM_INSURED[0], PREMIUM[0])
+    assert product.getRiskExposure(riskId2) == (SUM_INSURED[1], PREMIUM[1])
+    assert product.getRiskExposure(riskId3) == (SUM_INSURED[2], PREMIUM[2])
+    assert product.getPlaceExposure(placeId) == (SUM_INSURED[0] + SUM_INSURED[1], PREMIUM[0] + PREMIUM[1])
+    assert product.getPlaceExposure(placeId2) == (SUM_INSURED[2], PREMIUM[2])
+
+    # processed policies no longer count
+    respond(gifProduct, product, insurer, riskId, policyId)
+    product.processPoliciesForRisk(riskId, 0, {'from': insurer})
+
+    assert product.getRiskExposure(riskId) == (0, 0)
+    assert product.getPlaceExposure(placeId) == (SUM_INSURED[1], PREMIUM[1])
+
+
+def test_adjusted_policy_exposure(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, PREMIUM[0])
+
+    placeId = s2b32('10001.saopaulo')
+    riskId = create_risk(product, insurer, placeId, 100)
+    policyId = product.applyForPolicy(customer, PREMIUM[0], SUM_INSURED[0], riskId, {'from': insurer}).return_value
+
+    # higher premium and lower sum insured for the underwritten policy
+    premium = PREMIUM[0] + 100
+    sumInsured = SUM_INSURED[0] - 500
+    product.adjustPremiumSumInsured(policyId, premium, sumInsured, {'from': insurer})
+
+    assert product.getPolicyData(policyId).dict()['sumInsured'] == sumInsured
+    assert product.getRiskExposure(riskId) == (sumInsured, premium)
+    assert product.getPlaceExposure(placeId) == (sumInsured, premium)
+
+    respond(gifProduct, product, insurer, riskId, policyId)
+    product.processPoliciesForRisk(riskId, 0, {'from': insurer})
+
+    assert product.policies(riskId) == 0
+    assert product.getRiskExposure(riskId) == (0, 0)
+    assert product.getPlaceExposure(placeId) == (0, 0)
+
+
+def test_risk_exposure_cap(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+    theOutsider: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, 3 * PREMIUM[0])
+
+    riskId = create_risk(product, insurer, s2b32('10001.saopaulo'), 100)
+    cap = 2 * SUM_INSURED[0]
+
+    with brownie.reverts():
+        product.setRiskExposureCap(riskId, cap, {'from': theOutsider})
+
+    with brownie.reverts('ERROR:RAIN-007:RISK_UNKNOWN'):
+        product.setRiskExposureCap(s2b32('unknown'), cap, {'from': insurer})
+
+    product.setRiskExposureCap(riskId, cap, {'from': insurer})
+    assert product.getRiskExposureCap(riskId) == cap
+
+    for i in range(2):
+        product.applyForPolicy(customer, PREMIUM[0], SUM_INSURED[0], riskId, {'from': insurer})
+
+    with brownie.reverts('ERROR:RAIN-006:RISK_EXPOSURE_CAP_EXCEEDED'):
+        product.applyForPolicy(customer, PREMIUM[0], 1, riskId, {'from': insurer})
+
+    # removing the cap
+    product.setRiskExposureCap(riskId, 0, {'from': insurer})
+    product.applyForPolicy(customer, PREMIUM[0], SUM_INSURED[0], riskId, {'from': insurer})
+
+    assert product.getRiskExposure(riskId) == (3 * SUM_INSURED[0], 3 * PREMIUM[0])
+    assert product.policies(riskId) == 3
+
+
+def create_risk(product, insurer, placeId, startOffset):
+    multiplier = product.getPercentageMultiplier()
+    coordMultiplier = product.getCoordinatesMultiplier()
+    precMultiplier = product.getPrecipitationMultiplier()
+
+    startDate = time.time() + startOffset
+    endDate = startDate + 1000
+
+    tx = product.createRisk(
+        startDate, endDate, placeId,
+        coordMultiplier * -23.550620, coordMultiplier * -46.634370,
+        multiplier * 0.1, multiplier * 1.0, precMultiplier * 5.0, 2,
+        {'from': insurer})
+
+    return tx.return_value
+
+
+def respond(gifProduct, product, insurer, riskId, policyId):
+    oracle = gifProduct.getOracle().getContract()
+    clOperator = gifProduct.getOracle().getClOperator()
+    risk = product.getRisk(riskId).dict()
+
+    tx = product.triggerOracle(policyId, "", "", {'from': insurer})
+    clRequestEvent = tx.events['OracleRequest'][0]
+
+    # no payout
+    precActual = 100
+    data = oracle.encodeFulfillParameters(
+        clRequestEvent['requestId'],
+        risk['placeId'],
+        risk['startDate'],
+        risk['endDate'],
+        precActual)
+
+    clOperator.fulfillOracleRequest2(
+        clRequestEvent['requestId'],
+        clRequestEvent['payment'],
+        clRequestEvent['callbackAddr'],
+        clRequestEvent['callbackFunctionId'],
+        clRequestEvent['cancelExpiration'],
+        data)
@@ -0,0 +1,419 @@
+import json
+import os
+import pytest
+import time
+
+from brownie.network import accounts
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import (
+    fund_riskpool,
+    fund_customer,
+    sign_permit,
+)
+
+from scripts.cohort import CohortTree
+from scripts.instance import GifInstance
+from scripts.util import s2b32
+
+# gas usage per operation is compared against the baseline below.
+# to (re)create the baseline run:
+# GAS_BASELINE_UPDATE=1 brownie test tests/test_rain_gas_benchmark.py
+GAS_BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'gas_baseline.json')
+GAS_REPORT_FILE = os.path.join(os.path.dirname(__file__), '..', 'gas_report.json')
+GAS_BASELINE_UPDATE = os.getenv('GAS_BASELINE_UPDATE', '0') == '1'
+
+# relative gas increase over baseline that fails the benchmark
+GAS_REGRESSION_THRESHOLD = float(os.getenv('GAS_REGRESSION_THRESHOLD', '0.02'))
+
+PORTFOLIO_SIZES = [1, 10, 25]
+BUNDLE_COUNTS = [1, 5, 10]
+COHORT_SIZES = [10, 100, 1000]
+
+RISKPOOL_FUNDING = 200000
+PREMIUM = 300
+SUM_INSURED = 2000
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+class GasRecorder(object):
+
+    def __init__(self, baseline_file, threshold):
+        self.threshold = threshold
+        self.gas = {}
+        self.baseline = {}
+
+        if os.path.exists(baseline_file):
+            with open(baseline_file) as file:
+                self.baseline = json.load(file)
+
+    def record(self, operation, size, gas_used):
+        key = '{}[{}]'.format(operation, size)
+        self.gas[key] = gas_used
+        print('gas {} {}'.format(key, gas_used))
+
+        if GAS_BASELINE_UPDATE:
+            return
+
+        # without a committed baseline the benchmark only reports, it never passes silently
+        if key not in self.baseline:
+            pytest.skip('no gas baseline for {} in {}, create it with GAS_BASELINE_UPDATE=1'.format(
+                key, GAS_BASELINE_FILE))
+
+        max_gas = int(self.baseline[key] * (1 + self.threshold))
+        assert gas_used <= max_gas, 'gas regression for {}: {} > {} (baseline {})'.format(
+            key, gas_used, max_gas, self.baseline[key])
+
+    def write(self, file_name):
+        with open(file_name, 'w') as file:
+            json.dump(self.gas, file, indent=2, sort_keys=True)
+
+
+@pytest.fixture(scope="module")
+def gasRecorder() -> GasRecorder:
+    recorder = GasRecorder(GAS_BASELINE_FILE, GAS_REGRESSION_THRESHOLD)
+    yield recorder
+
+    # parallel runs (brownie test -n) write one report per worker
+    worker = os.getenv('PYTEST_XDIST_WORKER')
+    recorder.write(GAS_REPORT_FILE.replace('.json', '.{}.json'.format(worker)) if worker else GAS_REPORT_FILE)
+
+    if GAS_BASELINE_UPDATE:
+        baseline = dict(recorder.baseline)
+        baseline.update(recorder.gas)
+
+        with open(GAS_BASELINE_FILE, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+
+
+@pytest.mark.parametrize('policies', PORTFOLIO_SIZES)
+def test_gas_policy_lifecycle(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+    gasRecorder: GasRecorder,
+    policies,
+):
+    product = gifProduct.getContract()
+    oracle = gifProduct.getOracle().getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    clOperator = gifProduct.getOracle().getClOperator()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, policies * PREMIUM)
+
+    # risk with full payout for the oracle response below
+    startDate = time.time() + 100
+    endDate = time.time() + 1000
+    placeId = s2b32('10001.saopaulo')
+    (tx, riskId) = create_risk(product, insurer, startDate, endDate, placeId)
+    gasRecorder.record('createRisk', policies, tx.gas_used)
+
+    policyIds = []
+    applyGas = []
+    for i in range(policies):
+        tx = product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskId, {'from': insurer})
+        policyIds.append(tx.return_value)
+        applyGas.append(tx.gas_used)
+
+    # gas of the last application reflects the portfolio size
+    gasRecorder.record('applyForPolicy', policies, applyGas[-1])
+
+    tx = product.triggerOracle(policyIds[0], "", "", {'from': insurer})
+    gasRecorder.record('triggerOracle', policies, tx.gas_used)
+    clRequestEvent = tx.events['OracleRequest'][0]
+
+    precActual = 1000
+    data = oracle.encodeFulfillParameters(
+        clRequestEvent['requestId'],
+        placeId,
+        startDate,
+        endDate,
+        precActual)
+
+    tx = clOperator.fulfillOracleRequest2(
+        clRequestEvent['requestId'],
+        clRequestEvent['payment'],
+        clRequestEvent['callbackAddr'],
+        clRequestEvent['callbackFunctionId'],
+        clRequestEvent['cancelExpiration'],
+        data)
+    assert 'LogRainRiskDataReceived' in tx.events
+    gasRecorder.record('oracleFulfill', policies, tx.gas_used)
+
+    # single policy processing (settlement snapshot and cached policy data)
+    tx = product.processPolicy(policyIds[0], {'from': insurer})
+    assert 'LogRainPayoutCreated' in tx.events
+    gasRecorder.record('processPolicy', policies, tx.gas_used)
+
+    if policies > 1:
+        tx = product.processPoliciesForRisk(riskId, 0, {'from': insurer})
+        assert len(tx.return_value) == policies - 1
+        assert 'LogRainPayoutCreated' in tx.events
+        gasRecorder.record('processPoliciesForRisk', policies, tx.gas_used)
+        gasRecorder.record('processPoliciesForRiskPerPolicy', policies, tx.gas_used // (policies - 1))
+
+
+@pytest.mark.parametrize('policies', PORTFOLIO_SIZES)
+def test_gas_collect_premiums(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+    customer2: Account,
+    gasRecorder: GasRecorder,
+    policies,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+
+    (tx, riskId) = create_risk(product, insurer, time.time() + 100, time.time() + 1000, s2b32('10001.saopaulo'))
+
+    # alternating holders, worst case with one transfer per policy
+    holders = [customer, customer2]
+    policyIds = []
+    for i in range(2 * policies):
+        tx = product.applyForPolicy(holders[i % 2], PREMIUM, SUM_INSURED, riskId, {'from': insurer})
+        policyIds.append(tx.return_value)
+
+    # premiums paid by a distributor
+    distributor = instanceOperator
+    token.approve(product, 2 * policies * PREMIUM, {'from': distributor})
+    for holder in holders:
+        token.approve(instance.getTreasury(), 2 * policies * PREMIUM, {'from': holder})
+
+    # same number of policies collected with one transaction per policy and with a single batch
+    gasUsed = 0
+    for policyId in policyIds[:policies]:
+        tx = product.collectPremium(policyId, distributor, PREMIUM, {'from': insurer})
+        gasUsed += tx.gas_used
+
+    gasRecorder.record('collectPremium', policies, gasUsed)
+    gasRecorder.record('collectPremiumPerPolicy', policies, gasUsed // policies)
+
+    tx = product.collectPremiums(policyIds[policies:], distributor, [PREMIUM] * policies, {'from': insurer})
+    assert tx.return_value[0]
+    gasRecorder.record('collectPremiums', policies, tx.gas_used)
+    gasRecorder.record('collectPremiumsPerPolicy', policies, tx.gas_used // policies)
+
+
+def test_gas_apply_for_policy_with_permit(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    gasRecorder: GasRecorder,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+    treasury = instance.getTreasury()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    (tx, riskId) = create_risk(product, insurer, time.time() + 100, time.time() + 1000, s2b32('10001.saopaulo'))
+
+    holders = [accounts.add(), accounts.add()]
+    for holder in holders:
+        instanceOperator.transfer(holder, '1 ether')
+        token.transfer(holder, PREMIUM, {'from': instanceOperator})
+
+    # approve by the policy holder, then apply (premium collected at underwriting)
+    txApprove = token.approve(treasury, PREMIUM, {'from': holders[0]})
+    txApply = product.applyForPolicy(holders[0], PREMIUM, SUM_INSURED, riskId, {'from': insurer})
+    gasRecorder.record('approveAndApplyForPolicy', 1, txApprove.gas_used + txApply.gas_used)
+
+    deadline = time.time() + 3600
+    (v, r, s) = sign_permit(token, holders[1], treasury, PREMIUM, deadline)
+    tx = product.applyForPolicyWithPermit(holders[1], PREMIUM, SUM_INSURED, riskId, deadline, v, r, s, {'from': insurer})
+    gasRecorder.record('applyForPolicyWithPermit', 1, tx.gas_used)
+
+
+# pull based settlement, gas paid by the claimants (or a relayer) instead of the insurer
+@pytest.mark.parametrize('policies', PORTFOLIO_SIZES)
+def test_gas_claim_payouts(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+    theOutsider: Account,
+    gasRecorder: GasRecorder,
+    policies,
+):
+    product = gifProduct.getContract()
+    oracle = gifProduct.getOracle().getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    clOperator = gifProduct.getOracle().getClOperator()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, (policies + 1) * PREMIUM)
+
+    startDate = time.time() + 100
+    endDate = time.time() + 1000
+    placeId = s2b32('10001.saopaulo')
+    (tx, riskId) = create_risk(product, insurer, startDate, endDate, placeId)
+    product.setPayoutClaimMode(riskId, True, {'from': insurer})
+
+    policyIds = []
+    for i in range(policies + 1):
+        tx = product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskId, {'from': insurer})
+        policyIds.append(tx.return_value)
+
+    tx = product.triggerOracle(policyIds[0], "", "", {'from': insurer})
+    clRequestEvent = tx.events['OracleRequest'][0]
+
+    precActual = 1000
+    data = oracle.encodeFulfillParameters(
+        clRequestEvent['requestId'],
+        placeId,
+        startDate,
+        endDate,
+        precActual)
+
+    clOperator.fulfillOracleRequest2(
+        clRequestEvent['requestId'],
+        clRequestEvent['payment'],
+        clRequestEvent['callbackAddr'],
+        clRequestEvent['callbackFunctionId'],
+        clRequestEvent['cancelExpiration'],
+        data)
+
+    tx = product.claimPayout(policyIds[0], {'from': customer})
+    assert 'LogRainPayoutCreated' in tx.events
+    gasRecorder.record('claimPayout', policies, tx.gas_used)
+
+    tx = product.claimPayouts(policyIds[1:], {'from': theOutsider})
+    assert tx.return_value == policies
+    gasRecorder.record('claimPayouts', policies, tx.gas_used)
+    gasRecorder.record('claimPayoutsPerPolicy', policies, tx.gas_used // policies)
+
+
+# per insured farmer the cohort costs createCohortPerFarmer, plus materializeCohortPolicy
+# for farmers with a payout. compare with applyForPolicy + processPoliciesForRiskPerPolicy
+@pytest.mark.parametrize('members', COHORT_SIZES)
+def test_gas_cohort_issuance(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    gasRecorder: GasRecorder,
+    members,
+):
+    product = gifProduct.getContract()
+    oracle = gifProduct.getOracle().getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    clOperator = gifProduct.getOracle().getClOperator()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+
+    startDate = time.time() + 100
+    endDate = time.time() + 1000
+    placeId = s2b32('10001.saopaulo')
+    (tx, riskId) = create_risk(product, insurer, startDate, endDate, placeId)
+
+    # cohort members only exist off-chain
+    tree = CohortTree([('0x{:040x}'.format(i + 1), SUM_INSURED, PREMIUM) for i in range(members)])
+
+    tx = product.createCohort(riskId, tree.root, len(tree), tree.sum_insured, tree.premium, {'from': insurer})
+    processId = tx.return_value
+    gasRecorder.record('createCohort', members, tx.gas_used)
+    gasRecorder.record('createCohortPerFarmer', members, tx.gas_used // members)
+
+    tx = product.triggerOracle(processId, "", "", {'from': insurer})
+    clRequestEvent = tx.events['OracleRequest'][0]
+
+    precActual = 1000
+    data = oracle.encodeFulfillParameters(
+        clRequestEvent['requestId'],
+        placeId,
+        startDate,
+        endDate,
+        precActual)
+
+    clOperator.fulfillOracleRequest2(
+        clRequestEvent['requestId'],
+        clRequestEvent['payment'],
+        clRequestEvent['callbackAddr'],
+        clRequestEvent['callbackFunctionId'],
+        clRequestEvent['cancelExpiration'],
+        data)
+
+    # proof length grows with log2(members)
+    index = members - 1
+    tx = product.materializeCohortPolicy(riskId, *tree.member(index), tree.proof(index), {'from': insurer})
+    assert 'LogRainPayoutCreated' in tx.events
+    gasRecorder.record('materializeCohortPolicy', members, tx.gas_used)
+
+
+@pytest.mark.parametrize('bundles', BUNDLE_COUNTS)
+def test_gas_create_bundle(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    gasRecorder: GasRecorder,
+    bundles,
+):
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    amount = 10000
+    token.transfer(investor, bundles * amount, {'from': instanceOperator})
+    token.approve(instance.getTreasury(), bundles * amount, {'from': investor})
+
+    for i in range(bundles):
+        tx = riskpool.createBundle(bytes(0), amount, {'from': investor})
+
+    assert riskpool.activeBundles() == bundles
+    gasRecorder.record('createBundle', bundles, tx.gas_used)
+
+
+def create_risk(
+    product,
+    insurer,
+    startDate,
+    endDate,
+    placeId
+):
+    multiplier = product.getPercentageMultiplier()
+    coordMultiplier = product.getCoordinatesMultiplier()
+    precMultiplier = product.getPrecipitationMultiplier()
+
+    trigger = multiplier * 0.1
+    exit = multiplier * 1.0
+    lat = coordMultiplier * -23.550620
+    long = coordMultiplier * -46.634370
+    precHist = precMultiplier * 5.0
+    precDays = 2
+
+    tx = product.createRisk(startDate, endDate, placeId, lat, long, trigger, exit, precHist, precDays, {'from': insurer})
+
+    return (tx, tx.return_value)
@@ -0,0 +1,91 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from scripts.backtest import aggregate, to_prec_actual
+from scripts.history import HistoryCache, history_key, oracle_response
+
+LAT = -23.550620
+LON = -46.634370
+START_DATE = '2023-01-01'
+END_DATE = '2023-01-10'
+DAYS = 10
+
+
+def test_history_cache_roundtrip(tmp_path):
+    cache = HistoryCache(str(tmp_path))
+    fetches = []
+
+    def fetch(lat, lon, startDate, endDate, apiKey):
+        fetches.append((lat, lon, startDate, endDate))
+        return create_payload(startDate, DAYS)
+
+    payload = cache.get_or_fetch(LAT, LON, START_DATE, END_DATE, fetch=fetch)
+    expected = create_payload(START_DATE, DAYS)['history_1h']
+
+    assert len(fetches) == 1
+    assert payload['history_1h']['time'] == expected['time']
+    assert list(payload['history_1h']['precipitation']) == expected['precipitation']
+
+    # same key for string coordinates (js harness), from disk in a new process
+    assert history_key(str(LAT), str(LON), START_DATE, END_DATE) == history_key(LAT, LON, START_DATE, END_DATE)
+
+    cache = HistoryCache(str(tmp_path))
+    payload = cache.get_or_fetch(str(LAT), str(LON), START_DATE, END_DATE, fetch=fetch)
+
+    assert len(fetches) == 1
+    assert cache.hits == 1
+    assert list(payload['history_1h']['precipitation']) == expected['precipitation']
+
+    # mocked oracle response as computed by meteoblue.js
+    (precAvg, precDays) = aggregate(expected['precipitation'])
+    assert oracle_response(LAT, LON, START_DATE, END_DATE, cache=cache) == (int(to_prec_actual(precAvg)), precDays)
+
+
+def test_history_cache_eviction(tmp_path):
+    cache = HistoryCache(str(tmp_path))
+    for idx in range(3):
+        cache.put(LAT + idx, LON, START_DATE, END_DATE, create_payload(START_DATE, DAYS, seed=idx))
+        time.sleep(0.01)
+
+    # access the oldest entry, the second one becomes least recently used
+    assert cache.get(LAT, LON, START_DATE, END_DATE) is not None
+
+    entrySize = os.path.getsize(cache._file(history_key(LAT, LON, START_DATE, END_DATE)))
+    cache = HistoryCache(str(tmp_path), max_bytes=int(2.5 * entrySize))
+    cache.evict()
+
+    assert cache.get(LAT, LON, START_DATE, END_DATE) is not None
+    assert cache.get(LAT + 1, LON, START_DATE, END_DATE) is None
+    assert cache.get(LAT + 2, LON, START_DATE, END_DATE) is not None
+
+
+def test_history_cache_oversized_payload(tmp_path):
+    cache = HistoryCache(str(tmp_path), max_bytes=1)
+    expected = create_payload(START_DATE, DAYS)['history_1h']
+
+    def fetch(lat, lon, startDate, endDate, apiKey):
+        return create_payload(startDate, DAYS)
+
+    # returned as fetched but not cached
+    payload = cache.get_or_fetch(LAT, LON, START_DATE, END_DATE, fetch=fetch)
+
+    assert payload['history_1h']['time'] == expected['time']
+    assert list(payload['history_1h']['precipitation']) == expected['precipitation']
+    assert cache.get(LAT, LON, START_DATE, END_DATE) is None
+    assert os.listdir(str(tmp_path)) == []
+
+
+def create_payload(startDate, days, seed=0):
+    rng = np.random.default_rng(seed)
+    hours = 24 * days
+    precipitation = np.round(rng.gamma(0.3, 2.0, hours) * (rng.random(hours) < 0.2), 2)
+
+    return {
+        'history_1h': {
+            'time': ['{} {:02d}:00'.format(startDate, hour % 24) for hour in range(hours)],
+            'precipitation': precipitation.tolist(),
+        }
+    }
@@ -0,0 +1,156 @@
+import pytest
+import time
+
+from brownie import chain
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import (
+    fund_riskpool,
+    fund_customer,
+)
+
+from scripts.indexer import RainIndexer
+from scripts.instance import GifInstance
+from scripts.util import s2b32
+
+RISKPOOL_FUNDING = 200000
+PREMIUM = 30
+SUM_INSURED = 200
+RISKS = 3
+POLICIES_PER_RISK = 10
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_indexer_topic_filters(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+    customer2: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, RISKS * POLICIES_PER_RISK * PREMIUM)
+    fund_customer(instance, instanceOperator, customer2, token, RISKS * POLICIES_PER_RISK * PREMIUM)
+
+    fromBlock = chain.height
+    holders = [customer, customer2]
+    riskIds = []
+    policyIds = []
+
+    for r in range(RISKS):
+        riskId = create_risk(product, insurer, s2b32('1000{}.saopaulo'.format(r)))
+        riskIds.append(riskId)
+
+        for i in range(POLICIES_PER_RISK):
+            tx = product.applyForPolicy(holders[i % 2], PREMIUM, SUM_INSURED, riskId, {'from': insurer})
+            policyIds.append(tx.return_value)
+
+        # full payout for all policies of the risk
+        respond(gifProduct, product, insurer, riskId, policyIds[-1], 1000)
+        tx = product.processPoliciesForRisk(riskId, 0, {'from': insurer})
+
+        summary = tx.events['LogRainRiskProcessed'][0]
+        assert summary['riskId'] == riskId
+        assert summary['policies'] == POLICIES_PER_RISK
+        assert summary['payouts'] == POLICIES_PER_RISK
+        assert summary['payoutAmount'] == POLICIES_PER_RISK * SUM_INSURED
+
+    indexer = RainIndexer(product, fromBlock)
+
+    # application, policy, claim, payout and processed per policy
+    events = indexer.policy_events(policyIds[4])
+    assert [event['event'] for event in events] == [
+        'LogRainPolicyApplicationCreated',
+        'LogRainPolicyCreated',
+        'LogRainClaimCreated',
+        'LogRainPayoutCreated',
+        'LogRainPolicyProcessed']
+
+    # created, requested, received and processed plus application and policy created per policy
+    assert len(indexer.risk_events(riskIds[1])) == 4 + 2 * POLICIES_PER_RISK
+
+    # application and policy created for every 2nd policy
+    assert len(indexer.holder_events(customer2)) == RISKS * POLICIES_PER_RISK
+
+    # indexer throughput: topic filters vs full scan of the product logs
+    queries = [
+        (indexer.policy_events, policyIds),
+        (indexer.risk_events, riskIds),
+        (indexer.holder_events, holders)]
+
+    for (method, keys) in queries:
+        start = time.perf_counter()
+        filtered = [method(key) for key in keys]
+        duration_filtered = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scanned = [method(key, full_scan=True) for key in keys]
+        duration_scanned = time.perf_counter() - start
+
+        assert [event_ids(events) for events in filtered] == [event_ids(events) for events in scanned]
+
+        print('indexer {} {} queries: topic filter {:.1f}/s full scan {:.1f}/s'.format(
+            method.__name__,
+            len(keys),
+            len(keys) / duration_filtered,
+            len(keys) / duration_scanned))
+
+
+def event_ids(events) -> list:
+    return [(event['blockNumber'], event['logIndex']) for event in events]
+
+
+def create_risk(product, insurer, placeId):
+    multiplier = product.getPercentageMultiplier()
+    coordMultiplier = product.getCoordinatesMultiplier()
+    precMultiplier = product.getPrecipitationMultiplier()
+
+    startDate = time.time() + 100
+    endDate = startDate + 1000
+
+    tx = product.createRisk(
+        startDate, endDate, placeId,
+        coordMultiplier * -23.550620, coordMultiplier * -46.634370,
+        multiplier * 0.1, multiplier * 1.0, precMultiplier * 5.0, 2,
+        {'from': insurer})
+
+    return tx.return_value
+
+
+def respond(gifProduct, product, insurer, riskId, processId, precActual):
+    oracle = gifProduct.getOracle().getContract()
+    clOperator = gifProduct.getOracle().getClOperator()
+    risk = product.getRisk(riskId).dict()
+
+    tx = product.triggerOracle(processId, "", "", {'from': insurer})
+    clRequestEvent = tx.events['OracleRequest'][0]
+
+    data = oracle.encodeFulfillParameters(
+        clRequestEvent['requestId'],
+        risk['placeId'],
+        risk['startDate'],
+        risk['endDate'],
+        precActual)
+
+    clOperator.fulfillOracleRequest2(
+        clRequestEvent['requestId'],
+        clRequestEvent['payment'],
+        clRequestEvent['callbackAddr'],
+        clRequestEvent['callbackFunctionId'],
+        clRequestEvent['cancelExpiration'],
+        data)
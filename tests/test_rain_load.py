@@ -0,0 +1,97 @@
+import pytest
+
+from brownie.network.account import Account
+
+from scripts.const import (
+    INSTANCE_OPERATOR,
+    CHAINLINK_NODE_OPERATOR,
+    RISKPOOL_KEEPER,
+    INVESTOR,
+    PRODUCT_OWNER,
+    INSURER,
+)
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.deploy_product import RISKPOOL_WALLET_ALLOWANCE
+from scripts.instance import GifInstance
+from scripts.load import generate_load, PAYOUT_FULL
+
+RISKS = 2
+POLICIES = 4
+BUNDLES = 1
+HOLDERS = 2
+INSURERS = 2
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_generate_load_smoke(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    chainlinkNodeOperator: Account,
+    riskpoolKeeper: Account,
+    riskpoolWallet: Account,
+    investor: Account,
+    productOwner: Account,
+    insurer: Account,
+):
+    product = gifProduct.getContract()
+    token = gifProduct.getToken()
+
+    token.approve(instance.getTreasury(), RISKPOOL_WALLET_ALLOWANCE, {'from': riskpoolWallet})
+
+    # load setup from the session deployment instead of deploy_load_setup()
+    d = {
+        'accounts': {
+            INSTANCE_OPERATOR: instanceOperator,
+            CHAINLINK_NODE_OPERATOR: chainlinkNodeOperator,
+            RISKPOOL_KEEPER: riskpoolKeeper,
+            INVESTOR: investor,
+            PRODUCT_OWNER: productOwner,
+            INSURER: insurer,
+        },
+        'token': token,
+        'instance': instance,
+        'product': product,
+        'oracle': gifProduct.getOracle().getContract(),
+        'clOperator': gifProduct.getOracle().getClOperator(),
+        'riskpool': gifProduct.getRiskpool().getContract(),
+    }
+
+    report = generate_load(
+        d,
+        seed=1,
+        risks=RISKS,
+        policies=POLICIES,
+        bundles=BUNDLES,
+        holders=HOLDERS,
+        insurers=INSURERS,
+        payout_distribution=PAYOUT_FULL)
+
+    assert report['gas']['createBundle']['count'] == BUNDLES
+    assert report['gas']['createRisk']['count'] == RISKS
+    assert report['gas']['applyForPolicy']['count'] == POLICIES
+    assert report['transactions']['issuance'] == POLICIES
+
+    for phase in ['issuance', 'oracle', 'settlement']:
+        assert report['duration'][phase] > 0
+        assert report['throughput'][phase] > 0
+
+    for operation, gas in report['gas'].items():
+        assert 0 < gas['p50'] <= gas['p90'] <= gas['p99'] <= gas['max']
+
+    # risks with policies are responded to and settled
+    settled = report['settlement_time'].keys()
+    assert len(settled) > 0
+    assert report['settlement_latency'].keys() == settled
+
+    for risk_id in settled:
+        assert product.policies(risk_id) == 0
+        assert report['settlement_latency'][risk_id] >= report['settlement_time'][risk_id]
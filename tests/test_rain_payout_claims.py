@@ -0,0 +1,180 @@
+import brownie
+import pytest
+import time
+
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import (
+    fund_riskpool,
+    fund_customer,
+)
+
+from scripts.instance import GifInstance
+from scripts.util import s2b32
+
+RISKPOOL_FUNDING = 200000
+PREMIUM = 300
+SUM_INSURED = 2000
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_claim_payouts(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+    customer2: Account,
+    theOutsider: Account,
+):
+    instanceService = instance.getInstanceService()
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, 2 * PREMIUM)
+    fund_customer(instance, instanceOperator, customer2, token, PREMIUM)
+
+    placeId = s2b32('10001.saopaulo')
+    riskId = create_risk(product, insurer, placeId)
+
+    with brownie.reverts():
+        product.setPayoutClaimMode(riskId, True, {'from': theOutsider})
+
+    with brownie.reverts('ERROR:RAIN-100:RISK_UNKNOWN'):
+        product.setPayoutClaimMode(s2b32('unknown'), True, {'from': insurer})
+
+    tx = product.setPayoutClaimMode(riskId, True, {'from': insurer})
+    assert 'LogRainPayoutClaimModeSet' in tx.events
+    assert product.getPayoutClaimMode(riskId)
+
+    holders = [customer, customer2, customer]
+    policyIds = [product.applyForPolicy(holder, PREMIUM, SUM_INSURED, riskId, {'from': insurer}).return_value for holder in holders]
+
+    # no oracle response yet
+    with brownie.reverts('ERROR:RAIN-103:PAYOUT_CLAIM_MODE_DISABLED'):
+        product.claimPayout(policyIds[0], {'from': customer})
+
+    # full payout
+    respond(gifProduct, product, insurer, riskId, policyIds[0], 1000)
+
+    settlement = product.getSettlement(riskId).dict()
+    assert settlement['claimMode']
+    assert settlement['policies'] == 3
+
+    with brownie.reverts('ERROR:RAIN-101:ORACLE_ALREADY_RESPONDED'):
+        product.setPayoutClaimMode(riskId, False, {'from': insurer})
+
+    # policy holder claims its own payout
+    balanceBefore = token.balanceOf(customer)
+    tx = product.claimPayout(policyIds[0], {'from': customer})
+    assert 'LogRainPayoutCreated' in tx.events
+    assert token.balanceOf(customer) == balanceBefore + SUM_INSURED
+
+    # claim and payout are recorded by gif
+    assert instanceService.claims(policyIds[0]) == 1
+    assert instanceService.payouts(policyIds[0]) == 1
+    assert instanceService.getPayout(policyIds[0], 0).dict()['amount'] == SUM_INSURED
+
+    with brownie.reverts('ERROR:RAIN-104:POLICY_NOT_CLAIMABLE'):
+        product.claimPayout(policyIds[0], {'from': customer})
+
+    with brownie.reverts('ERROR:RAIN-102:POLICY_UNKNOWN'):
+        product.claimPayout(s2b32('unknown'), {'from': customer})
+
+    # relayer claims for the remaining holders, already claimed policies are skipped
+    balanceBefore = [token.balanceOf(customer), token.balanceOf(customer2)]
+    tx = product.claimPayouts(policyIds, {'from': theOutsider})
+    assert tx.return_value == 2
+    assert len(tx.events['LogRainPayoutCreated']) == 2
+
+    assert token.balanceOf(customer) == balanceBefore[0] + SUM_INSURED
+    assert token.balanceOf(customer2) == balanceBefore[1] + SUM_INSURED
+    assert product.policies(riskId) == 0
+    assert product.getRiskExposure(riskId) == (0, 0)
+    assert product.getPlaceExposure(placeId) == (0, 0)
+
+
+def test_claim_payout_mode_disabled(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, PREMIUM)
+
+    riskId = create_risk(product, insurer, s2b32('10001.saopaulo'))
+    policyId = product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskId, {'from': insurer}).return_value
+    respond(gifProduct, product, insurer, riskId, policyId, 1000)
+
+    assert not product.getSettlement(riskId).dict()['claimMode']
+
+    with brownie.reverts('ERROR:RAIN-103:PAYOUT_CLAIM_MODE_DISABLED'):
+        product.claimPayout(policyId, {'from': customer})
+
+    with brownie.reverts('ERROR:RAIN-103:PAYOUT_CLAIM_MODE_DISABLED'):
+        product.claimPayouts([policyId], {'from': customer})
+
+    # push settlement by the insurer
+    product.processPoliciesForRisk(riskId, 0, {'from': insurer})
+    assert product.policies(riskId) == 0
+
+
+def create_risk(product, insurer, placeId):
+    multiplier = product.getPercentageMultiplier()
+    coordMultiplier = product.getCoordinatesMultiplier()
+    precMultiplier = product.getPrecipitationMultiplier()
+
+    startDate = time.time() + 100
+    endDate = startDate + 1000
+
+    tx = product.createRisk(
+        startDate, endDate, placeId,
+        coordMultiplier * -23.550620, coordMultiplier * -46.634370,
+        multiplier * 0.1, multiplier * 1.0, precMultiplier * 5.0, 2,
+        {'from': insurer})
+
+    return tx.return_value
+
+
+def respond(gifProduct, product, insurer, riskId, processId, precActual):
+    oracle = gifProduct.getOracle().getContract()
+    clOperator = gifProduct.getOracle().getClOperator()
+    risk = product.getRisk(riskId).dict()
+
+    tx = product.triggerOracle(processId, "", "", {'from': insurer})
+    clRequestEvent = tx.events['OracleRequest'][0]
+
+    data = oracle.encodeFulfillParameters(
+        clRequestEvent['requestId'],
+        risk['placeId'],
+        risk['startDate'],
+        risk['endDate'],
+        precActual)
+
+    clOperator.fulfillOracleRequest2(
+        clRequestEvent['requestId'],
+        clRequestEvent['payment'],
+        clRequestEvent['callbackAddr'],
+        clRequestEvent['callbackFunctionId'],
+        clRequestEvent['cancelExpiration'],
+        data)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from brownie.test import given, strategy
+from hypothesis import settings
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.payout import (
+    PERCENTAGE_MULTIPLIER,
+    PRECIPITATION_MAX,
+    calculate_payout_percentage,
+    calculate_payout,
+)
+
+SAMPLES = 200
+SEED = 42
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+@given(
+    trigger=strategy('uint256', max_value=PERCENTAGE_MULTIPLIER),
+    exitDelta=strategy('uint256', min_value=1, max_value=2**40),
+    precHist=strategy('uint256', min_value=1, max_value=PRECIPITATION_MAX - 1),
+    precDays=strategy('uint256', max_value=10),
+    precActual=strategy('uint256', max_value=PRECIPITATION_MAX - 1),
+    precDaysActual=strategy('uint256', max_value=10),
+    sumInsured=strategy('uint256', max_value=2**63),
+)
+@settings(max_examples=SAMPLES)
+def test_payout_engine_matches_contract(
+    gifProduct: GifProduct,
+    trigger,
+    exitDelta,
+    precHist,
+    precDays,
+    precActual,
+    precDaysActual,
+    sumInsured,
+):
+    product = gifProduct.getContract()
+    exit = trigger + exitDelta
+
+    expectedPercentage = product.calculatePayoutPercentage(trigger, exit, precHist, precDays, precActual, precDaysActual)
+    percentage = calculate_payout_percentage(trigger, exit, precHist, precDays, precActual, precDaysActual)
+    assert int(percentage) == expectedPercentage
+
+    expectedPayout = product.calculatePayout(expectedPercentage, sumInsured)
+    payout = calculate_payout(percentage, sumInsured)
+    assert int(payout) == expectedPayout
+
+
+def test_payout_engine_matches_contract_vectorized(gifProduct: GifProduct):
+    product = gifProduct.getContract()
+    rng = np.random.default_rng(SEED)
+
+    trigger = rng.integers(0, PERCENTAGE_MULTIPLIER, SAMPLES, dtype=np.uint64)
+    exit = trigger + rng.integers(1, PERCENTAGE_MULTIPLIER, SAMPLES, dtype=np.uint64)
+    precHist = rng.integers(1, 1000, SAMPLES, dtype=np.uint64)
+    precDays = rng.integers(0, 5, SAMPLES, dtype=np.uint64)
+    precActual = rng.integers(0, 3000, SAMPLES, dtype=np.uint64)
+    precDaysActual = rng.integers(0, 5, SAMPLES, dtype=np.uint64)
+    sumInsured = rng.integers(0, 10**12, SAMPLES, dtype=np.uint64)
+
+    # boundaries: no extra, extra == trigger, full payout
+    precActual[:10] = precHist[:10]
+    precActual[10:20] = precHist[10:20] + 1
+    trigger[10:20] = PERCENTAGE_MULTIPLIER * 1 // precHist[10:20]
+    exit[20:30] = trigger[20:30] + 1
+    precActual[20:30] = 2 * precHist[20:30]
+    precDaysActual[20:30] = precDays[20:30]
+
+    percentage = calculate_payout_percentage(trigger, exit, precHist, precDays, precActual, precDaysActual)
+    payout = calculate_payout(percentage, sumInsured)
+
+    assert np.any(percentage == PERCENTAGE_MULTIPLIER)
+    assert np.any(percentage == 0)
+
+    for i in range(SAMPLES):
+        expectedPercentage = product.calculatePayoutPercentage(
+            int(trigger[i]),
+            int(exit[i]),
+            int(precHist[i]),
+            int(precDays[i]),
+            int(precActual[i]),
+            int(precDaysActual[i]))
+
+        assert int(percentage[i]) == expectedPercentage
+        assert int(payout[i]) == product.calculatePayout(expectedPercentage, int(sumInsured[i]))
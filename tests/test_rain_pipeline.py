@@ -0,0 +1,185 @@
+import brownie
+import pytest
+import time
+
+from brownie import network, web3
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import (
+    fund_riskpool,
+    fund_customer,
+)
+
+from scripts.instance import GifInstance
+from scripts.pipeline import GasPricer, PendingTransaction, TxPipeline
+from scripts.util import s2b32
+
+RISKPOOL_FUNDING = 200000
+PREMIUM = 300
+SUM_INSURED = 2000
+POLICIES = 12
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_pipeline_multiple_insurers(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    productOwner: Account,
+    insurer: Account,
+    customer: Account,
+    theOutsider: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, POLICIES * PREMIUM)
+
+    product.grantRole(product.INSURER_ROLE(), theOutsider, {'from': productOwner})
+    insurers = [insurer, theOutsider]
+    nonces = {str(a): web3.eth.get_transaction_count(str(a)) for a in insurers}
+
+    riskId = create_risk(product, insurer)
+
+    # small window to exercise waiting for capacity
+    pipeline = TxPipeline(insurers, max_pending=2)
+    pending = [
+        pipeline.submit(product.applyForPolicy, customer, PREMIUM, SUM_INSURED, riskId)
+        for i in range(POLICIES)]
+
+    receipts = pipeline.flush()
+
+    assert len(receipts) == POLICIES
+    assert pipeline.submitted == POLICIES
+    assert pipeline.pending_count() == 0
+    assert product.policies(riskId) == POLICIES
+
+    # both insurers used, consecutive nonces per insurer
+    for a in insurers:
+        signer_nonces = [p.nonce for p in pending if str(p.signer) == str(a)]
+        assert len(signer_nonces) > 0
+        assert signer_nonces == list(range(nonces[str(a)], nonces[str(a)] + len(signer_nonces)))
+
+    for p, tx in zip(pending, receipts):
+        assert tx.status == 1
+        assert tx.sender == p.signer
+        assert p.receipt == tx
+
+
+def test_pipeline_failed_submission(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, 2 * PREMIUM)
+
+    riskId = create_risk(product, insurer)
+    pipeline = TxPipeline([insurer])
+
+    # unknown risk, the transaction is never broadcast and no nonce is consumed
+    with brownie.reverts('ERROR:RAIN-004:RISK_UNDEFINED'):
+        pipeline.submit(product.applyForPolicy, customer, PREMIUM, SUM_INSURED, s2b32('unknown'))
+
+    assert pipeline.failed == 1
+
+    # nonce used outside of the pipeline
+    product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskId, {'from': insurer})
+
+    p = pipeline.submit(product.applyForPolicy, customer, PREMIUM, SUM_INSURED, riskId)
+    tx = pipeline.wait(p)
+
+    assert tx.status == 1
+    assert product.policies(riskId) == 2
+
+
+def test_pipeline_resubmit_mined(
+    monkeypatch,
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, PREMIUM)
+
+    riskId = create_risk(product, insurer)
+
+    # every transaction is stuck right away
+    pipeline = TxPipeline([insurer], stuck_timeout=0)
+    p = pipeline.submit(product.applyForPolicy, customer, PREMIUM, SUM_INSURED, riskId)
+    p.txs[0].wait(1)
+
+    # mined after poll and _resubmit found it unconfirmed, replace fails with already confirmed
+    confirmed = PendingTransaction.confirmed
+    unconfirmed = [True, True]
+    monkeypatch.setattr(
+        PendingTransaction, 'confirmed',
+        lambda self: False if unconfirmed and unconfirmed.pop() else confirmed(self))
+
+    tx = pipeline.wait(p)
+
+    assert len(unconfirmed) == 0
+    assert tx.status == 1
+    assert tx == p.txs[0]
+    assert pipeline.resubmitted == 0
+    assert product.policies(riskId) == 1
+
+
+@pytest.mark.parametrize('configured', [0, False, None, 'auto'])
+def test_gas_pricer_node_price(monkeypatch, configured):
+    monkeypatch.setattr(network, 'gas_price', lambda: configured)
+    pricer = GasPricer(multiplier=2)
+
+    assert pricer.gas_price() == int(web3.eth.gas_price * 2)
+    assert GasPricer(multiplier=2, max_gas_price=1).gas_price() == 1
+
+
+def test_gas_pricer_configured_price(monkeypatch):
+    monkeypatch.setattr(network, 'gas_price', lambda: 7)
+
+    assert GasPricer(multiplier=2).gas_price() == 7
+
+
+def create_risk(product, insurer):
+    multiplier = product.getPercentageMultiplier()
+    coordMultiplier = product.getCoordinatesMultiplier()
+    precMultiplier = product.getPrecipitationMultiplier()
+
+    startDate = time.time() + 100
+    endDate = time.time() + 1000
+
+    tx = product.createRisk(
+        startDate, endDate, s2b32('10001.saopaulo'),
+        coordMultiplier * -23.550620, coordMultiplier * -46.634370,
+        multiplier * 0.1, multiplier * 1.0, precMultiplier * 5.0, 2,
+        {'from': insurer})
+
+    return tx.return_value
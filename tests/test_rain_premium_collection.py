@@ -17,6 +17,7 @@ from scripts.product import (
 from scripts.setup import (
     fund_riskpool,
     fund_customer,
+    sign_permit,
 )
 
 from scripts.product import (
@@ -237,6 +238,181 @@ def test_premium_payment_by_subsidies(
     assert policy['premiumPaidAmount'] == premium
 
 
+def test_batched_premium_payment(
+    instance: GifInstance, 
+    instanceOperator, 
+    gifProduct: GifProduct,
+    riskpoolWallet,
+    investor,
+    insurer,
+    customer,
+    customer2
+):
+    instanceService = instance.getInstanceService()
+
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    erc20Token = gifProduct.getToken()
+
+    riskpoolFunding = 200000
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, erc20Token, riskpoolFunding)
+
+    riskId = create_risk(product, insurer)
+
+    # policies without premium funds, 2 for customer, 1 for customer2 and 1 more for customer
+    premium = 300
+    sumInsured = 2000
+    holders = [customer, customer, customer2, customer]
+    processIds = []
+    for holder in holders:
+        tx = product.applyForPolicy(holder, premium, sumInsured, riskId, {'from': insurer})
+        processIds.append(tx.return_value)
+
+    # policy holders only provide the allowance for the treasury
+    for holder in [customer, customer2]:
+        erc20Token.approve(instance.getTreasury(), len(holders) * premium, {'from': holder})
+
+    # distributor pays all premiums in a single transaction
+    distributor = accounts.add()
+    accounts[9].transfer(distributor, 100000000)
+    erc20Token.transfer(distributor, len(holders) * premium, {'from': instanceOperator})
+    erc20Token.approve(product, len(holders) * premium, {'from': distributor})
+
+    riskpoolBefore = erc20Token.balanceOf(riskpoolWallet)
+    amounts = [premium] * len(holders)
+
+    with brownie.reverts('ERROR:RAIN-060:LENGTH_MISMATCH'):
+        product.collectPremiums(processIds, distributor, amounts[1:], {'from': insurer})
+
+    # missing treasury allowance of a single policy holder fails the whole batch
+    erc20Token.approve(instance.getTreasury(), 0, {'from': customer2})
+    with brownie.reverts('ERROR:RAIN-063:PREMIUM_COLLECTION_FAILED'):
+        product.collectPremiums(processIds, distributor, amounts, {'from': insurer})
+
+    erc20Token.approve(instance.getTreasury(), len(holders) * premium, {'from': customer2})
+
+    tx = product.collectPremiums(processIds, distributor, amounts, {'from': insurer})
+    (success, fee, netPremium) = tx.return_value
+
+    assert success
+    assert fee + netPremium == len(holders) * premium
+    assert erc20Token.balanceOf(distributor) == 0
+    assert erc20Token.balanceOf(customer) == 0
+    assert erc20Token.balanceOf(customer2) == 0
+    assert erc20Token.balanceOf(product) == 0
+    assert erc20Token.balanceOf(riskpoolWallet) == riskpoolBefore + netPremium
+
+    # one direct transfer per run of consecutive policies of the same holder, nothing via the product
+    transfers = tx.events['Transfer']
+    assert [t['to'] for t in transfers if t['from'] == distributor] == [customer, customer2, customer]
+    assert [t['value'] for t in transfers if t['from'] == distributor] == [2 * premium, premium, premium]
+    assert len([t for t in transfers if t['from'] == product or t['to'] == product]) == 0
+
+    for processId in processIds:
+        policy = instanceService.getPolicy(processId).dict()
+        assert policy['premiumExpectedAmount'] == premium
+        assert policy['premiumPaidAmount'] == premium
+
+
+def test_apply_for_policy_with_permit(
+    instance: GifInstance, 
+    instanceOperator, 
+    gifProduct: GifProduct,
+    riskpoolWallet,
+    investor,
+    insurer
+):
+    instanceService = instance.getInstanceService()
+
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    erc20Token = gifProduct.getToken()
+    treasury = instance.getTreasury()
+
+    riskpoolFunding = 200000
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, erc20Token, riskpoolFunding)
+
+    riskId = create_risk(product, insurer)
+
+    # policy holder with premium funds but without allowance, needs a private key to sign
+    premium = 300
+    sumInsured = 2000
+    holder = accounts.add()
+    erc20Token.transfer(holder, premium, {'from': instanceOperator})
+    deadline = time.time() + 3600
+
+    # permit signed for a smaller amount
+    (v, r, s) = sign_permit(erc20Token, holder, treasury, premium - 1, deadline)
+    with brownie.reverts('ERROR:RAIN-072:PREMIUM_ALLOWANCE_INSUFFICIENT'):
+        product.applyForPolicyWithPermit(holder, premium, sumInsured, riskId, deadline, v, r, s, {'from': insurer})
+
+    (v, r, s) = sign_permit(erc20Token, holder, treasury, premium, deadline)
+    riskpoolBefore = erc20Token.balanceOf(riskpoolWallet)
+
+    tx = product.applyForPolicyWithPermit(holder, premium, sumInsured, riskId, deadline, v, r, s, {'from': insurer})
+    processId = tx.return_value
+
+    assert 'LogRainPolicyCreated' in tx.events
+    assert product.policies(riskId) == 1
+    assert erc20Token.balanceOf(holder) == 0
+    assert erc20Token.allowance(holder, treasury) == 0
+    assert erc20Token.balanceOf(riskpoolWallet) > riskpoolBefore
+
+    policy = instanceService.getPolicy(processId).dict()
+    assert policy['premiumExpectedAmount'] == premium
+    assert policy['premiumPaidAmount'] == premium
+
+    # permit without funds, the policy is not issued
+    (v, r, s) = sign_permit(erc20Token, holder, treasury, premium, deadline)
+    with brownie.reverts('ERROR:RAIN-071:PREMIUM_NOT_PAID'):
+        product.applyForPolicyWithPermit(holder, premium, sumInsured, riskId, deadline, v, r, s, {'from': insurer})
+
+    assert product.policies(riskId) == 1
+
+
+def test_apply_for_policy_with_consumed_permit(
+    instance: GifInstance, 
+    instanceOperator, 
+    gifProduct: GifProduct,
+    riskpoolWallet,
+    investor,
+    insurer,
+    theOutsider
+):
+    instanceService = instance.getInstanceService()
+
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    erc20Token = gifProduct.getToken()
+    treasury = instance.getTreasury()
+
+    riskpoolFunding = 200000
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, erc20Token, riskpoolFunding)
+
+    riskId = create_risk(product, insurer)
+
+    premium = 300
+    sumInsured = 2000
+    holder = accounts.add()
+    erc20Token.transfer(holder, premium, {'from': instanceOperator})
+    deadline = time.time() + 3600
+
+    # signature submitted by a third party before the insurer transaction
+    (v, r, s) = sign_permit(erc20Token, holder, treasury, premium, deadline)
+    erc20Token.permit(holder, treasury, premium, deadline, v, r, s, {'from': theOutsider})
+    assert erc20Token.allowance(holder, treasury) == premium
+
+    tx = product.applyForPolicyWithPermit(holder, premium, sumInsured, riskId, deadline, v, r, s, {'from': insurer})
+    processId = tx.return_value
+
+    assert 'LogRainPolicyCreated' in tx.events
+    assert product.policies(riskId) == 1
+    assert erc20Token.balanceOf(holder) == 0
+
+    policy = instanceService.getPolicy(processId).dict()
+    assert policy['premiumPaidAmount'] == premium
+
+
 def create_risk(
     product,
     insurer
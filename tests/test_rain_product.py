@@ -211,7 +211,8 @@ def test_happy_path(
     assert application[0]['state'] == 2
     assert application[0]['premiumAmount'] == premium[0]
     assert application[0]['sumInsuredAmount'] == sumInsured[0]
-    assert application[0]['data'] == riskId[0]
+    # application data: abi.encode(riskId, placeId, startDate, endDate)
+    assert riskId[0] == application[0]['data'][:32]
     assert policy[0]['state'] == 0
     assert policy[0]['premiumExpectedAmount'] == premium[0]
     assert policy[0]['premiumPaidAmount'] == premium[0]
@@ -223,7 +224,8 @@ def test_happy_path(
     assert application[1]['state'] == 2
     assert application[1]['premiumAmount'] == premium[1]
     assert application[1]['sumInsuredAmount'] == sumInsured[1]
-    assert application[1]['data'] == riskId[1]
+    # application data: abi.encode(riskId, placeId, startDate, endDate)
+    assert riskId[1] == application[1]['data'][:32]
     assert policy[1]['state'] == 0
     assert policy[1]['premiumExpectedAmount'] == premium[1]
     assert policy[1]['premiumPaidAmount'] == premium[1]
@@ -232,6 +232,16 @@ def test_process_policies_for_risk(
     assert risk['responseAt'] > risk['createdAt']
     assert risk['precActual'] == precActual
 
+    # settlement snapshot and cached policy data used by policy processing
+    settlement = product.getSettlement(riskId[0]).dict()
+    assert settlement['payoutPercentage'] == risk['payoutPercentage']
+    assert settlement['responseAt'] == risk['responseAt']
+    assert settlement['policies'] == product.policies(riskId[0])
+
+    policyData = product.getPolicyData(policyId[0]).dict()
+    assert policyData['riskId'] == riskId[0]
+    assert policyData['sumInsured'] == sumInsured[0]
+
 
     print('--- step test process policies (risk[0]) -----------------')
 
@@ -445,8 +455,8 @@ def test_process_policies_mix_batch_individual_processing(
     with brownie.reverts('AccessControl: account 0x5aeda56215b167893e80b4fe645ba6d5bab767de is missing role 0xf098b7742e998f92a3c749f35e64ef555edcecec4b78a00c532a4f385915955b'):
         product.processPolicy(policyId[3], {'from': customer})
 
-    # try to process invalid processId
-    with brownie.reverts('ERROR:POC-101:APPLICATION_DOES_NOT_EXIST'):
+    # try to process invalid processId (no cached policy data)
+    with brownie.reverts('ERROR:RAIN-031:RISK_ID_INVALID'):
         product.processPolicy(s2b32('whateverId'), {'from': insurer})
 
     assert product.policies(riskId[0]) == 5
@@ -99,6 +99,12 @@ def test_underwrite_after_apply_with_riskpool_empty(
 
     assert process_id == product.getApplicationId(0)
 
+    # risk of the application is known from application creation on
+    policyData = product.getPolicyData(process_id).dict()
+    assert policyData['riskId'] == riskId
+    assert policyData['sumInsured'] == sumInsured
+    assert policyData['premium'] == premium
+
     # ensure that explicity underwriting still fails
     tx = product.underwrite(process_id, {'from': insurer})
     assert False == tx.return_value
@@ -133,6 +139,8 @@ def test_underwrite_after_apply_with_riskpool_empty(
     events = tx.events
     print(events)
     assert 'LogRainPolicyCreated' in events
+    assert 1 == product.policies(riskId)
+    assert product.getRiskExposure(riskId) == (sumInsured, premium)
 
     # ensure application exists and has state Applied
     application = instanceService.getApplication(process_id)
@@ -0,0 +1,85 @@
+import pytest
+
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import (
+    fund_riskpool,
+    fund_customer,
+)
+
+from scripts.deploy_rain import create_risk
+from scripts.instance import GifInstance
+from scripts.readmodel import Risk, get_read_model
+from scripts.util import s2b32
+
+RISKPOOL_FUNDING = 200000
+PREMIUM = 300
+SUM_INSURED = 2000
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_read_model(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    instanceService = instance.getInstanceService()
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    rm = get_read_model()
+    rm.invalidate()
+
+    assert rm.token_decimals(token) == token.decimals()
+    assert rm.token_symbol(token) == token.symbol()
+    assert rm.multipliers(product) == (
+        product.getPercentageMultiplier(),
+        product.getCoordinatesMultiplier(),
+        product.getPrecipitationMultiplier())
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, PREMIUM)
+
+    riskId = create_risk(product, insurer, placeId=s2b32('10001.saopaulo'))
+
+    risks = rm.risks(product)
+    assert len(risks) == 1
+    assert isinstance(risks[0], Risk)
+    assert risks[0].id == riskId
+    assert risks[0].response_at == 0
+    assert not hasattr(risks[0], '__dict__')
+
+    # same block, values served from the cache
+    cached = len(rm._mutable)
+    assert rm.risk(product, riskId) == risks[0]
+    assert len(rm._mutable) == cached
+
+    # new block, mutable values are read again
+    policyId = product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskId, {'from': insurer}).return_value
+
+    policies = rm.applications(instanceService, product)
+    assert len(policies) == 1
+    assert policies[0].process_id == policyId
+    assert policies[0].owner == customer
+    assert policies[0].risk_id == riskId
+    assert policies[0].kind == 'policy'
+    assert policies[0].sum_insured == SUM_INSURED
+    assert policies[0].premium_paid == PREMIUM
+
+    bundles = rm.bundles(instanceService, riskpool)
+    assert len(bundles) == 1
+    assert bundles[0].locked_capital == SUM_INSURED
+    assert bundles[0].capacity == bundles[0].capital - SUM_INSURED
@@ -0,0 +1,243 @@
+import asyncio
+import pytest
+import time
+
+from brownie import chain
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import (
+    fund_riskpool,
+    fund_customer,
+)
+
+from scripts.instance import GifInstance
+from scripts.settlement import LATENCY_WINDOW, SettlementDaemon, SettlementMetrics
+from scripts.util import s2b32
+
+RISKPOOL_FUNDING = 200000
+PREMIUM = 300
+SUM_INSURED = 2000
+POLICIES = [5, 3]
+
+# small gas limit to force several batches per risk
+BATCH_GAS_LIMIT = 1000000
+POLL_INTERVAL = 0.1
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_settlement_daemon_events(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    productOwner: Account,
+    insurer: Account,
+    customer: Account,
+    theOutsider: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, sum(POLICIES) * PREMIUM)
+
+    # 2nd insurer key for the daemon
+    product.grantRole(product.INSURER_ROLE(), theOutsider, {'from': productOwner})
+
+    riskIds = [create_risk_with_policies(product, insurer, customer, idx, n) for idx, n in enumerate(POLICIES)]
+
+    # daemon follows the events from here on
+    daemon = SettlementDaemon(
+        product,
+        gifProduct.getOracle().getContract(),
+        [insurer, theOutsider],
+        poll_interval=POLL_INTERVAL,
+        batch_gas_limit=BATCH_GAS_LIMIT,
+        from_block=chain.height + 1)
+
+    for riskId in riskIds:
+        respond(gifProduct, product, insurer, riskId)
+
+    asyncio.run(daemon.run(stop_when_idle=True))
+    metrics = daemon.get_metrics()
+
+    for riskId in riskIds:
+        assert product.policies(riskId) == 0
+
+    assert metrics['requests'] == len(POLICIES)
+    assert metrics['responses'] == len(POLICIES)
+    assert metrics['risks_settled'] == len(POLICIES)
+    assert metrics['policies'] == sum(POLICIES)
+    assert metrics['batches'] > len(POLICIES)
+    assert metrics['queue_depth'] == 0
+    assert metrics['failed_transactions'] == 0
+    assert metrics['response_to_payout_count'] == len(POLICIES)
+
+
+def test_settlement_daemon_recovery(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, POLICIES[0] * PREMIUM)
+
+    riskId = create_risk_with_policies(product, insurer, customer, 0, POLICIES[0])
+    respond(gifProduct, product, insurer, riskId)
+
+    # oracle response before the daemon start is picked up from the risk state
+    daemon = SettlementDaemon(
+        product,
+        gifProduct.getOracle().getContract(),
+        [insurer],
+        poll_interval=POLL_INTERVAL)
+
+    asyncio.run(daemon.run(stop_when_idle=True))
+
+    assert product.policies(riskId) == 0
+    assert daemon.get_metrics()['risks_settled'] == 1
+    assert daemon.get_metrics()['policies'] == POLICIES[0]
+
+
+def test_settlement_daemon_claim_mode(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, sum(POLICIES) * PREMIUM)
+
+    # policy holders of the 1st risk claim their payouts themselves
+    riskIds = [create_risk_with_policies(product, insurer, customer, idx, n) for idx, n in enumerate(POLICIES)]
+    product.setPayoutClaimMode(riskIds[0], True, {'from': insurer})
+
+    for riskId in riskIds:
+        respond(gifProduct, product, insurer, riskId)
+
+    product.claimPayout(product.getPolicyId(riskIds[0], 0), {'from': customer})
+
+    daemon = SettlementDaemon(
+        product,
+        gifProduct.getOracle().getContract(),
+        [insurer],
+        poll_interval=POLL_INTERVAL)
+
+    asyncio.run(daemon.run(stop_when_idle=True))
+    metrics = daemon.get_metrics()
+
+    # claim mode risk left to the policy holders
+    assert product.policies(riskIds[0]) == POLICIES[0] - 1
+    assert product.policies(riskIds[1]) == 0
+    assert metrics['risks_settled'] == 1
+    assert metrics['claim_mode_risks'] == 1
+    assert metrics['policies'] == POLICIES[1]
+
+    # unclaimed policies are processed after the grace period
+    gracePeriod = 3600
+    daemon = SettlementDaemon(
+        product,
+        gifProduct.getOracle().getContract(),
+        [insurer],
+        poll_interval=POLL_INTERVAL,
+        claim_grace_period=gracePeriod)
+
+    chain.sleep(gracePeriod)
+    chain.mine()
+
+    asyncio.run(daemon.run(stop_when_idle=True))
+    metrics = daemon.get_metrics()
+
+    assert product.policies(riskIds[0]) == 0
+    assert metrics['risks_settled'] == 1
+    assert metrics['claim_mode_risks'] == 0
+    assert metrics['policies'] == POLICIES[0] - 1
+
+
+def test_settlement_metrics_window():
+    metrics = SettlementMetrics()
+    latencies = [float(idx) for idx in range(2 * LATENCY_WINDOW)]
+
+    for latency in latencies:
+        metrics.add_response_to_payout(latency)
+
+    # totals cover all risks, the p50 only the most recent window
+    values = metrics.as_dict(0, 0)
+    assert len(metrics.response_to_payout) == LATENCY_WINDOW
+    assert values['response_to_payout_count'] == len(latencies)
+    assert values['response_to_payout_sum'] == sum(latencies)
+    assert values['response_to_payout_max'] == latencies[-1]
+    assert values['response_to_payout_p50'] == LATENCY_WINDOW + (LATENCY_WINDOW - 1) / 2
+
+
+def create_risk_with_policies(product, insurer, customer, idx, policies):
+    multiplier = product.getPercentageMultiplier()
+    coordMultiplier = product.getCoordinatesMultiplier()
+    precMultiplier = product.getPrecipitationMultiplier()
+
+    startDate = time.time() + 100
+    endDate = time.time() + 1000
+    placeId = s2b32('1000{}.place'.format(idx))
+
+    tx = product.createRisk(
+        startDate, endDate, placeId,
+        coordMultiplier * -23.550620, coordMultiplier * -46.634370,
+        multiplier * 0.1, multiplier * 1.0, precMultiplier * 5.0, 2,
+        {'from': insurer})
+    riskId = tx.return_value
+
+    for i in range(policies):
+        product.applyForPolicy(customer, PREMIUM, SUM_INSURED, riskId, {'from': insurer})
+
+    return riskId
+
+
+def respond(gifProduct, product, insurer, riskId):
+    oracle = gifProduct.getOracle().getContract()
+    clOperator = gifProduct.getOracle().getClOperator()
+    risk = product.getRisk(riskId).dict()
+
+    tx = product.triggerOracle(product.getPolicyId(riskId, 0), "", "", {'from': insurer})
+    clRequestEvent = tx.events['OracleRequest'][0]
+
+    # full payout
+    precActual = 1000
+    data = oracle.encodeFulfillParameters(
+        clRequestEvent['requestId'],
+        risk['placeId'],
+        risk['startDate'],
+        risk['endDate'],
+        precActual)
+
+    clOperator.fulfillOracleRequest2(
+        clRequestEvent['requestId'],
+        clRequestEvent['payment'],
+        clRequestEvent['callbackAddr'],
+        clRequestEvent['callbackFunctionId'],
+        clRequestEvent['cancelExpiration'],
+        data)
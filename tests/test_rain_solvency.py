@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+import time
+
+from brownie.network.account import Account
+
+from scripts.product import (
+    GifProduct
+)
+
+from scripts.setup import (
+    fund_riskpool,
+    fund_customer,
+)
+
+from scripts.instance import GifInstance
+from scripts.portfolio import read_portfolio
+from scripts.solvency import PlaceDistribution, simulate
+from scripts.util import s2b32
+
+RISKPOOL_FUNDING = 10000
+PREMIUM = 300
+SUM_INSURED = [2000, 1000, 500]
+TRIALS = 1000
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+
+def test_solvency_simulation(
+    instance: GifInstance,
+    instanceOperator: Account,
+    gifProduct: GifProduct,
+    riskpoolWallet: Account,
+    investor: Account,
+    insurer: Account,
+    customer: Account,
+):
+    product = gifProduct.getContract()
+    riskpool = gifProduct.getRiskpool().getContract()
+    token = gifProduct.getToken()
+
+    fund_riskpool(instance, instanceOperator, riskpoolWallet, riskpool, investor, token, RISKPOOL_FUNDING)
+    fund_customer(instance, instanceOperator, customer, token, len(SUM_INSURED) * PREMIUM)
+
+    multiplier = product.getPercentageMultiplier()
+    coordMultiplier = product.getCoordinatesMultiplier()
+    precMultiplier = product.getPrecipitationMultiplier()
+
+    startDate = time.time() + 100
+    endDate = time.time() + 1000
+    placeId = s2b32('10001.saopaulo')
+    tx = product.createRisk(
+        startDate, endDate, placeId,
+        coordMultiplier * -23.550620, coordMultiplier * -46.634370,
+        multiplier * 0.1, multiplier * 1.0, precMultiplier * 5.0, 2,
+        {'from': insurer})
+    riskId = tx.return_value
+
+    for sumInsured in SUM_INSURED:
+        product.applyForPolicy(customer, PREMIUM, sumInsured, riskId, {'from': insurer})
+
+    portfolio = read_portfolio(instance, product, riskpool)
+    bundleId = riskpool.getActiveBundleId(0)
+
+    assert portfolio.policies == len(SUM_INSURED)
+    assert portfolio.risk_ids == [riskId]
+    assert portfolio.places == [placeId]
+    assert portfolio.bundle_ids == [bundleId]
+    assert int(portfolio.risk_sum_insured[0]) == sum(SUM_INSURED)
+    assert portfolio.exposure[0][0] == sum(SUM_INSURED)
+
+    # no rain above the historical average: no losses
+    dry = {placeId: PlaceDistribution(samples=np.array([1.0]), days_samples=np.array([10]))}
+    report = simulate(portfolio, dry, trials=TRIALS, processes=1)
+
+    assert report.trials == TRIALS
+    assert report.loss_max == 0
+    assert report.ruin_probability == 0
+
+    # 10 times the historical average: full payout for every policy
+    wet = {placeId: PlaceDistribution(samples=np.array([50.0]), days_samples=np.array([10]))}
+    report = simulate(portfolio, wet, trials=TRIALS, processes=1)
+
+    assert report.loss_mean == sum(SUM_INSURED)
+    assert report.capital_at_risk == sum(SUM_INSURED)
+    assert report.bundle_exhaustion_probability[bundleId] == 0
+    assert report.any_bundle_exhaustion_probability == 0
+
+    # partial payout: losses match the per policy payouts of the contract
+    partial = {placeId: PlaceDistribution(samples=np.array([7.77]), days_samples=np.array([10]))}
+    report = simulate(portfolio, partial, trials=TRIALS, processes=1)
+
+    percentage = product.calculatePayoutPercentage(
+        multiplier * 0.1, multiplier * 1.0, precMultiplier * 5.0, 2, 777, 10)
+    payouts = [product.calculatePayout(percentage, sumInsured) for sumInsured in SUM_INSURED]
+
+    assert 0 < percentage < multiplier
+    assert report.loss_max == sum(payouts)
+    assert report.loss_mean == sum(payouts)
+
+    # too few rainy days: no losses
+    wetFewDays = {placeId: PlaceDistribution(samples=np.array([50.0]), days_samples=np.array([1]))}
+    report = simulate(portfolio, wetFewDays, trials=TRIALS, processes=1)
+
+    assert report.loss_max == 0